@@ -2,19 +2,38 @@
 
 import bpy
 import mathutils
+import numpy as np
+import base64
 import json
+import sys
 import threading
 import socket
 import time
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from urllib.parse import unquote, urlparse
 import tempfile
 import traceback
 import os
 import shutil
+import struct
 import zipfile
+import zlib
+import posixpath
 from bpy.props import StringProperty, IntProperty, BoolProperty, EnumProperty
+from bpy.app.handlers import persistent
 import io
-from contextlib import redirect_stdout, suppress
+import ast
+import inspect
+import fnmatch
+import itertools
+import re
+import hashlib
+import weakref
+from bisect import bisect_left, bisect_right
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager, suppress
 
 bl_info = {
     "name": "Blender MCP",
@@ -28,13 +47,1859 @@ bl_info = {
 
 RODIN_FREE_TRIAL_KEY = "k9TcfFoEhNd9cCPP2guHAHHHkctZHIRhZDywZ1euGUXwihbYLpOjQhofby80NJez"
 
+# Framed wire protocol, mirrored from blender_mcp/protocol.py in the MCP server.
+# Header: magic (4 bytes) | version (1) | flags (1) | reserved (2) | payload length (4)
+# With FLAG_ATTACHMENTS the payload is: json length (4) | JSON | aligned binary buffers
+PROTOCOL_MAGIC = b"BMCP"
+PROTOCOL_VERSION = 1
+PROTOCOL_HEADER = struct.Struct("!4sBBHI")
+PROTOCOL_JSON_LENGTH = struct.Struct("!I")
+FLAG_ATTACHMENTS = 0x01
+ATTACHMENT_ALIGNMENT = 8
+
+def _encode_frame(message, attachments=None):
+    """Serialize a message and its numpy array attachments into a single framed buffer"""
+    if not attachments:
+        payload = json.dumps(message).encode('utf-8')
+        header = PROTOCOL_HEADER.pack(PROTOCOL_MAGIC, PROTOCOL_VERSION, 0, 0, len(payload))
+        return b"".join((header, payload))
+    
+    descriptors = []
+    buffers = []
+    offset = 0
+    for name, array in attachments.items():
+        array = np.ascontiguousarray(array)
+        padding = -offset % ATTACHMENT_ALIGNMENT
+        if padding:
+            buffers.append(bytes(padding))
+            offset += padding
+        descriptors.append({
+            "name": name,
+            "dtype": array.dtype.name,
+            "shape": list(array.shape),
+            "offset": offset,
+            "nbytes": array.nbytes,
+        })
+        buffers.append(memoryview(array).cast("B"))
+        offset += array.nbytes
+    
+    body = json.dumps(dict(message, attachments=descriptors)).encode('utf-8')
+    body += b" " * (-(PROTOCOL_JSON_LENGTH.size + len(body)) % ATTACHMENT_ALIGNMENT)
+    length = PROTOCOL_JSON_LENGTH.size + len(body) + offset
+    header = PROTOCOL_HEADER.pack(PROTOCOL_MAGIC, PROTOCOL_VERSION, FLAG_ATTACHMENTS, 0, length)
+    return b"".join([header, PROTOCOL_JSON_LENGTH.pack(len(body)), body, *buffers])
+
+def _recv_exactly(sock, size):
+    """Read exactly size bytes into a preallocated buffer, or None on disconnect"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            return None
+        received += count
+    return buffer
+
+def _check_attachment_descriptor(descriptor, binary_size):
+    """Raise ValueError unless an attachment descriptor is well formed and inside the binary section"""
+    if not isinstance(descriptor, dict):
+        raise ValueError(f"Attachment descriptor must be an object, got {type(descriptor).__name__}")
+    for key, kind in (("name", str), ("dtype", str), ("shape", list), ("offset", int), ("nbytes", int)):
+        value = descriptor.get(key)
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise ValueError(f"Attachment descriptor field {key!r} must be {kind.__name__}, got {value!r}")
+    name = descriptor["name"]
+    if any(not isinstance(dim, int) or isinstance(dim, bool) or dim < 0 for dim in descriptor["shape"]):
+        raise ValueError(f"Attachment {name} has an invalid shape: {descriptor['shape']!r}")
+    if descriptor["offset"] < 0 or descriptor["nbytes"] < 0:
+        raise ValueError(f"Attachment {name} has a negative offset or size")
+    if descriptor["offset"] + descriptor["nbytes"] > binary_size:
+        raise ValueError(f"Attachment {name} overruns the frame")
+
+def _recv_frame(sock, stats=None):
+    """
+    Read one framed message, or None if the client disconnected.
+    
+    Attachments come back under message["attachments"] as numpy arrays
+    viewing the receive buffer. stats, if given, receives the frame's bytes
+    and the seconds spent reading and decoding it after its header arrived.
+    """
+    header = _recv_exactly(sock, PROTOCOL_HEADER.size)
+    if header is None:
+        return None
+    started = time.perf_counter()
+    magic, version, flags, _reserved, length = PROTOCOL_HEADER.unpack(header)
+    if magic != PROTOCOL_MAGIC or version != PROTOCOL_VERSION:
+        raise ValueError(f"Invalid frame header: magic={magic!r}, version={version}")
+    payload = _recv_exactly(sock, length)
+    if payload is None:
+        return None
+    if not flags & FLAG_ATTACHMENTS:
+        message = json.loads(payload.decode('utf-8'))
+        if stats is not None:
+            stats.update(bytes=PROTOCOL_HEADER.size + length, seconds=time.perf_counter() - started)
+        return message
+    
+    (json_length,) = PROTOCOL_JSON_LENGTH.unpack_from(payload)
+    json_end = PROTOCOL_JSON_LENGTH.size + json_length
+    if json_end > length:
+        raise ValueError(f"JSON length {json_length} overruns the {length} byte frame")
+    message = json.loads(payload[PROTOCOL_JSON_LENGTH.size:json_end].decode('utf-8'))
+    if not isinstance(message, dict) or not isinstance(message.get("attachments", []), list):
+        raise ValueError("Frame with attachments must hold an object with an attachments list")
+    binary = memoryview(payload)[json_end:]
+    attachments = {}
+    for descriptor in message.get("attachments", []):
+        _check_attachment_descriptor(descriptor, len(binary))
+        start = descriptor["offset"]
+        data = binary[start:start + descriptor["nbytes"]]
+        attachments[descriptor["name"]] = np.frombuffer(data, dtype=descriptor["dtype"]).reshape(descriptor["shape"])
+    message["attachments"] = attachments
+    if stats is not None:
+        stats.update(bytes=PROTOCOL_HEADER.size + length, seconds=time.perf_counter() - started)
+    return message
+
+def _encode_inline_attachments(attachments):
+    """Base64-encode numpy attachments for clients on the legacy JSON protocol"""
+    return {
+        name: {
+            "dtype": np.asarray(array).dtype.name,
+            "shape": list(np.shape(array)),
+            "base64": base64.b64encode(np.ascontiguousarray(array).tobytes()).decode('ascii'),
+        }
+        for name, array in attachments.items()
+    }
+
+def _decode_inline_attachments(attachments):
+    """Decode base64 attachments sent by a client on the legacy JSON protocol"""
+    return {
+        name: np.frombuffer(base64.b64decode(attachment["base64"]), dtype=attachment["dtype"]).reshape(attachment["shape"])
+        for name, attachment in attachments.items()
+    }
+
+# Histogram buckets, mirrored from blender_mcp/metrics.py in the MCP server,
+# which turns the counts reported here into percentiles and Prometheus text
+METRICS_LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                           0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+METRICS_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                        4194304, 16777216, 67108864, 268435456)
+METRICS_SIZE_STAGES = ("bytes_in", "bytes_out")
+
+class BridgeMetrics:
+    """
+    Histograms of where each command's time and bytes go inside the addon.
+    
+    Kept per command type and stage: receive (reading and decoding the command),
+    queue (waiting for a main-thread timer tick), handler, serialize (encoding
+    the response), total (from receiving the command to sending its response),
+    bytes_in and bytes_out. Only bucket counts are stored, so recording is cheap
+    and memory stays bounded however long the session runs.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self.started = time.time()
+    
+    def record(self, command_type, stage, value):
+        bounds = METRICS_SIZE_BUCKETS if stage in METRICS_SIZE_STAGES else METRICS_LATENCY_BUCKETS
+        with self._lock:
+            histogram = self._histograms.get((command_type, stage))
+            if histogram is None:
+                histogram = self._histograms[(command_type, stage)] = {
+                    "counts": [0] * (len(bounds) + 1), "sum": 0.0, "count": 0, "min": value, "max": value,
+                }
+            histogram["counts"][bisect_left(bounds, value)] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+            histogram["min"] = min(histogram["min"], value)
+            histogram["max"] = max(histogram["max"], value)
+    
+    def snapshot(self, reset=False):
+        with self._lock:
+            snapshot = {
+                "since": self.started,
+                "histograms": [
+                    dict(histogram, command=command_type, stage=stage, counts=list(histogram["counts"]))
+                    for (command_type, stage), histogram in self._histograms.items()
+                ],
+            }
+            if reset:
+                self._histograms.clear()
+                self.started = time.time()
+            return snapshot
+
+class _ThreadStdout:
+    """
+    sys.stdout stand-in that routes each thread's writes to the buffer it is capturing into.
+    
+    Threads that aren't capturing write through to the real stream, so worker
+    threads logging with print() while user code runs on the main thread don't
+    end up in the output returned for that code.
+    """
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self.buffers = {}
+    
+    def write(self, text):
+        return self.buffers.get(threading.get_ident(), self.stream).write(text)
+    
+    def flush(self):
+        self.buffers.get(threading.get_ident(), self.stream).flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+
+@contextmanager
+def _capture_stdout(buffer):
+    """Capture what the current thread prints into buffer, unlike redirect_stdout which captures every thread"""
+    proxy = sys.stdout
+    if not isinstance(proxy, _ThreadStdout):
+        proxy = sys.stdout = _ThreadStdout(sys.stdout)
+    ident = threading.get_ident()
+    previous = proxy.buffers.get(ident)
+    proxy.buffers[ident] = buffer
+    try:
+        yield buffer
+    finally:
+        if previous is not None:
+            proxy.buffers[ident] = previous
+        else:
+            proxy.buffers.pop(ident, None)
+            if not proxy.buffers and sys.stdout is proxy:
+                sys.stdout = proxy.stream
+
+# Provider API roots. Each can be pointed at a local stand-in server with
+# BLENDERMCP_<PROVIDER>_URL, e.g. BLENDERMCP_POLYHAVEN_URL=http://127.0.0.1:8000
+PROVIDER_BASE_URLS = {
+    "polyhaven": "https://api.polyhaven.com",
+    "sketchfab": "https://api.sketchfab.com",
+    "hyper3d": "https://hyperhuman.deemos.com",
+    "fal_ai": "https://queue.fal.run",
+}
+
+
+class ProviderClient:
+    """
+    Shared HTTP session for one asset provider.
+    
+    Connections are pooled and kept alive across requests, every request gets a
+    connect/read timeout unless the caller passes one, idempotent requests are
+    retried with exponential backoff on connection errors and 429/5xx responses,
+    and at most max_per_host requests run against any one host at a time.
+    Relative URLs are resolved against the provider's base URL; absolute ones
+    (download links returned by the API) go through the same session. A
+    stream=True response keeps its host slot until it is closed, so read it
+    inside a with block.
+    """
+    DEFAULT_TIMEOUT = (10, 60)  # (connect, read) seconds
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    
+    def __init__(self, name, base_url, max_per_host=6, retries=3, backoff=0.5, timeout=DEFAULT_TIMEOUT):
+        self.name = name
+        self.base_url = os.environ.get(f"BLENDERMCP_{name.upper()}_URL", base_url).rstrip("/")
+        self.timeout = timeout
+        self.max_per_host = max_per_host
+        self._host_slots = {}
+        self._host_slots_lock = threading.Lock()
+        
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max_per_host, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+    
+    def url(self, path):
+        if path.startswith(("http://", "https://")):
+            return path
+        return f"{self.base_url}/{path.lstrip('/')}"
+    
+    def request(self, method, url, **kwargs):
+        url = self.url(url)
+        kwargs.setdefault("timeout", self.timeout)
+        slot = self._host_slot(url)
+        slot.acquire()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except BaseException:
+            slot.release()
+            raise
+        if not kwargs.get("stream"):
+            slot.release()
+            return response
+        
+        # The body is still being read from the connection; release the slot on close
+        released = threading.Lock()
+        def release():
+            if released.acquire(blocking=False):
+                slot.release()
+        close = response.close
+        def close_and_release():
+            try:
+                close()
+            finally:
+                release()
+        response.close = close_and_release
+        # A response dropped without being closed still gives its slot back
+        weakref.finalize(response, release)
+        return response
+    
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+    
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+    
+    def close(self):
+        self.session.close()
+    
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._host_slots_lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.max_per_host)
+        return slot
+
+
+class AssetDownloadError(Exception):
+    """An asset provider refused or failed a download, with a message for the caller"""
+
+
+class AssetCache:
+    """
+    Size-bounded LRU cache of downloaded asset files on disk.
+    
+    Entries are keyed by provider, asset id, resolution and format. Each entry is a
+    directory named after the key's hash holding the files with their original
+    names, so importers can read them in place. The sha256 and size of every file
+    are recorded in index.json when the entry is stored; entries whose files went
+    missing or changed size are dropped on lookup, as are ones whose sha256 no
+    longer matches. Hashes are checked on an entry's first hit each session and
+    whenever its files' mtimes change. Hits only update last_used in
+    memory; the index is written at most every INDEX_FLUSH_SECONDS for them, and
+    whenever entries are stored or evicted or the cache is flushed. Entries
+    fetched with pin are read in place, so eviction skips them until released.
+    """
+    INDEX_FILE = "index.json"
+    DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+    INDEX_FLUSH_SECONDS = 30.0
+    # Partial downloads nobody came back to resume are cleaned up after this long
+    STALE_STAGING_SECONDS = 24 * 60 * 60
+    
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self._lock = threading.RLock()
+        self.root = None
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index = {}
+        self._index_dirty = False
+        self._index_saved = 0.0
+        # key -> [lock, fetches using it], dropped once the last fetch is done
+        self._key_locks = {}
+        # key -> callers still reading the entry's files
+        self._pins = {}
+        # key -> {file: mtime} when its hashes were last checked this session
+        self._verified = {}
+        self.configure(root, max_bytes)
+    
+    @staticmethod
+    def default_root():
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+        return os.path.join(base, "blender_mcp", "assets")
+    
+    @staticmethod
+    def make_key(provider, asset_id, resolution=None, file_format=None):
+        return "/".join(str(part) for part in (provider, asset_id, resolution or "-", file_format or "-"))
+    
+    def configure(self, root, max_bytes):
+        """Point the cache at a directory and size limit, loading its index if it moved"""
+        root = os.path.abspath(os.path.expanduser(root or self.default_root()))
+        with self._lock:
+            self.max_bytes = max_bytes
+            if root != self.root:
+                self.flush()
+                os.makedirs(os.path.join(root, "entries"), exist_ok=True)
+                self.root = root
+                self._index = self._load_index()
+                self._verified.clear()
+                self._clean_staging()
+            if self._evict():
+                self._save_index()
+    
+    def get(self, key, pin=False):
+        """Return the entry stored under key, or None on a miss"""
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and not self._is_intact(key, entry):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            if pin:
+                self._pin(key)
+            self.hits += 1
+            entry["last_used"] = time.time()
+            self._index_dirty = True
+            if time.monotonic() - self._index_saved >= self.INDEX_FLUSH_SECONDS:
+                self._save_index()
+            return self._describe(entry)
+    
+    def stage(self, key):
+        """
+        Return the directory an entry for key is downloaded into.
+        
+        The directory is the same for every attempt, so files an interrupted
+        download left behind can be resumed instead of fetched again.
+        """
+        staging_dir = os.path.join(self.root, "staging", self._key_hash(key))
+        os.makedirs(staging_dir, exist_ok=True)
+        return staging_dir
+    
+    def store(self, key, staging_dir, meta=None, pin=False):
+        """Move a filled staging directory into the cache under key and return the entry"""
+        files = {}
+        for dirpath, _dirnames, filenames in os.walk(staging_dir):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                relpath = os.path.relpath(path, staging_dir).replace(os.sep, "/")
+                files[relpath] = self._hash_file(path)
+        
+        entry_dir = os.path.join("entries", self._key_hash(key))
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+            shutil.rmtree(os.path.join(self.root, entry_dir), ignore_errors=True)
+            os.replace(staging_dir, os.path.join(self.root, entry_dir))
+            now = time.time()
+            entry = {
+                "dir": entry_dir,
+                "files": files,
+                "size": sum(info["size"] for info in files.values()),
+                "meta": meta or {},
+                "created": now,
+                "last_used": now,
+            }
+            self._index[key] = entry
+            # The files were hashed just now
+            self._verified[key] = self._file_mtimes(entry)
+            if pin:
+                self._pin(key)
+            self._evict(keep=key)
+            self._save_index()
+            return self._describe(entry)
+    
+    def fetch(self, key, download, pin=False):
+        """
+        Return the entry for key, filling it on a miss.
+        
+        download(staging_dir) writes the asset's files into staging_dir and returns
+        metadata to keep with the entry. If it raises, nothing is cached and the
+        partial files stay in staging_dir for the next attempt to resume. Concurrent
+        fetches of the same key wait for the first one rather than downloading twice.
+        With pin, the entry isn't evicted until release(key) is called.
+        """
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, [threading.Lock(), 0])
+            key_lock[1] += 1
+        try:
+            with key_lock[0]:
+                entry = self.get(key, pin)
+                if entry is not None:
+                    return entry
+                staging_dir = self.stage(key)
+                meta = download(staging_dir)
+                return self.store(key, staging_dir, meta, pin)
+        finally:
+            with self._lock:
+                key_lock[1] -= 1
+                if not key_lock[1]:
+                    del self._key_locks[key]
+    
+    def release(self, key):
+        """Let an entry fetched with pin be evicted again"""
+        with self._lock:
+            if self._pins.get(key, 0) > 1:
+                self._pins[key] -= 1
+            else:
+                self._pins.pop(key, None)
+    
+    def flush(self):
+        """Write last_used times recorded by hits since the index was last saved"""
+        with self._lock:
+            if self._index_dirty and self.root:
+                self._save_index()
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            providers = {}
+            for key in self._index:
+                provider = key.split("/", 1)[0]
+                providers[provider] = providers.get(provider, 0) + 1
+            return {
+                "location": self.root,
+                "entries": len(self._index),
+                "providers": providers,
+                "size_bytes": sum(entry["size"] for entry in self._index.values()),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+    
+    def _describe(self, entry):
+        return dict(entry, path=os.path.join(self.root, entry["dir"]))
+    
+    @staticmethod
+    def _key_hash(key):
+        return hashlib.sha256(key.encode('utf-8')).hexdigest()
+    
+    def _clean_staging(self):
+        staging = os.path.join(self.root, "staging")
+        cutoff = time.time() - self.STALE_STAGING_SECONDS
+        with suppress(OSError):
+            for name in os.listdir(staging):
+                path = os.path.join(staging, name)
+                with suppress(OSError):
+                    if os.path.getmtime(path) < cutoff:
+                        if os.path.isdir(path):
+                            shutil.rmtree(path, ignore_errors=True)
+                        else:
+                            os.unlink(path)
+    
+    def _file_mtimes(self, entry):
+        """{file: mtime} of an entry's files, or None if any is missing or changed size"""
+        base = os.path.join(self.root, entry["dir"])
+        mtimes = {}
+        for relpath, info in entry["files"].items():
+            try:
+                stat = os.stat(os.path.join(base, relpath))
+            except OSError:
+                return None
+            if stat.st_size != info["size"]:
+                return None
+            mtimes[relpath] = stat.st_mtime_ns
+        return mtimes
+    
+    def _is_intact(self, key, entry):
+        mtimes = self._file_mtimes(entry)
+        if mtimes is None:
+            return False
+        if self._verified.get(key) == mtimes:
+            return True
+        base = os.path.join(self.root, entry["dir"])
+        for relpath, info in entry["files"].items():
+            try:
+                if self._hash_file(os.path.join(base, relpath))["sha256"] != info["sha256"]:
+                    return False
+            except OSError:
+                return False
+        self._verified[key] = mtimes
+        return True
+    
+    def _pin(self, key):
+        self._pins[key] = self._pins.get(key, 0) + 1
+    
+    def _remove(self, key):
+        self._verified.pop(key, None)
+        entry = self._index.pop(key)
+        shutil.rmtree(os.path.join(self.root, entry["dir"]), ignore_errors=True)
+    
+    def _evict(self, keep=None):
+        """Drop least recently used entries until the cache fits, returns True if any went"""
+        total = sum(entry["size"] for entry in self._index.values())
+        evicted = False
+        for key in sorted(self._index, key=lambda k: self._index[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep or key in self._pins:
+                continue
+            total -= self._index[key]["size"]
+            self._remove(key)
+            self.evictions += 1
+            evicted = True
+        return evicted
+    
+    @staticmethod
+    def _hash_file(path, chunk_size=1024 * 1024):
+        digest = hashlib.sha256()
+        size = 0
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                digest.update(chunk)
+                size += len(chunk)
+        return {"sha256": digest.hexdigest(), "size": size}
+    
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.root, self.INDEX_FILE)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_index(self):
+        path = os.path.join(self.root, self.INDEX_FILE)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+        self._index_dirty = False
+        self._index_saved = time.monotonic()
+
+
+class ZipStreamError(Exception):
+    """An archive uses a zip feature that can't be extracted while it streams"""
+
+
+class ZipStreamExtractor:
+    """
+    Extract a glTF model from a zip archive as its bytes arrive.
+    
+    Zip archives can be read front to back: every member starts with a local
+    header giving its name, compression and size, and the central directory at
+    the end only repeats that information. Member names are checked for path
+    traversal as soon as their header arrives. Until the glTF file has been
+    extracted every member is kept; after that only the files it references
+    are, and the extractor is complete once they are all on disk, so the rest
+    of the archive doesn't have to be downloaded.
+    
+    Members cut off by a dropped connection are discarded, and resume_offset
+    is where a Range request should continue from.
+    """
+    LOCAL_HEADER = struct.Struct("<IHHHHHIIIHH")
+    LOCAL_HEADER_SIGNATURE = 0x04034b50
+    DATA_DESCRIPTOR_SIGNATURE = 0x08074b50
+    # Central directory, zip64 end of central directory and end of central directory
+    END_SIGNATURES = (0x02014b50, 0x06064b50, 0x06054b50)
+    FLAG_ENCRYPTED = 0x01
+    FLAG_DATA_DESCRIPTOR = 0x08
+    FLAG_UTF8 = 0x800
+    GLTF_EXTENSIONS = (".gltf", ".glb")
+    
+    def __init__(self, target_dir):
+        self.target_dir = os.path.abspath(target_dir)
+        self.extracted = {}     # archive name -> path on disk
+        self.main_file = None   # archive name of the glTF file
+        self.references = None  # archive names the glTF file needs, once it is extracted
+        self.finished = False   # reached the central directory
+        self.resume_offset = 0
+        self._position = 0      # archive offset of the first byte in _buffer
+        self._buffer = bytearray()
+        self._entry = None
+    
+    @property
+    def complete(self):
+        return self.finished or (self.references is not None and self.references.issubset(self.extracted))
+    
+    @property
+    def missing(self):
+        return sorted((self.references or set()) - set(self.extracted))
+    
+    def feed(self, data):
+        """Process the next chunk of the archive"""
+        self._buffer += data
+        while not self.complete:
+            try:
+                if self._entry is None:
+                    progressed = self._read_header()
+                elif self._entry["state"] == "data":
+                    progressed = self._read_data()
+                else:
+                    progressed = self._read_descriptor()
+            except zlib.error as e:
+                raise AssetDownloadError(f"Downloaded model archive is corrupt: {str(e)}")
+            if not progressed:
+                break
+    
+    def rewind(self, offset=None):
+        """Drop the member in progress and continue from resume_offset, or from the start if offset is 0"""
+        if self._entry is not None:
+            self._discard_entry()
+        self.resume_offset = self._position = self.resume_offset if offset is None else offset
+        self._buffer.clear()
+        return self.resume_offset
+    
+    def prune(self):
+        """Delete extracted files the glTF file doesn't need, including leftovers from earlier attempts"""
+        keep = {self.extracted[name] for name in (self.references or set()) | {self.main_file} if name in self.extracted}
+        for root, _dirs, files in os.walk(self.target_dir):
+            for file_name in files:
+                path = os.path.join(root, file_name)
+                if path not in keep:
+                    os.unlink(path)
+    
+    def _consume(self, size):
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        self._position += size
+        return data
+    
+    def _read_header(self):
+        if len(self._buffer) < 4:
+            return False
+        (signature,) = struct.unpack_from("<I", self._buffer)
+        if signature in self.END_SIGNATURES:
+            self.finished = True
+            return False
+        if signature != self.LOCAL_HEADER_SIGNATURE:
+            raise AssetDownloadError("Downloaded model archive is not a valid zip file")
+        if len(self._buffer) < self.LOCAL_HEADER.size:
+            return False
+        (_signature, _version, flags, method, _time, _date, crc, compressed_size, _size,
+         name_length, extra_length) = self.LOCAL_HEADER.unpack_from(self._buffer)
+        header_size = self.LOCAL_HEADER.size + name_length + extra_length
+        if len(self._buffer) < header_size:
+            return False
+        
+        raw_name = bytes(self._buffer[self.LOCAL_HEADER.size:self.LOCAL_HEADER.size + name_length])
+        name = raw_name.decode("utf-8" if flags & self.FLAG_UTF8 else "cp437")
+        if flags & self.FLAG_ENCRYPTED:
+            raise ZipStreamError(f"{name} is encrypted")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise ZipStreamError(f"{name} uses compression method {method}")
+        if compressed_size == 0xFFFFFFFF:
+            raise ZipStreamError(f"{name} is a zip64 member")
+        sized = not flags & self.FLAG_DATA_DESCRIPTOR
+        if not sized and method == zipfile.ZIP_STORED:
+            raise ZipStreamError(f"{name} is stored without its size")
+        
+        path = self._member_path(name)
+        self._consume(header_size)
+        name = self._normalize(name)
+        wanted = not name.endswith("/") and (self.references is None or name in self.references)
+        self._entry = {
+            "state": "data",
+            "name": name,
+            "path": path,
+            "crc": crc,
+            "remaining": compressed_size if sized else None,
+            "decompressor": zlib.decompressobj(-zlib.MAX_WBITS) if method == zipfile.ZIP_DEFLATED else None,
+            "file": None,
+            "actual_crc": 0,
+        }
+        if wanted:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            self._entry["file"] = open(path, "wb")
+        return True
+    
+    def _read_data(self):
+        entry = self._entry
+        decompressor = entry["decompressor"]
+        if entry["remaining"] is None:
+            # Size unknown until the deflate stream ends, the data descriptor follows it
+            if not self._buffer:
+                return False
+            data = self._consume(len(self._buffer))
+            self._write(decompressor.decompress(data))
+            if decompressor.eof:
+                unused = decompressor.unused_data
+                self._buffer[:0] = unused
+                self._position -= len(unused)
+                entry["state"] = "descriptor"
+            return True
+        
+        if entry["remaining"] and not self._buffer:
+            return False
+        data = self._consume(min(len(self._buffer), entry["remaining"]))
+        entry["remaining"] -= len(data)
+        # Skipped members with a known size don't need decompressing
+        if entry["file"] is not None:
+            self._write(decompressor.decompress(data) if decompressor else data)
+            if decompressor and not entry["remaining"]:
+                self._write(decompressor.flush())
+        if not entry["remaining"]:
+            self._finish_entry(entry["crc"])
+        return True
+    
+    def _read_descriptor(self):
+        if len(self._buffer) < 16:
+            return False
+        (signature,) = struct.unpack_from("<I", self._buffer)
+        start = 4 if signature == self.DATA_DESCRIPTOR_SIGNATURE else 0
+        (crc,) = struct.unpack_from("<I", self._buffer, start)
+        self._consume(start + 12)
+        self._finish_entry(crc)
+        return True
+    
+    def _write(self, data):
+        entry = self._entry
+        if entry["file"] is not None and data:
+            entry["file"].write(data)
+            entry["actual_crc"] = zlib.crc32(data, entry["actual_crc"])
+    
+    def _finish_entry(self, crc):
+        entry, self._entry = self._entry, None
+        self.resume_offset = self._position
+        if entry["file"] is None:
+            return
+        entry["file"].close()
+        if entry["actual_crc"] != crc:
+            os.unlink(entry["path"])
+            raise AssetDownloadError(f"Downloaded model archive is corrupt: bad CRC for {entry['name']}")
+        name = entry["name"]
+        self.extracted[name] = entry["path"]
+        if self.main_file is None and name.lower().endswith(self.GLTF_EXTENSIONS):
+            self.main_file = name
+            self.references = self._gltf_references(name, entry["path"])
+    
+    def _discard_entry(self):
+        entry, self._entry = self._entry, None
+        if entry["file"] is not None:
+            entry["file"].close()
+            with suppress(OSError):
+                os.unlink(entry["path"])
+    
+    def _member_path(self, name):
+        # Convert directory separators to the current OS style
+        # This handles both / and \ in zip entries
+        target_path = os.path.abspath(os.path.join(self.target_dir, os.path.normpath(name)))
+        
+        # Ensure the normalized path doesn't escape the target directory
+        if os.path.commonpath([self.target_dir, target_path]) != self.target_dir:
+            raise AssetDownloadError("Security issue: Zip contains files with path traversal attempt")
+        
+        # Additional explicit check for directory traversal
+        if ".." in name:
+            raise AssetDownloadError("Security issue: Zip contains files with directory traversal sequence")
+        return target_path
+    
+    @staticmethod
+    def _normalize(name):
+        name = name.replace("\\", "/")
+        return posixpath.normpath(name) + ("/" if name.endswith("/") else "")
+    
+    @classmethod
+    def _gltf_references(cls, name, path):
+        """Archive names of the buffers and images a .gltf or .glb file points to"""
+        try:
+            with open(path, "rb") as f:
+                if name.lower().endswith(".glb"):
+                    # 12-byte file header, then the JSON chunk's length and type
+                    header = f.read(20)
+                    if len(header) < 20 or header[:4] != b"glTF":
+                        return set()
+                    (json_length,) = struct.unpack_from("<I", header, 12)
+                    document = json.loads(f.read(json_length))
+                else:
+                    document = json.load(f)
+        except ValueError as e:
+            raise AssetDownloadError(f"Downloaded glTF file is invalid: {str(e)}")
+        
+        base = posixpath.dirname(name)
+        references = set()
+        for item in itertools.chain(document.get("buffers", []), document.get("images", [])):
+            uri = item.get("uri")
+            if uri and not uri.startswith("data:") and "://" not in uri:
+                references.add(cls._normalize(posixpath.join(base, unquote(uri))))
+        return references
+
+
+class PolyHavenCatalog:
+    """
+    Local copy of the Poly Haven asset catalog with an inverted search index.
+    
+    The full /assets listing is fetched once and kept on disk. After ttl seconds
+    it is revalidated with If-None-Match/If-Modified-Since, so an unchanged
+    catalog costs a 304 instead of a full download. Names, tags and categories
+    are indexed in memory, so searches and category counts run locally.
+    """
+    ASSET_TYPES = {"hdris": 0, "textures": 1, "models": 2}
+    SORT_KEYS = ("relevance", "downloads", "name", "date")
+    DEFAULT_TTL = 6 * 60 * 60
+    # How much a query term matching each field counts towards relevance
+    FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "categories": 1.5, "id": 1.0}
+    TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+    
+    def __init__(self, client, cache_path, ttl=DEFAULT_TTL):
+        self.client = client
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._assets = None
+        self._validators = {}
+        self._fetched_at = 0.0
+        self._index = {}
+        self._vocabulary = []
+    
+    def assets(self):
+        """Return the catalog as {asset_id: asset data}, refreshing it if it is stale"""
+        return self._snapshot()[0]
+    
+    def _snapshot(self):
+        """
+        (assets, index, vocabulary) from the same refresh, refreshing them if
+        they are stale. A refresh replaces all three rather than changing them,
+        so the snapshot stays consistent after the lock is released.
+        """
+        with self._lock:
+            if self._assets is None:
+                self._load()
+            if self._assets is None or time.time() - self._fetched_at > self.ttl:
+                self._refresh()
+            return self._assets, self._index, self._vocabulary
+    
+    def categories(self, asset_type="all"):
+        """Count the assets in each category, like the /categories endpoint"""
+        counts = {}
+        for data in self._filter(self.assets(), asset_type):
+            for category in data.get("categories", []):
+                counts[category] = counts.get(category, 0) + 1
+        return counts
+    
+    def search(self, query=None, asset_type="all", categories=None, sort=None, offset=0, limit=20):
+        """
+        Search the catalog and return one page of results.
+        
+        Every query term has to match the start of a word in the asset's name, tags,
+        categories or id. Results are ranked by relevance when there is a query and
+        by download count otherwise.
+        """
+        assets, index, vocabulary = self._snapshot()
+        sort = sort or ("relevance" if query else "downloads")
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Invalid sort: {sort}. Must be one of: {', '.join(self.SORT_KEYS)}")
+        
+        wanted_categories = set()
+        if categories:
+            if isinstance(categories, str):
+                categories = categories.split(",")
+            wanted_categories = {c.strip() for c in categories if c.strip()}
+        
+        scores = None
+        for term in self._tokenize(query or ""):
+            # Prefix match against the sorted vocabulary
+            term_scores = {}
+            start = bisect_left(vocabulary, term)
+            for token in itertools.takewhile(lambda t: t.startswith(term), vocabulary[start:]):
+                for asset_id, weight in index[token].items():
+                    term_scores[asset_id] = max(term_scores.get(asset_id, 0.0), weight)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {asset_id: score + term_scores[asset_id] for asset_id, score in scores.items() if asset_id in term_scores}
+        
+        candidate_ids = assets.keys() if scores is None else scores.keys()
+        type_id = self.ASSET_TYPES.get(asset_type)
+        matches = [
+            asset_id for asset_id in candidate_ids
+            if (type_id is None or assets[asset_id].get("type") == type_id)
+            and wanted_categories.issubset(assets[asset_id].get("categories", []))
+        ]
+        
+        if sort == "relevance" and scores is not None:
+            matches.sort(key=lambda a: (-scores[a], -assets[a].get("download_count", 0)))
+        elif sort == "name":
+            matches.sort(key=lambda a: assets[a].get("name", a).lower())
+        elif sort == "date":
+            matches.sort(key=lambda a: assets[a].get("date_published", 0), reverse=True)
+        else:
+            matches.sort(key=lambda a: assets[a].get("download_count", 0), reverse=True)
+        
+        offset = max(0, offset)
+        page = matches[offset:offset + max(0, limit)]
+        return {
+            "assets": {asset_id: assets[asset_id] for asset_id in page},
+            "total_count": len(matches),
+            "returned_count": len(page),
+            "offset": offset,
+            "sort": sort,
+        }
+    
+    def _filter(self, assets, asset_type):
+        type_id = self.ASSET_TYPES.get(asset_type)
+        return [data for data in assets.values() if type_id is None or data.get("type") == type_id]
+    
+    def _load(self):
+        try:
+            with open(self.cache_path) as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return
+        self._set_assets(cached["assets"])
+        self._validators = cached.get("validators", {})
+        self._fetched_at = cached.get("fetched_at", 0.0)
+    
+    def _refresh(self):
+        headers = {}
+        if self._assets is not None:
+            if "etag" in self._validators:
+                headers["If-None-Match"] = self._validators["etag"]
+            if "last_modified" in self._validators:
+                headers["If-Modified-Since"] = self._validators["last_modified"]
+        try:
+            response = self.client.get("/assets", headers=headers)
+        except requests.exceptions.RequestException:
+            if self._assets is not None:
+                return  # Offline: keep serving the stale copy
+            raise
+        
+        if response.status_code == 304 and self._assets is not None:
+            self._fetched_at = time.time()
+        elif response.status_code == 200:
+            self._set_assets(response.json())
+            self._validators = {}
+            if response.headers.get("ETag"):
+                self._validators["etag"] = response.headers["ETag"]
+            if response.headers.get("Last-Modified"):
+                self._validators["last_modified"] = response.headers["Last-Modified"]
+            self._fetched_at = time.time()
+        elif self._assets is None:
+            raise AssetDownloadError(f"API request failed with status code {response.status_code}")
+        else:
+            return
+        self._save()
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"assets": self._assets, "validators": self._validators, "fetched_at": self._fetched_at}, f)
+        os.replace(tmp_path, self.cache_path)
+    
+    def _set_assets(self, assets):
+        index = {}
+        for asset_id, data in assets.items():
+            fields = {
+                "name": data.get("name", ""),
+                "tags": " ".join(data.get("tags", [])),
+                "categories": " ".join(data.get("categories", [])),
+                "id": asset_id.replace("_", " "),
+            }
+            for field_name, text in fields.items():
+                weight = self.FIELD_WEIGHTS[field_name]
+                for token in self._tokenize(text):
+                    postings = index.setdefault(token, {})
+                    postings[asset_id] = max(postings.get(asset_id, 0.0), weight)
+        self._assets = assets
+        self._index = index
+        self._vocabulary = sorted(index)
+    
+    @classmethod
+    def _tokenize(cls, text):
+        return cls.TOKEN_PATTERN.findall(text.lower())
+
+
+class ResponseCache:
+    """
+    In-memory TTL cache for API responses.
+    
+    Concurrent requests for a key that is not cached yet share one fetch: the
+    first caller runs it and the others wait for its result. Each cached
+    response gets a cache_key derived from its content, so clients can tell
+    whether a response is the one they already processed.
+    """
+    
+    def __init__(self, ttl=300, max_entries=256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}  # key -> (expires, response), oldest first
+        self._in_flight = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+    
+    @staticmethod
+    def make_key(*parts):
+        return json.dumps(parts, sort_keys=True, default=str)
+    
+    def get_or_fetch(self, key, fetch, cacheable=lambda response: True):
+        """Return the cached response for key, or fetch() it once however many callers ask"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] > time.monotonic():
+                self.hits += 1
+                # Refresh its LRU position
+                self._entries[key] = self._entries.pop(key)
+                return cached[1]
+            waiting_on = self._in_flight.get(key)
+            if waiting_on is not None:
+                self.coalesced += 1
+            else:
+                self.misses += 1
+                self._in_flight[key] = Future()
+        
+        if waiting_on is not None:
+            # Another caller is already fetching this key
+            return waiting_on.result()
+        
+        try:
+            response = fetch()
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key).set_exception(e)
+            raise
+        
+        with self._lock:
+            if cacheable(response):
+                if isinstance(response, dict):
+                    digest = hashlib.sha1(json.dumps(response, sort_keys=True).encode('utf-8')).hexdigest()
+                    response["cache_key"] = digest[:16]
+                self._entries.pop(key, None)
+                self._entries[key] = (time.monotonic() + self.ttl, response)
+                while len(self._entries) > self.max_entries:
+                    self._entries.pop(next(iter(self._entries)))
+            self._in_flight.pop(key).set_result(response)
+        return response
+    
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses + self.coalesced
+            return {
+                "entries": len(self._entries),
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "hit_rate": round((self.hits + self.coalesced) / lookups, 3) if lookups else None,
+            }
+
+
+class CodeSessions:
+    """
+    Compiled code, named namespaces and registered snippets for execute_code.
+    
+    Code is compiled once per distinct source and the code object reused, so
+    resending a snippet skips the compiler. Named namespaces keep the imports,
+    helper functions and variables a snippet defined for later calls, and
+    snippets registered under a name are run with parameters instead of
+    resending their source. Only used from the main thread.
+    """
+    MAX_COMPILED = 256
+    JOB_FUNCTION = "__blendermcp_job__"
+    
+    def __init__(self):
+        self._compiled = {}  # (sha256, filename) -> code object, oldest first
+        self.namespaces = {}
+        self.snippets = {}
+        self.hits = 0
+        self.misses = 0
+    
+    def compile(self, source, filename="<blendermcp>", as_job=False):
+        """
+        Return the code object for source, compiling it on first use.
+        
+        With as_job, the code defines a function named JOB_FUNCTION whose body is
+        the source, so the source may yield and return.
+        """
+        key = (hashlib.sha256(source.encode('utf-8')).hexdigest(), filename, as_job)
+        code = self._compiled.pop(key, None)
+        if code is None:
+            self.misses += 1
+            if as_job:
+                # Swapped in at the AST level so line numbers and string literals stay as written
+                module = ast.parse(f"def {self.JOB_FUNCTION}():\n    pass\n")
+                module.body[0].body = ast.parse(source, filename).body or module.body[0].body
+                code = compile(module, filename, "exec")
+            else:
+                code = compile(source, filename, "exec")
+            while len(self._compiled) >= self.MAX_COMPILED:
+                self._compiled.pop(next(iter(self._compiled)))
+        else:
+            self.hits += 1
+        # Most recently used last
+        self._compiled[key] = code
+        return code
+    
+    @staticmethod
+    def json_value(value):
+        """value if it can be sent as JSON, otherwise its repr"""
+        try:
+            json.dumps(value)
+            return value
+        except (TypeError, ValueError):
+            return repr(value)
+    
+    def namespace(self, name=None, reset=False):
+        """Return the persistent namespace called name, or a fresh one if name is None"""
+        if name is None:
+            return {"bpy": bpy}
+        if reset or name not in self.namespaces:
+            self.namespaces[name] = {"bpy": bpy, "__name__": f"blendermcp_{name}"}
+        return self.namespaces[name]
+    
+    def register(self, name, source, params=None, defaults=None, namespace=None, description=""):
+        """Compile a snippet and store it under name, replacing any snippet already there"""
+        params = list(params or [])
+        defaults = dict(defaults or {})
+        unknown = set(defaults) - set(params)
+        if unknown:
+            raise ValueError(f"Defaults given for undeclared parameters: {', '.join(sorted(unknown))}")
+        self.snippets[name] = {
+            "code": self.compile(source, f"<snippet {name}>"),
+            "params": params,
+            "defaults": defaults,
+            "namespace": namespace,
+            "description": description,
+        }
+    
+    def bind(self, name, arguments=None):
+        """Return a snippet's code and the globals to run it with, its parameters set as variables"""
+        snippet = self.snippets.get(name)
+        if snippet is None:
+            raise ValueError(f"Unknown snippet: {name}")
+        arguments = dict(arguments or {})
+        unknown = set(arguments) - set(snippet["params"])
+        if unknown:
+            raise ValueError(f"Unknown parameters for snippet {name}: {', '.join(sorted(unknown))}")
+        missing = [param for param in snippet["params"] if param not in arguments and param not in snippet["defaults"]]
+        if missing:
+            raise ValueError(f"Missing parameters for snippet {name}: {', '.join(missing)}")
+        
+        # A copy, so the snippet sees the namespace's helpers without its own
+        # variables leaking back into it
+        namespace = dict(self.namespace(snippet["namespace"]))
+        namespace.update(snippet["defaults"])
+        namespace.update(arguments)
+        return snippet["code"], namespace
+    
+    def describe(self):
+        return {
+            "namespaces": {
+                name: sorted(key for key in namespace if not key.startswith("__"))
+                for name, namespace in self.namespaces.items()
+            },
+            "snippets": {
+                name: {
+                    "params": snippet["params"],
+                    "defaults": snippet["defaults"],
+                    "namespace": snippet["namespace"],
+                    "description": snippet["description"],
+                }
+                for name, snippet in self.snippets.items()
+            },
+            "compiled": {"entries": len(self._compiled), "hits": self.hits, "misses": self.misses},
+        }
+
+
+class CodeJobs:
+    """
+    Runs long Python snippets a slice at a time on Blender's main thread.
+    
+    A job's code runs as the body of a generator function, so every `yield` in
+    it is a point where it can pause. Each timer tick resumes the job until its
+    time budget is spent and then hands the main thread back, so the UI keeps
+    redrawing while thousands of objects are created. Yielding (done, total) or
+    a number reports progress and yielding a string reports a message. Ticks and
+    cancellation run on the main thread; status is read from any thread. Waiting
+    for a job doesn't hold a thread: watch returns a Future the ticks resolve.
+    """
+    FINISHED_STATES = ("done", "failed", "cancelled")
+    MAX_FINISHED = 50
+    
+    def __init__(self):
+        self._changed = threading.Condition()
+        self._jobs = {}
+        self._next_id = 1
+        # Future -> (job id, output offset, on_change) of everyone watching a job
+        self._watchers = {}
+    
+    def start(self, function, time_budget_ms=50):
+        """Schedule function (a generator function or a plain one) as a job, returns its id"""
+        with self._changed:
+            job_id = self._next_id
+            self._next_id += 1
+            self._jobs[job_id] = job = {
+                "job_id": job_id,
+                "state": "running",
+                "progress": None,
+                "total": None,
+                "message": None,
+                "steps": 0,
+                "ticks": 0,
+                "value": None,
+                "error": None,
+                "started": time.time(),
+                "finished": None,
+                "_function": function,
+                "_generator": None,
+                "_budget": max(time_budget_ms, 1) / 1000.0,
+                "_output": io.StringIO(),
+                "_cancel": False,
+            }
+            self._prune()
+        bpy.app.timers.register(lambda: self._tick(job), first_interval=0.0)
+        return job_id
+    
+    def cancel(self, job_id):
+        """Stop a job before its next step, returns False if it is unknown or already finished"""
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None or job["state"] in self.FINISHED_STATES:
+                return False
+            job["_cancel"] = True
+            return True
+    
+    def status(self, job_id, output_offset=0):
+        """A job's state and the output it printed from output_offset on, or None if there is no such job"""
+        with self._changed:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            output = job["_output"].getvalue()
+            status = {key: value for key, value in job.items() if not key.startswith("_")}
+            status["output"] = output[output_offset:]
+            status["output_length"] = len(output)
+            return status
+    
+    def job_ids(self):
+        with self._changed:
+            return list(self._jobs)
+    
+    def watch(self, job_id, timeout, on_change=None, output_offset=0):
+        """
+        Future of the job's status once it finishes or timeout seconds pass.
+        
+        Call on the main thread. on_change(status) is called from the job's
+        ticks as it moves on.
+        """
+        future = Future()
+        with self._changed:
+            status = self.status(job_id, output_offset)
+            if status is None or status["state"] in self.FINISHED_STATES or timeout <= 0:
+                future.set_result(status)
+                return future
+            self._watchers[future] = (job_id, output_offset, on_change)
+        if on_change:
+            on_change(status)
+        
+        def expire():
+            self._resolve(future)
+            return None
+        
+        bpy.app.timers.register(expire, first_interval=timeout)
+        return future
+    
+    def _notify(self, job):
+        """Pass a job's new status to its watchers, resolving them once it has finished"""
+        with self._changed:
+            watchers = [(future, watcher) for future, watcher in self._watchers.items() if watcher[0] == job["job_id"]]
+        for future, (job_id, output_offset, on_change) in watchers:
+            if job["state"] in self.FINISHED_STATES:
+                self._resolve(future)
+            elif on_change:
+                try:
+                    on_change(self.status(job_id, output_offset))
+                except Exception as e:
+                    print(f"Code job watcher failed: {str(e)}")
+    
+    def _resolve(self, future):
+        with self._changed:
+            watcher = self._watchers.pop(future, None)
+        if watcher is not None:
+            job_id, output_offset, _on_change = watcher
+            future.set_result(self.status(job_id, output_offset))
+    
+    def _tick(self, job):
+        """Timer callback running one slice of a job, returns when to run the next one"""
+        if job["_cancel"]:
+            if job["_generator"] is not None:
+                with _capture_stdout(job["_output"]):
+                    with suppress(Exception):
+                        # Lets the job's finally blocks and context managers clean up
+                        job["_generator"].close()
+            self._finish(job, "cancelled")
+            return None
+        
+        deadline = time.perf_counter() + job["_budget"]
+        try:
+            with _capture_stdout(job["_output"]):
+                if job["_generator"] is None:
+                    returned = job["_function"]()
+                    if not inspect.isgenerator(returned):
+                        # Nothing to resume, it already ran to completion
+                        self._finish(job, "done", value=returned)
+                        return None
+                    job["_generator"] = returned
+                while True:
+                    update = next(job["_generator"])
+                    job["steps"] += 1
+                    if update is not None:
+                        self._report(job, update)
+                    if time.perf_counter() >= deadline:
+                        break
+        except StopIteration as e:
+            self._finish(job, "done", value=e.value)
+            return None
+        except Exception as e:
+            traceback.print_exc()
+            self._finish(job, "failed", error=f"{type(e).__name__}: {str(e)}")
+            return None
+        
+        with self._changed:
+            job["ticks"] += 1
+            self._changed.notify_all()
+        self._notify(job)
+        return 0.0  # Yield to the UI, then pick up where we left off
+    
+    def _report(self, job, update):
+        with self._changed:
+            if isinstance(update, str):
+                job["message"] = update
+            elif isinstance(update, (int, float)) and not isinstance(update, bool):
+                job["progress"] = update
+            elif isinstance(update, tuple) and len(update) == 2:
+                job["progress"], job["total"] = update
+    
+    def _finish(self, job, state, value=None, error=None):
+        with self._changed:
+            job.update(
+                state=state,
+                value=CodeSessions.json_value(value),
+                error=error,
+                finished=time.time(),
+                _function=None,
+                _generator=None,
+            )
+            job["ticks"] += 1
+            self._changed.notify_all()
+        self._notify(job)
+    
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["state"] in self.FINISHED_STATES]
+        for job_id in finished[:max(len(finished) - self.MAX_FINISHED, 0)]:
+            del self._jobs[job_id]
+
+
+class RodinJobQueue:
+    """
+    Generates batches of Hyper3D Rodin models in the background.
+    
+    A scheduler thread submits each batch's jobs with at most max_concurrent
+    generating at once, polls the running ones and hands finished models to
+    the download pool to be imported. All jobs are tracked in one place, so a
+    whole batch is checked on with a single status call instead of a polling
+    loop per model. The thread also resolves everyone waiting on a batch, so
+    a wait doesn't hold a thread of its own. It exits when no jobs are left
+    unfinished.
+    """
+    POLL_INTERVAL = 5.0
+    # Jobs still generating after this long are given up on
+    JOB_TIMEOUT = 1800
+    MAX_CONCURRENT = 8
+    FINISHED_STATES = ("done", "imported", "failed")
+    
+    def __init__(self, server):
+        self.server = server
+        self._changed = threading.Condition()
+        self._batches = {}
+        self._batch_ids = itertools.count(1)
+        self._thread = None
+        self._stopping = False
+        # Future -> (batch id, deadline, on_change) of everyone watching a batch
+        self._watchers = {}
+        self._wake_at = 0.0
+    
+    def submit(self, jobs, max_concurrent=3, auto_import=True):
+        """Queue a batch of jobs, each {name, text_prompt, images, bbox_condition}, returns its id"""
+        batch = {
+            "id": next(self._batch_ids),
+            "max_concurrent": min(max(int(max_concurrent), 1), self.MAX_CONCURRENT),
+            "auto_import": auto_import,
+            "jobs": [
+                {
+                    "name": job.get("name") or f"Generated_{i}",
+                    "params": {
+                        "text_prompt": job.get("text_prompt"),
+                        "images": job.get("images"),
+                        "bbox_condition": job.get("bbox_condition"),
+                    },
+                    "state": "queued",
+                }
+                for i, job in enumerate(jobs)
+            ],
+        }
+        with self._changed:
+            self._batches[batch["id"]] = batch
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="BlenderMCPRodin", daemon=True)
+                self._thread.start()
+            self._changed.notify_all()
+        return batch["id"]
+    
+    def status(self, batch_id):
+        """Aggregated status of a batch, or None if there is no such batch"""
+        with self._changed:
+            batch = self._batches.get(batch_id)
+            if batch is None:
+                return None
+            counts = {}
+            for job in batch["jobs"]:
+                counts[job["state"]] = counts.get(job["state"], 0) + 1
+            return {
+                "batch_id": batch_id,
+                "finished": self._finished(batch),
+                "counts": counts,
+                "jobs": [
+                    {key: value for key, value in job.items() if key != "params" and not key.startswith("_")}
+                    for job in batch["jobs"]
+                ],
+            }
+    
+    def batch_ids(self):
+        with self._changed:
+            return list(self._batches)
+    
+    def watch(self, batch_id, timeout, on_change=None):
+        """
+        Future of the batch's status once it finishes or timeout seconds pass.
+        
+        on_change(status) is called from the scheduler thread as jobs move on.
+        """
+        future = Future()
+        with self._changed:
+            status = self.status(batch_id)
+            if status is None or status["finished"] or timeout <= 0 or self._thread is None:
+                future.set_result(status)
+                return future
+            deadline = time.monotonic() + timeout
+            self._watchers[future] = (batch_id, deadline, on_change)
+            if deadline < self._wake_at:
+                self._changed.notify_all()
+        if on_change:
+            on_change(status)
+        return future
+    
+    def stop(self):
+        with self._changed:
+            self._stopping = True
+            self._changed.notify_all()
+    
+    def _finished(self, batch):
+        return all(job["state"] in self.FINISHED_STATES for job in batch["jobs"])
+    
+    def _update(self, job, **changes):
+        with self._changed:
+            job.update(changes)
+            self._changed.notify_all()
+        self._notify()
+    
+    def _notify(self, final=False):
+        """
+        Pass batch statuses to their watchers, resolving those whose batch
+        finished or wait ran out. final resolves them all once the thread is gone.
+        """
+        now = time.monotonic()
+        with self._changed:
+            watchers = list(self._watchers.items())
+        for future, (batch_id, deadline, on_change) in watchers:
+            status = self.status(batch_id)
+            if status["finished"] or now >= deadline or (final and self._thread is None):
+                with self._changed:
+                    if self._watchers.pop(future, None) is None:
+                        continue
+                future.set_result(status)
+            elif on_change:
+                try:
+                    on_change(status)
+                except Exception as e:
+                    print(f"Rodin batch watcher failed: {str(e)}")
+    
+    def _run(self):
+        while True:
+            self._notify()
+            with self._changed:
+                batches = [batch for batch in self._batches.values() if not self._finished(batch)]
+                if self._stopping or not batches:
+                    self._thread = None
+                    break
+            for batch in batches:
+                jobs = batch["jobs"]
+                generating = sum(1 for job in jobs if job["state"] == "generating")
+                for job in jobs:
+                    if job["state"] == "queued" and generating < batch["max_concurrent"]:
+                        self._submit_job(job)
+                        generating += job["state"] == "generating"
+                    elif job["state"] == "generating":
+                        self._poll_job(batch, job)
+            with self._changed:
+                if not self._stopping:
+                    # Wake for the next poll, or earlier when a watcher's wait runs out
+                    deadlines = [deadline for _batch_id, deadline, _on_change in self._watchers.values()]
+                    self._wake_at = min([time.monotonic() + self.POLL_INTERVAL] + deadlines)
+                    self._changed.wait(max(self._wake_at - time.monotonic(), 0))
+        self._notify(final=True)
+    
+    def _submit_job(self, job):
+        try:
+            result = self.server.create_rodin_job(**job["params"])
+        except Exception as e:
+            result = {"error": str(e)}
+        if isinstance(result, dict) and result.get("submit_time"):
+            ids = {"task_uuid": result["uuid"], "subscription_key": result["jobs"]["subscription_key"]}
+        elif isinstance(result, dict) and result.get("request_id"):
+            ids = {"request_id": result["request_id"]}
+        else:
+            error = result.get("error", result) if isinstance(result, dict) else result
+            self._update(job, state="failed", error=f"Could not create job: {error}")
+            return
+        self._update(job, state="generating", _started=time.monotonic(), **ids)
+    
+    def _poll_job(self, batch, job):
+        server = self.server
+        try:
+            if "subscription_key" in job:
+                status = server.poll_rodin_job_status_main_site(job["subscription_key"])
+                state, _done, _total, message = server._rodin_main_site_progress(status)
+            else:
+                status = server.poll_rodin_job_status_fal_ai(job["request_id"])
+                state, _done, _total, message = server._rodin_fal_ai_progress(status)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Polling Rodin job {job['name']} failed: {str(e)}")
+            state, message = "pending", job.get("job_status")
+        except (KeyError, TypeError) as e:
+            self._update(job, state="failed", error=f"Unexpected Rodin status response, missing {str(e)}")
+            return
+        
+        if state == "failed":
+            self._update(job, state="failed", job_status=message, error=message)
+        elif state == "done" and batch["auto_import"]:
+            self._update(job, state="importing", job_status=message)
+            executor = server.download_executor
+            if executor is None:
+                self._update(job, state="failed", error="Server stopped before the model was imported")
+            else:
+                executor.submit(self._import_job, job)
+        elif state == "done":
+            self._update(job, state="done", job_status=message)
+        elif time.monotonic() - job["_started"] > self.JOB_TIMEOUT:
+            self._update(job, state="failed", job_status=message, error=f"Still not finished after {self.JOB_TIMEOUT} seconds")
+        elif message != job.get("job_status"):
+            self._update(job, job_status=message)
+    
+    def _import_job(self, job):
+        try:
+            if "task_uuid" in job:
+                result = self.server.import_generated_asset_main_site(task_uuid=job["task_uuid"], name=job["name"])
+            else:
+                result = self.server.import_generated_asset_fal_ai(request_id=job["request_id"], name=job["name"])
+        except Exception as e:
+            result = {"succeed": False, "error": str(e)}
+        if result.get("succeed"):
+            result.pop("succeed")
+            self._update(job, state="imported", object=result)
+        else:
+            self._update(job, state="failed", error=result.get("error", "Import failed"))
+
+
+class SceneChangeJournal:
+    """
+    Versioned record of which objects, materials and collections changed.
+    
+    A depsgraph_update_post handler feeds it the updated data-blocks. Every
+    change gets the next version number and replaces the data-block's previous
+    entry, so entries stay in version order and changes_since(version) walks
+    back only over what changed since then: O(changes) instead of O(scene).
+    Versions older than the retained entries, or from before a file load,
+    can't be answered; those callers are told to resync.
+    """
+    MAX_ENTRIES = 10000
+    # bpy.data collection -> change type
+    TRACKED = {"objects": "object", "materials": "material", "collections": "collection"}
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.floor = 0  # changes at or below this version are no longer known
+        self._entries = {}  # (type, name) -> entry, oldest first
+        self._names = {}  # type -> names at the last check, to notice additions and removals
+    
+    def snapshot(self):
+        """Remember the current data-block names without recording them as added"""
+        self._names = {kind: set(getattr(bpy.data, attr).keys()) for attr, kind in self.TRACKED.items()}
+    
+    def reset(self):
+        """Forget everything, e.g. after loading another file"""
+        with self._lock:
+            self.version += 1
+            self.floor = self.version
+            self._entries.clear()
+        self.snapshot()
+    
+    def record(self, depsgraph):
+        """Record the data-blocks a depsgraph update touched, returns how many changed"""
+        changes = {}
+        renamed = set()
+        for update in depsgraph.updates:
+            kind = self._kind(update.id)
+            if kind is None:
+                continue
+            name = update.id.name
+            flags = changes.setdefault((kind, name), set())
+            if update.is_updated_transform:
+                flags.add("transform")
+            if update.is_updated_geometry:
+                flags.add("geometry")
+            if update.is_updated_shading:
+                flags.add("shading")
+            if name not in self._names.get(kind, ()):
+                renamed.add(kind)
+        
+        # Depsgraph updates don't report removals, so compare names when the
+        # counts differ or an unknown name shows up
+        for attr, kind in self.TRACKED.items():
+            collection = getattr(bpy.data, attr)
+            known = self._names.get(kind, set())
+            if kind not in renamed and len(collection) == len(known):
+                continue
+            names = set(collection.keys())
+            for name in names - known:
+                changes[(kind, name)] = {"added"}
+            for name in known - names:
+                changes[(kind, name)] = {"removed"}
+            self._names[kind] = names
+        
+        if changes:
+            with self._lock:
+                for key, flags in changes.items():
+                    self._add(key, flags)
+        return len(changes)
+    
+    def _add(self, key, flags):
+        self.version += 1
+        previous = self._entries.pop(key, None)
+        if "added" in flags:
+            added_version = self.version
+        elif previous is not None and not previous["removed"]:
+            added_version = previous["added_version"]
+        else:
+            added_version = None
+        self._entries[key] = {
+            "type": key[0],
+            "name": key[1],
+            "version": self.version,
+            "added_version": added_version,
+            "removed": "removed" in flags,
+            "flags": sorted(flags - {"added", "removed"}),
+        }
+        while len(self._entries) > self.MAX_ENTRIES:
+            oldest = self._entries.pop(next(iter(self._entries)))
+            self.floor = oldest["version"]
+    
+    def changes_since(self, since_version):
+        """Latest change per data-block after since_version, oldest first"""
+        with self._lock:
+            if since_version < self.floor:
+                return {"version": self.version, "reset": True, "changes": []}
+            changes = []
+            for entry in reversed(self._entries.values()):
+                if entry["version"] <= since_version:
+                    break
+                changes.append(self._describe(entry, since_version))
+            changes.reverse()
+            return {"version": self.version, "reset": False, "changes": changes}
+    
+    def raw_since(self, since_version):
+        """Entries after since_version as stored, for pushing to subscribed clients"""
+        with self._lock:
+            entries = []
+            for entry in reversed(self._entries.values()):
+                if entry["version"] <= since_version:
+                    break
+                entries.append(dict(entry))
+            entries.reverse()
+            return self.version, entries
+    
+    @staticmethod
+    def _describe(entry, since_version):
+        if entry["removed"]:
+            change = "removed"
+        elif entry["added_version"] is not None and entry["added_version"] > since_version:
+            change = "added"
+        else:
+            change = "updated"
+        return {
+            "type": entry["type"],
+            "name": entry["name"],
+            "version": entry["version"],
+            "change": change,
+            "flags": entry["flags"],
+        }
+    
+    @staticmethod
+    def _kind(id_data):
+        if isinstance(id_data, bpy.types.Object):
+            return "object"
+        if isinstance(id_data, bpy.types.Material):
+            return "material"
+        if isinstance(id_data, bpy.types.Collection):
+            return "collection"
+        return None
+
+
 class BlenderMCPServer:
+    # Network-bound commands run on the worker pool instead of Blender's main thread.
+    # They hop back to the main thread only for the final bpy.data/bpy.ops step.
+    BACKGROUND_COMMANDS = {
+        "get_polyhaven_categories",
+        "search_polyhaven_assets",
+        "download_polyhaven_asset",
+        "create_rodin_job",
+        "poll_rodin_job_status",
+        "wait_for_rodin_job",
+        "submit_rodin_batch",
+        "get_rodin_batch_status",
+        "import_generated_asset",
+        "get_viewport_screenshot",
+        "get_sketchfab_status",
+        "search_sketchfab_models",
+        "get_sketchfab_model_details",
+        "download_sketchfab_model",
+    }
+    WORKER_THREADS = 4
+    # Separate pool for the individual files of one asset, so a worker waiting on
+    # its files never starves the pool those files need
+    DOWNLOAD_THREADS = 8
+
     def __init__(self, host='localhost', port=9876):
         self.host = host
         self.port = port
         self.running = False
         self.socket = None
         self.server_thread = None
+        # Integration flags, pushed to framed clients whenever they change
+        self.capabilities = {}
+        self.client_senders = {}
+        self.client_senders_lock = threading.Lock()
+        # Scene changes, pushed to the framed clients that subscribed to them
+        self.scene_journal = SceneChangeJournal()
+        self.scene_change_subscribers = {}
+        self._scene_pushed_version = 0
+        self._scene_push_pending = False
+        # Sidebar settings captured on the main thread for use by worker threads
+        self.settings = {}
+        self.executor = None
+        self.download_executor = None
+        self.asset_cache = None
+        self.polyhaven_catalog = None
+        # Downloaded texture sets: {texture_id: {"maps": {map_type: image name}, "material": name}}
+        self.texture_sets = {}
+        # Content hashes of packed images, indexed on first use
+        self.image_hashes = None
+        # Agents tend to repeat the same Sketchfab searches within a session
+        self.sketchfab_search_cache = ResponseCache(ttl=300)
+        self.sketchfab_model_cache = ResponseCache(ttl=3600)
+        self.rodin_queue = RodinJobQueue(self)
+        self.code_sessions = CodeSessions()
+        self.code_jobs = CodeJobs()
+        self.metrics = BridgeMetrics()
+        # Progress callback of the command running on the current worker thread
+        self._progress = threading.local()
+        self.http = {name: ProviderClient(name, url) for name, url in PROVIDER_BASE_URLS.items()}
     
     def start(self):
         if self.running:
@@ -42,8 +1907,23 @@ class BlenderMCPServer:
             return
             
         self.running = True
+        self.capabilities = self._get_capabilities(bpy.context.scene)
+        self.settings = self._get_settings(bpy.context.scene)
+        self.scene_journal.snapshot()
+        self._scene_pushed_version = self.scene_journal.version
+        for handlers, callback in ((bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+                                   (bpy.app.handlers.load_post, _on_load_post)):
+            if callback not in handlers:
+                handlers.append(callback)
+        self.executor = ThreadPoolExecutor(max_workers=self.WORKER_THREADS, thread_name_prefix="BlenderMCP")
+        self.download_executor = ThreadPoolExecutor(max_workers=self.DOWNLOAD_THREADS, thread_name_prefix="BlenderMCPDownload")
         
         try:
+            self.asset_cache = AssetCache(self.settings["asset_cache_dir"], self.settings["asset_cache_max_bytes"])
+            self.polyhaven_catalog = PolyHavenCatalog(
+                self.http["polyhaven"], os.path.join(self.asset_cache.root, "polyhaven_catalog.json")
+            )
+            
             # Create socket
             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -63,6 +1943,11 @@ class BlenderMCPServer:
     def stop(self):
         self.running = False
         
+        for handlers, callback in ((bpy.app.handlers.depsgraph_update_post, _on_depsgraph_update),
+                                   (bpy.app.handlers.load_post, _on_load_post)):
+            if callback in handlers:
+                handlers.remove(callback)
+        
         # Close socket
         if self.socket:
             try:
@@ -71,6 +1956,25 @@ class BlenderMCPServer:
                 pass
             self.socket = None
         
+        # Let in-flight downloads finish in the background; don't block Blender's UI
+        self.rodin_queue.stop()
+        if self.executor:
+            self.executor.shutdown(wait=False)
+            self.executor = None
+        if self.download_executor:
+            self.download_executor.shutdown(wait=False)
+            self.download_executor = None
+        
+        # Drop idle keep-alive connections; sessions reopen them on next use
+        for client in self.http.values():
+            client.close()
+        
+        if self.asset_cache:
+            try:
+                self.asset_cache.flush()
+            except OSError as e:
+                print(f"Could not save the asset cache index: {str(e)}")
+        
         # Wait for thread to finish
         if self.server_thread:
             try:
@@ -93,6 +1997,8 @@ class BlenderMCPServer:
                 try:
                     client, address = self.socket.accept()
                     print(f"Connected to client: {address}")
+                    client.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+                    client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
                     
                     # Handle client in a separate thread
                     client_thread = threading.Thread(
@@ -115,60 +2021,310 @@ class BlenderMCPServer:
         
         print("Server thread stopped")
     
+    @staticmethod
+    def _get_capabilities(scene):
+        """Snapshot the integration toggles from the sidebar"""
+        return {
+            "polyhaven": bool(scene.blendermcp_use_polyhaven),
+            "hyper3d": bool(scene.blendermcp_use_hyper3d and scene.blendermcp_hyper3d_api_key),
+            "hyper3d_mode": scene.blendermcp_hyper3d_mode,
+            "sketchfab": bool(scene.blendermcp_use_sketchfab and scene.blendermcp_sketchfab_api_key),
+        }
+    
+    @staticmethod
+    def _get_settings(scene):
+        """Snapshot the sidebar settings that worker threads need"""
+        return {
+            "hyper3d_mode": scene.blendermcp_hyper3d_mode,
+            "hyper3d_api_key": scene.blendermcp_hyper3d_api_key,
+            "use_sketchfab": scene.blendermcp_use_sketchfab,
+            "sketchfab_api_key": scene.blendermcp_sketchfab_api_key,
+            "asset_cache_dir": bpy.path.abspath(scene.blendermcp_asset_cache_dir) if scene.blendermcp_asset_cache_dir else "",
+            "asset_cache_max_bytes": scene.blendermcp_asset_cache_size_mb * 1024 * 1024,
+        }
+    
+    def _refresh_settings(self):
+        """Re-snapshot the sidebar settings, reconfiguring the asset cache only if its settings changed"""
+        previous = self.settings
+        self.settings = self._get_settings(bpy.context.scene)
+        if (self.settings["asset_cache_dir"], self.settings["asset_cache_max_bytes"]) != \
+                (previous.get("asset_cache_dir"), previous.get("asset_cache_max_bytes")):
+            self.asset_cache.configure(self.settings["asset_cache_dir"], self.settings["asset_cache_max_bytes"])
+    
+    # Longest a worker waits for the main thread to start running its call
+    MAIN_THREAD_TIMEOUT = 120.0
+    
+    def run_in_main_thread(self, func, *args, **kwargs):
+        """
+        Run func on Blender's main thread and wait for its result.
+        
+        Worker threads use this for the bpy.data/bpy.ops part of a command,
+        since Blender data must not be touched from any other thread. Raises
+        if the server stops or the main thread doesn't pick the call up within
+        MAIN_THREAD_TIMEOUT, e.g. because a modal operator or file load holds
+        up timers, so a stuck call can't hold a worker forever.
+        """
+        if threading.current_thread() is threading.main_thread():
+            return func(*args, **kwargs)
+        
+        future = Future()
+        
+        def main_thread_callback():
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(func(*args, **kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+            return None
+        
+        bpy.app.timers.register(main_thread_callback, first_interval=0.0)
+        deadline = time.monotonic() + self.MAIN_THREAD_TIMEOUT
+        while True:
+            try:
+                return future.result(timeout=0.5)
+            except FutureTimeoutError:
+                pass
+            # Once running it can no longer be cancelled, so wait for it to finish
+            if not self.running and future.cancel():
+                raise RuntimeError("BlenderMCP server stopped before Blender's main thread ran the call")
+            if time.monotonic() >= deadline and future.cancel():
+                raise TimeoutError(
+                    f"Blender's main thread did not run {getattr(func, '__name__', 'the call')} "
+                    f"within {self.MAIN_THREAD_TIMEOUT:.0f} seconds"
+                )
+    
+    def update_capabilities(self, scene):
+        """Refresh the capability snapshot and push it to every framed client"""
+        capabilities = self._get_capabilities(scene)
+        if capabilities == self.capabilities:
+            return
+        self.capabilities = capabilities
+        with self.client_senders_lock:
+            senders = list(self.client_senders.values())
+        for send_response in senders:
+            try:
+                send_response({"event": "capabilities", "capabilities": capabilities})
+            except Exception as e:
+                print(f"Failed to push capabilities: {str(e)}")
+    
+    # Depsgraph updates arrive many times a second while dragging, pushes are batched
+    SCENE_PUSH_INTERVAL = 0.1
+    
+    def record_scene_changes(self, depsgraph):
+        """Journal a depsgraph update and schedule a push to subscribed clients"""
+        if self.scene_journal.record(depsgraph) and self.scene_change_subscribers and not self._scene_push_pending:
+            self._scene_push_pending = True
+            bpy.app.timers.register(self._push_scene_changes, first_interval=self.SCENE_PUSH_INTERVAL)
+    
+    def reset_scene_changes(self):
+        """Start the journal over after a file load and tell subscribers to resync"""
+        self.scene_journal.reset()
+        self._scene_pushed_version = self.scene_journal.version
+        self._send_scene_event({"event": "scene_changes", "version": self._scene_pushed_version, "reset": True, "entries": []})
+    
+    def _push_scene_changes(self):
+        self._scene_push_pending = False
+        version, entries = self.scene_journal.raw_since(self._scene_pushed_version)
+        self._scene_pushed_version = version
+        if entries:
+            # Subscribers are read after the entries, so one that joins meanwhile
+            # gets a starting version no older than these
+            self._send_scene_event({"event": "scene_changes", "version": version, "reset": False, "entries": entries})
+        return None
+    
+    def _send_scene_event(self, event):
+        with self.client_senders_lock:
+            senders = list(self.scene_change_subscribers.values())
+        for send_response in senders:
+            try:
+                send_response(dict(event))
+            except Exception as e:
+                print(f"Failed to push scene changes: {str(e)}")
+    
     def _handle_client(self, client):
         """Handle connected client"""
         print("Client handler started")
         client.settimeout(None)  # No timeout
         buffer = b''
+        framed = False
+        send_lock = threading.Lock()
+        
+        def send_response(response, request_id=None, command_type=None, received_at=None):
+            # Framed clients pipeline commands and match responses by id
+            if request_id is not None:
+                response["id"] = request_id
+            # Handlers return bulk arrays under result["attachments"]; they travel
+            # as raw binary after the JSON rather than as JSON number lists
+            attachments = None
+            if isinstance(response.get("result"), dict):
+                attachments = response["result"].pop("attachments", None)
+            started = time.perf_counter()
+            if framed:
+                data = _encode_frame(response, attachments)
+            else:
+                if attachments:
+                    response["attachments"] = _encode_inline_attachments(attachments)
+                data = json.dumps(response).encode('utf-8')
+            metric = command_type or f"event:{response.get('event')}"
+            self.metrics.record(metric, "serialize", time.perf_counter() - started)
+            self.metrics.record(metric, "bytes_out", len(data))
+            with send_lock:
+                client.sendall(data)
+            if received_at is not None:
+                self.metrics.record(metric, "total", time.perf_counter() - received_at)
+        
+        def send_when_done(future, request_id, command_type=None, received_at=None):
+            try:
+                response = future.result()
+            except Exception as e:
+                response = {"status": "error", "message": str(e)}
+            if isinstance(response, Future):
+                # The handler is waiting without holding a worker, reply once it resolves
+                response.add_done_callback(
+                    lambda future: send_when_done(future, request_id, command_type, received_at)
+                )
+                return
+            try:
+                send_response(response, request_id, command_type, received_at)
+            except:
+                print("Failed to send response - client disconnected")
         
         try:
             while self.running:
                 # Receive data
                 try:
-                    data = client.recv(8192)
-                    if not data:
-                        print("Client disconnected")
-                        break
-                    
-                    buffer += data
-                    try:
-                        # Try to parse command
-                        command = json.loads(buffer.decode('utf-8'))
-                        buffer = b''
+                    receive_stats = {}
+                    if framed:
+                        # The header carries the payload size, so each message
+                        # is read in one pass without re-parsing partial JSON
+                        command = _recv_frame(client, receive_stats)
+                        if command is None:
+                            print("Client disconnected")
+                            break
+                        if client not in self.client_senders:
+                            # A framed message proves the client finished reading the
+                            # raw JSON negotiation reply, so pushed events are safe now
+                            with self.client_senders_lock:
+                                self.client_senders[client] = send_response
+                    else:
+                        data = client.recv(8192)
+                        if not data:
+                            print("Client disconnected")
+                            break
                         
-                        # Execute command in Blender's main thread
-                        def execute_wrapper():
+                        if not buffer:
+                            receive_started = time.perf_counter()
+                        buffer += data
+                        try:
+                            # Try to parse command
+                            command = json.loads(buffer.decode('utf-8'))
+                            receive_stats.update(bytes=len(buffer), seconds=time.perf_counter() - receive_started)
+                            buffer = b''
+                        except json.JSONDecodeError:
+                            # Incomplete data, wait for more
+                            continue
+                        if command.get("attachments"):
+                            command["attachments"] = _decode_inline_attachments(command["attachments"])
+                    
+                    received_at = time.perf_counter()
+                    command_type = command.get("type") or "unknown"
+                    self.metrics.record(command_type, "receive", receive_stats["seconds"])
+                    self.metrics.record(command_type, "bytes_in", receive_stats["bytes"])
+                    
+                    if command.get("attachments"):
+                        # Binary buffers sent with a command reach the handler as a parameter
+                        command.setdefault("params", {})["attachments"] = command.pop("attachments")
+                    
+                    if command.get("type") == "negotiate_protocol":
+                        # Answered from this thread, no need to touch Blender data
+                        versions = command.get("params", {}).get("versions", [])
+                        if PROTOCOL_VERSION in versions:
+                            send_response({"status": "success", "result": {
+                                "protocol_version": PROTOCOL_VERSION,
+                                "capabilities": self.capabilities,
+                            }}, None, command_type, received_at)
+                            framed = True
+                        else:
+                            send_response({"status": "error", "message": f"Unsupported protocol versions: {versions}"},
+                                          None, command_type, received_at)
+                        continue
+                    
+                    if command.get("type") == "subscribe_scene_changes" and framed:
+                        # Tied to this connection, so answered here rather than by a handler
+                        with self.client_senders_lock:
+                            if command.get("params", {}).get("enabled", True):
+                                self.scene_change_subscribers[client] = send_response
+                            else:
+                                self.scene_change_subscribers.pop(client, None)
+                        send_response({"status": "success", "result": {"version": self.scene_journal.version}},
+                                      command.get("id"), command_type, received_at)
+                        continue
+                    
+                    if command.get("type") == "ping":
+                        # Heartbeats skip the main thread so a busy Blender still answers
+                        send_response({"status": "success", "result": {"pong": True}}, command.get("id"),
+                                      command_type, received_at)
+                        continue
+                    
+                    if command.get("type") == "get_bridge_metrics":
+                        # Also answered here, so the numbers can be read while Blender is busy
+                        reset = command.get("params", {}).get("reset", False)
+                        send_response({"status": "success", "result": self.metrics.snapshot(reset=reset)},
+                                      command.get("id"), command_type, received_at)
+                        continue
+                    
+                    if framed and command.get("id") is not None:
+                        def progress_callback(progress, total=None, message=None, request_id=command["id"]):
+                            send_response({
+                                "event": "progress",
+                                "request_id": request_id,
+                                "progress": progress,
+                                "total": total,
+                                "message": message,
+                            })
+                        command["progress_callback"] = progress_callback
+                    
+                    # Execute command in Blender's main thread. Several commands can be
+                    # queued at once; each response goes out tagged with its request id.
+                    def execute_wrapper(command=command, command_type=command_type, received_at=received_at):
+                        request_id = command.get("id")
+                        self.metrics.record(command_type, "queue", time.perf_counter() - received_at)
+                        try:
+                            response = self.execute_command(command)
+                            if isinstance(response, Future):
+                                # Handed off to the worker pool, reply once it finishes
+                                response.add_done_callback(
+                                    lambda future: send_when_done(future, request_id, command_type, received_at)
+                                )
+                                return None
                             try:
-                                response = self.execute_command(command)
-                                response_json = json.dumps(response)
-                                try:
-                                    client.sendall(response_json.encode('utf-8'))
-                                except:
-                                    print("Failed to send response - client disconnected")
-                            except Exception as e:
-                                print(f"Error executing command: {str(e)}")
-                                traceback.print_exc()
-                                try:
-                                    error_response = {
-                                        "status": "error",
-                                        "message": str(e)
-                                    }
-                                    client.sendall(json.dumps(error_response).encode('utf-8'))
-                                except:
-                                    pass
-                            return None
-                        
-                        # Schedule execution in main thread
-                        bpy.app.timers.register(execute_wrapper, first_interval=0.0)
-                    except json.JSONDecodeError:
-                        # Incomplete data, wait for more
-                        pass
+                                send_response(response, request_id, command_type, received_at)
+                            except:
+                                print("Failed to send response - client disconnected")
+                        except Exception as e:
+                            print(f"Error executing command: {str(e)}")
+                            traceback.print_exc()
+                            try:
+                                error_response = {
+                                    "status": "error",
+                                    "message": str(e)
+                                }
+                                send_response(error_response, request_id, command_type, received_at)
+                            except:
+                                pass
+                        return None
+                    
+                    # Schedule execution in main thread
+                    bpy.app.timers.register(execute_wrapper, first_interval=0.0)
                 except Exception as e:
                     print(f"Error receiving data: {str(e)}")
                     break
         except Exception as e:
             print(f"Error in client handler: {str(e)}")
         finally:
+            with self.client_senders_lock:
+                self.client_senders.pop(client, None)
+                self.scene_change_subscribers.pop(client, None)
             try:
                 client.close()
             except:
@@ -194,15 +2350,32 @@ class BlenderMCPServer:
         if cmd_type == "get_polyhaven_status":
             return {"status": "success", "result": self.get_polyhaven_status()}
         
+        # Batches run their sub-commands on this same main-thread tick
+        if cmd_type == "batch":
+            return self.execute_batch(**params)
+        
         # Base handlers that are always available
         handlers = {
             "get_scene_info": self.get_scene_info,
+            "query_scene": self.query_scene,
+            "get_bounding_boxes": self.get_bounding_boxes,
+            "get_scene_changes": self.get_scene_changes,
             "get_object_info": self.get_object_info,
+            "get_mesh_data": self.get_mesh_data,
+            "create_mesh_from_buffers": self.create_mesh_from_buffers,
             "get_viewport_screenshot": self.get_viewport_screenshot,
             "execute_code": self.execute_code,
+            "register_snippet": self.register_snippet,
+            "run_snippet": self.run_snippet,
+            "get_code_sessions": self.get_code_sessions,
+            "start_code_job": self.start_code_job,
+            "get_code_job": self.get_code_job,
+            "cancel_code_job": self.cancel_code_job,
             "get_polyhaven_status": self.get_polyhaven_status,
             "get_hyper3d_status": self.get_hyper3d_status,
             "get_sketchfab_status": self.get_sketchfab_status,
+            "get_asset_cache_status": self.get_asset_cache_status,
+            "dedupe_images": self.dedupe_images,
         }
         
         # Add Polyhaven handlers only if enabled
@@ -220,6 +2393,9 @@ class BlenderMCPServer:
             polyhaven_handlers = {
                 "create_rodin_job": self.create_rodin_job,
                 "poll_rodin_job_status": self.poll_rodin_job_status,
+                "wait_for_rodin_job": self.wait_for_rodin_job,
+                "submit_rodin_batch": self.submit_rodin_batch,
+                "get_rodin_batch_status": self.get_rodin_batch_status,
                 "import_generated_asset": self.import_generated_asset,
             }
             handlers.update(polyhaven_handlers)
@@ -228,26 +2404,165 @@ class BlenderMCPServer:
         if bpy.context.scene.blendermcp_use_sketchfab:
             sketchfab_handlers = {
                 "search_sketchfab_models": self.search_sketchfab_models,
+                "get_sketchfab_model_details": self.get_sketchfab_model_details,
                 "download_sketchfab_model": self.download_sketchfab_model,
             }
             handlers.update(sketchfab_handlers)
 
-        handler = handlers.get(cmd_type)
-        if handler:
+        handler = handlers.get(cmd_type)
+        if handler and cmd_type in self.BACKGROUND_COMMANDS:
+            self._refresh_settings()
+            return self.executor.submit(self._run_handler, cmd_type, handler, params, command.get("progress_callback"))
+        elif handler:
+            return self._run_handler(cmd_type, handler, params, command.get("progress_callback"))
+        else:
+            return {"status": "error", "message": f"Unknown command type: {cmd_type}"}
+
+    def _run_handler(self, cmd_type, handler, params, progress_callback=None):
+        """
+        Call a command handler and wrap its result in a response.
+        
+        Handlers that wait for something slow, like a Rodin job, return a Future
+        of their result instead of blocking; the response is then a Future too.
+        """
+        self._progress.callback = progress_callback
+        started = time.perf_counter()
+        pending = None
+        try:
+            print(f"Executing handler for {cmd_type}")
+            result = handler(**params)
+            if isinstance(result, Future):
+                pending = self._pending_response(cmd_type, result, started)
+                return pending
+            print(f"Handler execution complete")
+            return {"status": "success", "result": result}
+        except Exception as e:
+            print(f"Error in handler: {str(e)}")
+            traceback.print_exc()
+            return {"status": "error", "message": str(e)}
+        finally:
+            if pending is None:
+                self.metrics.record(cmd_type, "handler", time.perf_counter() - started)
+            self._progress.callback = None
+    
+    @staticmethod
+    def _map_future(future, function):
+        """Future of function(result) once future resolves"""
+        mapped = Future()
+        
+        def resolve(done):
             try:
-                print(f"Executing handler for {cmd_type}")
-                result = handler(**params)
-                print(f"Handler execution complete")
-                return {"status": "success", "result": result}
+                mapped.set_result(function(done.result()))
             except Exception as e:
-                print(f"Error in handler: {str(e)}")
-                traceback.print_exc()
-                return {"status": "error", "message": str(e)}
-        else:
-            return {"status": "error", "message": f"Unknown command type: {cmd_type}"}
+                mapped.set_exception(e)
+        
+        future.add_done_callback(resolve)
+        return mapped
+    
+    def _pending_response(self, cmd_type, result, started):
+        """Future of the response for a handler that returned a Future of its result"""
+        response = Future()
+        
+        def resolve(future):
+            self.metrics.record(cmd_type, "handler", time.perf_counter() - started)
+            try:
+                response.set_result({"status": "success", "result": future.result()})
+            except Exception as e:
+                print(f"Error in handler for {cmd_type}: {str(e)}")
+                response.set_result({"status": "error", "message": str(e)})
+        
+        result.add_done_callback(resolve)
+        return response
+    
+    def report_progress(self, progress, total=None, message=None):
+        """Tell the client that sent the running background command how far along it is"""
+        callback = getattr(self._progress, "callback", None)
+        if callback is None:
+            return
+        try:
+            callback(progress, total, message)
+        except Exception as e:
+            print(f"Failed to report progress: {str(e)}")
 
     
     
+    def execute_batch(self, commands, stop_on_error=False, time_budget_ms=50):
+        """
+        Execute an ordered list of sub-commands in as few main-thread ticks as possible.
+        
+        Sub-commands run back to back in the current timer callback until the time
+        budget is spent, then the rest continue on the next tick so the UI stays
+        responsive. Returns a response directly when everything fits in one tick,
+        otherwise a Future that resolves to the response.
+        
+        Parameters:
+        - commands: List of {"type": ..., "params": {...}} sub-commands
+        - stop_on_error: Stop at the first failing sub-command instead of continuing
+        - time_budget_ms: Milliseconds of main-thread time to use per tick
+        """
+        if not isinstance(commands, list):
+            return {"status": "error", "message": "Batch commands must be a list"}
+        
+        results = []
+        budget = max(time_budget_ms, 1) / 1000.0
+        
+        def run_slice():
+            """Run sub-commands until the budget is spent, returns True when the batch is done"""
+            deadline = time.perf_counter() + budget
+            while len(results) < len(commands):
+                sub_command = commands[len(results)]
+                sub_type = sub_command.get("type") if isinstance(sub_command, dict) else None
+                if sub_type == "batch" or sub_type in self.BACKGROUND_COMMANDS:
+                    response = {"status": "error", "message": f"Command cannot run inside a batch: {sub_type}"}
+                else:
+                    response = self.execute_command(sub_command or {})
+                    if isinstance(response, Future):
+                        # A command still waiting would hold up the rest of the batch
+                        if response.done():
+                            response = response.result()
+                        else:
+                            response = {"status": "error", "message": f"Command cannot wait inside a batch: {sub_type}"}
+                    result = response.get("result")
+                    if isinstance(result, dict) and "attachments" in result:
+                        # Nested results can't carry binary sections, fall back to base64
+                        result["attachments"] = _encode_inline_attachments(result["attachments"])
+                results.append(response)
+                
+                failed = response.get("status") == "error" or (
+                    isinstance(response.get("result"), dict) and "error" in response["result"]
+                )
+                if failed and stop_on_error:
+                    return True
+                if time.perf_counter() >= deadline:
+                    break
+            return len(results) >= len(commands)
+        
+        def batch_response():
+            return {"status": "success", "result": {
+                "results": results,
+                "completed": len(results),
+                "total": len(commands),
+                "stopped_early": len(results) < len(commands),
+            }}
+        
+        if run_slice():
+            return batch_response()
+        
+        print(f"Batch over budget after {len(results)}/{len(commands)} commands, continuing next tick")
+        future = Future()
+        
+        def continue_batch():
+            try:
+                if not run_slice():
+                    return 0.0  # Yield to the UI, then pick up where we left off
+                future.set_result(batch_response())
+            except Exception as e:
+                future.set_exception(e)
+            return None
+        
+        bpy.app.timers.register(continue_batch, first_interval=0.0)
+        return future
+    
     def get_scene_info(self):
         """Get information about the current Blender scene"""
         try:
@@ -282,28 +2597,230 @@ class BlenderMCPServer:
             traceback.print_exc()
             return {"error": str(e)}
     
+    SCENE_QUERY_FIELDS = ("name", "type", "transform", "parent", "collection",
+                          "materials", "bbox", "visibility")
+    # Object types whose bound_box is a placeholder rather than real geometry
+    UNBOUNDED_TYPES = {'EMPTY', 'LIGHT', 'CAMERA', 'SPEAKER', 'LIGHT_PROBE'}
+    MAX_QUERY_PAGE_SIZE = 10000
+    
+    def query_scene(self, cursor=None, page_size=500, fields=None, types=None,
+                    collection=None, name_glob=None):
+        """
+        Page through the scene's objects in name order.
+        
+        Pass the returned next_cursor back to get the following page; it is None once
+        every matching object has been returned. World transforms and bounding boxes
+        are read for all objects at once with foreach_get instead of per object.
+        
+        Parameters:
+        - cursor: next_cursor from the previous page, or None to start
+        - page_size: Objects per page (capped at MAX_QUERY_PAGE_SIZE)
+        - fields: Subset of SCENE_QUERY_FIELDS to return (default: name, type, transform)
+        - types: Only return objects of these types, e.g. ["MESH", "LIGHT"]
+        - collection: Only return objects in this collection or its children
+        - name_glob: Only return objects whose name matches this pattern, e.g. "Tree*"
+        """
+        fields = set(fields or ("name", "type", "transform"))
+        unknown = fields - set(self.SCENE_QUERY_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        page_size = max(1, min(int(page_size), self.MAX_QUERY_PAGE_SIZE))
+        
+        scene_objects = bpy.context.scene.objects
+        objects = list(scene_objects)
+        names = [obj.name for obj in objects]
+        
+        if collection:
+            coll = bpy.data.collections.get(collection)
+            if coll is None:
+                raise ValueError(f"Collection not found: {collection}")
+            in_collection = {obj.name for obj in coll.all_objects}
+        types = set(types) if types else None
+        
+        matching = [
+            i for i, obj in enumerate(objects)
+            if (types is None or obj.type in types)
+            and (not collection or names[i] in in_collection)
+            and (not name_glob or fnmatch.fnmatchcase(names[i], name_glob))
+        ]
+        matching.sort(key=names.__getitem__)
+        
+        # The cursor is the last name returned, so pages stay consistent when
+        # objects are added or removed between calls
+        start = bisect_right([names[i] for i in matching], cursor) if cursor else 0
+        page = matching[start:start + page_size]
+        
+        if fields & {"transform", "bbox"}:
+            matrices = self._bulk_matrix_world(scene_objects)[page].astype(np.float64)
+        if "bbox" in fields:
+            aabbs = self._world_aabbs(self._bulk_bound_box(scene_objects)[page], matrices)
+        if "transform" in fields:
+            locations = np.round(matrices[:, :3, 3], 6).tolist()
+            scales = np.round(np.linalg.norm(matrices[:, :3, :3], axis=1), 6).tolist()
+            matrix_lists = np.round(matrices, 6).tolist()
+        
+        results = []
+        for row, i in enumerate(page):
+            obj = objects[i]
+            info = {"name": names[i]}
+            if "type" in fields:
+                info["type"] = obj.type
+            if "transform" in fields:
+                info["location"] = locations[row]
+                info["scale"] = scales[row]
+                info["matrix_world"] = matrix_lists[row]
+            if "parent" in fields:
+                info["parent"] = obj.parent.name if obj.parent else None
+            if "collection" in fields:
+                info["collections"] = [c.name for c in obj.users_collection]
+            if "materials" in fields:
+                info["materials"] = [slot.material.name for slot in obj.material_slots if slot.material]
+            if "bbox" in fields:
+                info["world_bounding_box"] = (
+                    None if obj.type in self.UNBOUNDED_TYPES
+                    else np.round(aabbs[row], 6).tolist()
+                )
+            if "visibility" in fields:
+                info["visible"] = obj.visible_get()
+                info["hide_viewport"] = obj.hide_viewport
+                info["hide_render"] = obj.hide_render
+            results.append(info)
+        
+        end = start + len(page)
+        return {
+            "objects": results,
+            "total": len(matching),
+            "start": start,
+            "next_cursor": names[page[-1]] if page and end < len(matching) else None,
+        }
+    
+    @staticmethod
+    def _bulk_matrix_world(objects):
+        """World matrices of an object collection as an (n, 4, 4) row-major array"""
+        matrices = np.empty(len(objects) * 16, dtype=np.float32)
+        objects.foreach_get("matrix_world", matrices)
+        # foreach_get flattens each matrix column by column
+        return matrices.reshape(-1, 4, 4).transpose(0, 2, 1)
+    
     @staticmethod
-    def _get_aabb(obj):
+    def _bulk_bound_box(objects):
+        """Local bounding box corners of an object collection as an (n, 8, 3) array"""
+        corners = np.empty(len(objects) * 24, dtype=np.float32)
+        objects.foreach_get("bound_box", corners)
+        return corners.reshape(-1, 8, 3)
+    
+    @staticmethod
+    def _world_aabbs(corners, matrices):
+        """Transform (n, 8, 3) local corners by (n, 4, 4) matrices into (n, 2, 3) world min/max"""
+        world = np.einsum('nij,nkj->nki', matrices[:, :3, :3], corners) + matrices[:, None, :3, 3]
+        return np.stack((world.min(axis=1), world.max(axis=1)), axis=1)
+    
+    @staticmethod
+    def _world_obbs(corners, matrices):
+        """Oriented boxes (center, unit axes, half extents) from local corners and world matrices"""
+        local_min = corners.min(axis=1)
+        local_max = corners.max(axis=1)
+        local_center = (local_min + local_max) / 2
+        basis = matrices[:, :3, :3]
+        centers = np.einsum('nij,nj->ni', basis, local_center) + matrices[:, :3, 3]
+        lengths = np.linalg.norm(basis, axis=1)
+        # Axes are the normalized matrix columns, returned one per row
+        axes = (basis / np.where(lengths == 0, 1, lengths)[:, None, :]).transpose(0, 2, 1)
+        half_extents = (local_max - local_min) / 2 * lengths
+        return centers, axes, half_extents
+    
+    def get_bounding_boxes(self, names=None, include_obb=False, include_union=True):
+        """
+        World-space bounding boxes for many objects in one batched pass.
+        
+        Matrices and local bound_box corners are read with foreach_get for the whole
+        collection and transformed together with numpy.
+        
+        Parameters:
+        - names: Objects to measure (default: every object in the scene with geometry)
+        - include_obb: Also return oriented boxes (center, axes, half extents)
+        - include_union: Also return the AABB enclosing all measured objects
+        """
+        if names is None:
+            source = bpy.context.scene.objects
+            indices = [i for i, obj in enumerate(source) if obj.type not in self.UNBOUNDED_TYPES]
+            missing = []
+        else:
+            source = bpy.data.objects
+            found = [(name, source.find(name)) for name in names]
+            indices = [i for _name, i in found if i >= 0]
+            missing = [name for name, i in found if i < 0]
+        
+        objects = [source[i] for i in indices]
+        matrices = self._bulk_matrix_world(source)[indices].astype(np.float64)
+        corners = self._bulk_bound_box(source)[indices].astype(np.float64)
+        aabbs = self._world_aabbs(corners, matrices)
+        if include_obb:
+            centers, axes, half_extents = self._world_obbs(corners, matrices)
+        
+        boxes = {}
+        bounded = np.zeros(len(objects), dtype=bool)
+        for row, obj in enumerate(objects):
+            if obj.type in self.UNBOUNDED_TYPES:
+                boxes[obj.name] = {"type": obj.type, "aabb": None}
+                continue
+            bounded[row] = True
+            box = {"type": obj.type, "aabb": np.round(aabbs[row], 6).tolist()}
+            if include_obb:
+                box["obb"] = {
+                    "center": np.round(centers[row], 6).tolist(),
+                    "axes": np.round(axes[row], 6).tolist(),
+                    "half_extents": np.round(half_extents[row], 6).tolist(),
+                }
+            boxes[obj.name] = box
+        
+        result = {"objects": boxes, "count": len(boxes)}
+        if missing:
+            result["missing"] = missing
+        if include_union:
+            result["union"] = (
+                np.round([aabbs[bounded, 0].min(axis=0), aabbs[bounded, 1].max(axis=0)], 6).tolist()
+                if bounded.any() else None
+            )
+        return result
+    
+    @classmethod
+    def _get_aabb(cls, obj):
         """ Returns the world-space axis-aligned bounding box (AABB) of an object. """
         if obj.type != 'MESH':
             raise TypeError("Object must be a mesh")
 
-        # Get the bounding box corners in local space
-        local_bbox_corners = [mathutils.Vector(corner) for corner in obj.bound_box]
-
-        # Convert to world coordinates
-        world_bbox_corners = [obj.matrix_world @ corner for corner in local_bbox_corners]
-
-        # Compute axis-aligned min/max coordinates
-        min_corner = mathutils.Vector(map(min, zip(*world_bbox_corners)))
-        max_corner = mathutils.Vector(map(max, zip(*world_bbox_corners)))
-
-        return [
-            [*min_corner], [*max_corner]
-        ]
+        matrix = np.array(obj.matrix_world, dtype=np.float64)[None]
+        corners = np.array(obj.bound_box, dtype=np.float64)[None]
+        return cls._world_aabbs(corners, matrix)[0].tolist()
 
 
     
+    def get_scene_changes(self, since_version=0, include_data=False):
+        """
+        Objects, materials and collections added, removed or updated after since_version.
+        
+        Each data-block appears once, with its latest change. "reset" means since_version
+        is older than the journal remembers (or from before a file load) and the caller
+        should fetch the whole scene again. include_data adds the current transform of
+        each changed object.
+        """
+        result = self.scene_journal.changes_since(int(since_version))
+        if include_data:
+            for change in result["changes"]:
+                obj = bpy.data.objects.get(change["name"]) if change["type"] == "object" else None
+                if obj is None or change["change"] == "removed":
+                    continue
+                change["data"] = {
+                    "type": obj.type,
+                    "location": list(obj.location),
+                    "rotation": list(obj.rotation_euler),
+                    "scale": list(obj.scale),
+                    "visible": obj.visible_get(),
+                    "parent": obj.parent.name if obj.parent else None,
+                }
+        return result
+
     def get_object_info(self, name):
         """Get detailed information about a specific object"""
         obj = bpy.data.objects.get(name)
@@ -341,21 +2858,374 @@ class BlenderMCPServer:
         
         return obj_info
     
-    def get_viewport_screenshot(self, max_size=800, filepath=None, format="png"):
+    MESH_ATTRIBUTES = ("vertices", "normals", "edges", "polygons", "uvs")
+    
+    def get_mesh_data(self, name, attributes=None, vertex_start=0, vertex_count=None,
+                      polygon_start=0, polygon_count=None, evaluated=False):
+        """
+        Read mesh geometry in bulk with foreach_get into flat typed arrays.
+        
+        The arrays are returned as binary attachments instead of JSON number lists.
+        Vertex attributes are sliced to the requested vertex range and polygon/UV
+        data to the requested polygon range, so huge meshes can be paged through.
+        
+        Parameters:
+        - name: The mesh object to read
+        - attributes: Any of vertices, normals, edges, polygons, uvs (default: vertices, polygons)
+        - vertex_start, vertex_count: Vertex range for vertices and normals
+        - polygon_start, polygon_count: Polygon range for polygons and uvs
+        - evaluated: Read the mesh with modifiers applied
+        """
+        obj = bpy.data.objects.get(name)
+        if not obj:
+            raise ValueError(f"Object not found: {name}")
+        if obj.type != 'MESH':
+            raise TypeError(f"Object {name} is not a mesh")
+        
+        attributes = attributes or ["vertices", "polygons"]
+        unknown = set(attributes) - set(self.MESH_ATTRIBUTES)
+        if unknown:
+            raise ValueError(f"Unknown mesh attributes: {', '.join(sorted(unknown))}")
+        
+        if evaluated:
+            eval_obj = obj.evaluated_get(bpy.context.evaluated_depsgraph_get())
+            mesh = eval_obj.to_mesh()
+        else:
+            mesh = obj.data
+        
+        try:
+            n_verts = len(mesh.vertices)
+            n_polys = len(mesh.polygons)
+            n_loops = len(mesh.loops)
+            v0 = min(max(vertex_start, 0), n_verts)
+            v1 = n_verts if vertex_count is None else min(v0 + max(vertex_count, 0), n_verts)
+            p0 = min(max(polygon_start, 0), n_polys)
+            p1 = n_polys if polygon_count is None else min(p0 + max(polygon_count, 0), n_polys)
+            l0 = l1 = 0
+            attachments = {}
+            
+            if "vertices" in attributes:
+                co = np.empty(n_verts * 3, dtype=np.float32)
+                mesh.vertices.foreach_get("co", co)
+                attachments["vertices"] = co.reshape(-1, 3)[v0:v1]
+            
+            if "normals" in attributes:
+                normals = np.empty(n_verts * 3, dtype=np.float32)
+                if hasattr(mesh, "vertex_normals"):
+                    mesh.vertex_normals.foreach_get("vector", normals)  # Blender 3.5+
+                else:
+                    mesh.vertices.foreach_get("normal", normals)
+                attachments["normals"] = normals.reshape(-1, 3)[v0:v1]
+            
+            if "edges" in attributes:
+                edges = np.empty(len(mesh.edges) * 2, dtype=np.int32)
+                mesh.edges.foreach_get("vertices", edges)
+                attachments["edges"] = edges.reshape(-1, 2)
+            
+            if "polygons" in attributes or "uvs" in attributes:
+                loop_start = np.empty(n_polys, dtype=np.int32)
+                loop_total = np.empty(n_polys, dtype=np.int32)
+                mesh.polygons.foreach_get("loop_start", loop_start)
+                mesh.polygons.foreach_get("loop_total", loop_total)
+                if p1 > p0:
+                    l0 = int(loop_start[p0])
+                    l1 = int(loop_start[p1 - 1] + loop_total[p1 - 1])
+                
+                if "polygons" in attributes:
+                    loop_vertex = np.empty(n_loops, dtype=np.int32)
+                    mesh.loops.foreach_get("vertex_index", loop_vertex)
+                    # Loop starts are relative to the first loop of the page
+                    attachments["polygon_loop_start"] = loop_start[p0:p1] - l0
+                    attachments["polygon_loop_total"] = loop_total[p0:p1]
+                    attachments["loop_vertex_index"] = loop_vertex[l0:l1]
+                
+                if "uvs" in attributes and mesh.uv_layers.active:
+                    uvs = np.empty(n_loops * 2, dtype=np.float32)
+                    mesh.uv_layers.active.data.foreach_get("uv", uvs)
+                    attachments["uvs"] = uvs.reshape(-1, 2)[l0:l1]
+            
+            return {
+                "name": obj.name,
+                "vertex_count": n_verts,
+                "polygon_count": n_polys,
+                "loop_count": n_loops,
+                "vertex_range": [v0, v1],
+                "polygon_range": [p0, p1],
+                "loop_range": [l0, l1],
+                "attachments": attachments,
+            }
+        finally:
+            if evaluated:
+                eval_obj.to_mesh_clear()
+    
+    def create_mesh_from_buffers(self, name, attachments=None, collection=None,
+                                 location=None, validate=False):
+        """
+        Build a mesh object directly from binary arrays with foreach_set.
+        
+        No operators run, so there are no undo pushes or viewport updates per element.
+        
+        Attachments:
+        - vertices: float32 (n, 3) vertex positions
+        - faces: int32 (m, k) vertex indices for meshes where every face has k corners, or
+        - polygon_loop_total + loop_vertex_index: int32 corner counts per face and the
+          flattened corner vertex indices, for mixed face sizes (as returned by get_mesh_data)
+        - uvs: optional float32 (loops, 2) UVs for every face corner
+        """
+        attachments = attachments or {}
+        if "vertices" not in attachments:
+            raise ValueError("A vertices attachment is required")
+        vertices = np.ascontiguousarray(attachments["vertices"], dtype=np.float32).reshape(-1, 3)
+        
+        if "faces" in attachments:
+            faces = np.asarray(attachments["faces"], dtype=np.int32)
+            if faces.ndim == 1:
+                faces = faces.reshape(-1, 3)  # A flat index list is read as triangles
+            loop_vertex = np.ascontiguousarray(faces.ravel())
+            loop_total = np.full(len(faces), faces.shape[1], dtype=np.int32)
+        elif "polygon_loop_total" in attachments and "loop_vertex_index" in attachments:
+            loop_total = np.ascontiguousarray(attachments["polygon_loop_total"], dtype=np.int32).ravel()
+            loop_vertex = np.ascontiguousarray(attachments["loop_vertex_index"], dtype=np.int32).ravel()
+        else:
+            loop_total = np.empty(0, dtype=np.int32)
+            loop_vertex = np.empty(0, dtype=np.int32)
+        
+        if int(loop_total.sum()) != len(loop_vertex):
+            raise ValueError(f"Face corner counts add up to {int(loop_total.sum())}, got {len(loop_vertex)} loop vertex indices")
+        if len(loop_vertex) and (loop_vertex.min() < 0 or loop_vertex.max() >= len(vertices)):
+            raise ValueError("Face vertex index out of range")
+        
+        loop_start = np.zeros(len(loop_total), dtype=np.int32)
+        np.cumsum(loop_total[:-1], out=loop_start[1:])
+        
+        mesh = bpy.data.meshes.new(name)
+        mesh.vertices.add(len(vertices))
+        mesh.vertices.foreach_set("co", vertices.ravel())
+        mesh.loops.add(len(loop_vertex))
+        mesh.loops.foreach_set("vertex_index", loop_vertex)
+        mesh.polygons.add(len(loop_total))
+        mesh.polygons.foreach_set("loop_start", loop_start)
+        if bpy.app.version < (4, 0, 0):
+            # Blender 4.0+ derives the corner count from loop_start and made it read-only
+            mesh.polygons.foreach_set("loop_total", loop_total)
+        
+        if "uvs" in attachments and len(loop_vertex):
+            uvs = np.ascontiguousarray(attachments["uvs"], dtype=np.float32).ravel()
+            if len(uvs) != len(loop_vertex) * 2:
+                bpy.data.meshes.remove(mesh)
+                raise ValueError(f"Expected {len(loop_vertex)} UVs, one per face corner, got {len(uvs) // 2}")
+            mesh.uv_layers.new(name="UVMap").data.foreach_set("uv", uvs)
+        
+        mesh.update(calc_edges=True)
+        if validate:
+            mesh.validate()
+        
+        obj = bpy.data.objects.new(name, mesh)
+        if location:
+            obj.location = location
+        target = bpy.data.collections.get(collection) if collection else bpy.context.scene.collection
+        if target is None:
+            bpy.data.objects.remove(obj)
+            bpy.data.meshes.remove(mesh)
+            raise ValueError(f"Collection not found: {collection}")
+        target.objects.link(obj)
+        
+        return {
+            "name": obj.name,
+            "mesh": mesh.name,
+            "vertex_count": len(mesh.vertices),
+            "edge_count": len(mesh.edges),
+            "polygon_count": len(mesh.polygons),
+            "has_uvs": bool(mesh.uv_layers),
+        }
+    
+    # Custom property holding the sha256 of the bytes a packed image was loaded from
+    IMAGE_HASH_PROPERTY = "blendermcp_sha256"
+    
+    SCREENSHOT_FORMATS = {"png": "PNG", "jpeg": "JPEG", "jpg": "JPEG", "webp": "WEBP"}
+
+    def get_viewport_screenshot(self, max_size=800, filepath=None, format="png", quality=90):
         """
-        Capture a screenshot of the current 3D viewport and save it to the specified path.
+        Capture a screenshot of the current 3D viewport.
         
         Parameters:
         - max_size: Maximum size in pixels for the largest dimension of the image
-        - filepath: Path where to save the screenshot file
-        - format: Image format (png, jpg, etc.)
+        - filepath: Optional path to save the screenshot to, for older MCP servers
+        - format: Image format (png, jpeg or webp)
+        - quality: Compression quality for jpeg and webp (1-100)
         
-        Returns success/error status
+        Without filepath the viewport pixels are read once on the main thread, then
+        downsampled and encoded in memory on this worker thread. The encoded image
+        is returned as the "image" attachment.
         """
         try:
-            if not filepath:
-                return {"error": "No filepath provided"}
+            image_format = self.SCREENSHOT_FORMATS.get(format.lower())
+            if image_format is None:
+                return {"error": f"Unsupported screenshot format: {format}"}
+            if filepath:
+                return self.run_in_main_thread(self._save_viewport_screenshot, max_size, filepath, format)
             
+            pixels = self.run_in_main_thread(self._read_viewport_pixels)
+            if pixels is None:
+                return {"error": "No 3D viewport found"}
+            pixels = self._downsample_pixels(pixels, max_size)
+            if image_format == "PNG":
+                data = self._encode_png(pixels)
+            else:
+                data = self._encode_image(pixels, image_format, quality)
+            height, width = pixels.shape[:2]
+            return {
+                "success": True,
+                "width": width,
+                "height": height,
+                "format": image_format.lower(),
+                "attachments": {"image": np.frombuffer(data, dtype=np.uint8)},
+            }
+        except Exception as e:
+            return {"error": str(e)}
+
+    @classmethod
+    def _read_viewport_pixels(cls):
+        """Top-down RGB uint8 pixels of the first 3D viewport, or None without one"""
+        area = next((a for a in bpy.context.screen.areas if a.type == 'VIEW_3D'), None)
+        if area is None:
+            return None
+        try:
+            return cls._draw_viewport_offscreen(area)
+        except Exception as e:
+            print(f"Offscreen viewport capture failed, taking a screenshot instead: {str(e)}")
+            return cls._screenshot_area_pixels(area)
+
+    @staticmethod
+    def _draw_viewport_offscreen(area):
+        import gpu
+        region = next(r for r in area.regions if r.type == 'WINDOW')
+        space = area.spaces.active
+        width, height = region.width, region.height
+        offscreen = gpu.types.GPUOffScreen(width, height)
+        try:
+            offscreen.draw_view3d(
+                bpy.context.scene, bpy.context.view_layer, space, region,
+                space.region_3d.view_matrix, space.region_3d.window_matrix,
+                do_color_management=True,
+            )
+            buffer = offscreen.texture_color.read()
+        finally:
+            offscreen.free()
+        try:
+            pixels = np.asarray(memoryview(buffer))
+        except TypeError:
+            # Buffers without the buffer protocol in older Blender versions
+            pixels = np.array(buffer.to_list())
+        if np.issubdtype(pixels.dtype, np.floating):
+            pixels = np.clip(pixels, 0.0, 1.0) * 255.0 + 0.5
+        # GPU rows run bottom-up
+        return pixels.reshape(height, width, 4)[::-1, :, :3].astype(np.uint8)
+
+    @staticmethod
+    def _screenshot_area_pixels(area):
+        """Fallback capture through screenshot_area, decoding its file once"""
+        fd, filepath = tempfile.mkstemp(suffix=".png")
+        os.close(fd)
+        try:
+            with bpy.context.temp_override(area=area):
+                bpy.ops.screen.screenshot_area(filepath=filepath)
+            img = bpy.data.images.load(filepath)
+            try:
+                width, height = img.size
+                pixels = np.empty(width * height * 4, dtype=np.float32)
+                img.pixels.foreach_get(pixels)
+            finally:
+                bpy.data.images.remove(img)
+        finally:
+            with suppress(OSError):
+                os.unlink(filepath)
+        pixels = pixels.reshape(height, width, 4)[::-1, :, :3]
+        return (np.clip(pixels, 0.0, 1.0) * 255.0 + 0.5).astype(np.uint8)
+
+    @staticmethod
+    def _downsample_pixels(pixels, max_size):
+        """Shrink an (height, width, channels) uint8 array so its longest side fits max_size"""
+        height, width = pixels.shape[:2]
+        scale = max_size / max(width, height)
+        if scale >= 1:
+            return pixels
+        new_width, new_height = max(1, int(width * scale)), max(1, int(height * scale))
+        
+        # Average whole blocks of pixels, then sample the remaining fraction. Summing
+        # strided views is several times faster than reducing a reshaped block array.
+        factor = min(int(1 / scale), height, width)
+        if factor > 1:
+            rows, cols = height // factor * factor, width // factor * factor
+            total = np.zeros((rows // factor, cols // factor, pixels.shape[2]), dtype=np.uint32)
+            for dy in range(factor):
+                for dx in range(factor):
+                    total += pixels[dy:rows:factor, dx:cols:factor]
+            pixels = ((total + factor * factor // 2) // (factor * factor)).astype(np.uint8)
+        row_index = ((np.arange(new_height) + 0.5) * pixels.shape[0] / new_height).astype(np.intp)
+        col_index = ((np.arange(new_width) + 0.5) * pixels.shape[1] / new_width).astype(np.intp)
+        return pixels[row_index[:, None], col_index[None, :]]
+
+    @staticmethod
+    def _encode_png(pixels, level=6):
+        """Encode an (height, width, 3) uint8 array as PNG using the Up filter on every row"""
+        height, width, channels = pixels.shape
+        rows = pixels.reshape(height, width * channels)
+        filtered = np.empty((height, width * channels + 1), dtype=np.uint8)
+        filtered[:, 0] = 2  # Up: each byte minus the byte above it
+        filtered[0, 1:] = rows[0]
+        np.subtract(rows[1:], rows[:-1], out=filtered[1:, 1:])
+        
+        def chunk(tag, data):
+            return struct.pack("!I", len(data)) + tag + data + struct.pack("!I", zlib.crc32(tag + data))
+        
+        header = struct.pack("!IIBBBBB", width, height, 8, 2 if channels == 3 else 6, 0, 0, 0)
+        return b"".join((
+            b"\x89PNG\r\n\x1a\n",
+            chunk(b"IHDR", header),
+            chunk(b"IDAT", zlib.compress(filtered.tobytes(), level)),
+            chunk(b"IEND", b""),
+        ))
+
+    def _encode_image(self, pixels, image_format, quality):
+        """Encode as JPEG or WebP with Pillow when Blender's Python has it, else with Blender's own writer"""
+        quality = min(max(int(quality), 1), 100)
+        try:
+            from PIL import Image as PILImage
+        except ImportError:
+            return self.run_in_main_thread(self._encode_image_with_blender, pixels, image_format, quality)
+        output = io.BytesIO()
+        PILImage.fromarray(pixels).save(output, format=image_format, quality=quality)
+        return output.getvalue()
+
+    @staticmethod
+    def _encode_image_with_blender(pixels, image_format, quality):
+        height, width = pixels.shape[:2]
+        img = bpy.data.images.new("BlenderMCP_Screenshot", width, height, alpha=False)
+        fd, filepath = tempfile.mkstemp(suffix=f".{image_format.lower()}")
+        os.close(fd)
+        try:
+            rgba = np.ones((height, width, 4), dtype=np.float32)
+            rgba[..., :3] = pixels[::-1] / 255.0
+            img.pixels.foreach_set(rgba.ravel())
+            img.file_format = image_format
+            img.filepath_raw = filepath
+            try:
+                img.save(quality=quality)
+            except TypeError:
+                # Image.save has no quality argument before Blender 3.4
+                img.save()
+            with open(filepath, "rb") as f:
+                return f.read()
+        finally:
+            bpy.data.images.remove(img)
+            with suppress(OSError):
+                os.unlink(filepath)
+
+    @staticmethod
+    def _save_viewport_screenshot(max_size, filepath, format):
+        """Write the viewport to filepath through screenshot_area, for MCP servers that read it from disk"""
+        try:
             # Find the active 3D viewport
             area = None
             for a in bpy.context.screen.areas:
@@ -398,23 +3268,117 @@ class BlenderMCPServer:
         except Exception as e:
             return {"error": str(e)}
     
-    def execute_code(self, code):
-        """Execute arbitrary Blender Python code"""
+    def execute_code(self, code, namespace=None, reset_namespace=False):
+        """Execute arbitrary Blender Python code, optionally in a named namespace kept between calls"""
         # This is powerful but potentially dangerous - use with caution
         try:
-            # Create a local namespace for execution
-            namespace = {"bpy": bpy}
-
-            # Capture stdout during execution, and return it as result
-            capture_buffer = io.StringIO()
-            with redirect_stdout(capture_buffer):
-                exec(code, namespace)
-            
-            captured_output = capture_buffer.getvalue()
-            return {"executed": True, "result": captured_output}
+            compiled = self.code_sessions.compile(code)
+            return self._run_code(compiled, self.code_sessions.namespace(namespace, reset=reset_namespace))
         except Exception as e:
             raise Exception(f"Code execution error: {str(e)}")
     
+    def register_snippet(self, name, code, params=None, defaults=None, namespace=None, description=""):
+        """Store code under a name so it can be run with parameters instead of resending it"""
+        try:
+            self.code_sessions.register(name, code, params, defaults, namespace, description)
+        except (SyntaxError, ValueError) as e:
+            return {"error": f"Invalid snippet: {str(e)}"}
+        return {"success": True, "name": name, "params": list(params or [])}
+    
+    def run_snippet(self, name, params=None):
+        """Run a registered snippet with its parameters set as variables"""
+        try:
+            compiled, namespace = self.code_sessions.bind(name, params)
+        except ValueError as e:
+            return {"error": str(e)}
+        try:
+            return self._run_code(compiled, namespace)
+        except Exception as e:
+            raise Exception(f"Snippet {name} failed: {str(e)}")
+    
+    # Longest a get_code_job call may block waiting for a job to finish
+    CODE_JOB_MAX_WAIT = 600
+    
+    def start_code_job(self, code, namespace=None, time_budget_ms=50):
+        """
+        Run code as a cooperative job that pauses at every `yield`, returns the job id.
+        
+        The job continues on later timer ticks whenever it has used time_budget_ms
+        of the current one. Variables it assigns stay local to the job, the named
+        namespace's helpers are visible to it, and a `return` value becomes the job's value.
+        """
+        try:
+            compiled = self.code_sessions.compile(code, "<blendermcp job>", as_job=True)
+        except SyntaxError as e:
+            return {"error": f"Invalid code: {str(e)}"}
+        namespace = self.code_sessions.namespace(namespace)
+        exec(compiled, namespace)
+        function = namespace.pop(CodeSessions.JOB_FUNCTION)
+        return {"job_id": self.code_jobs.start(function, time_budget_ms)}
+    
+    def get_code_job(self, job_id=None, wait=0, output_offset=0):
+        """
+        State, progress and output of a code job, or a summary of all jobs without job_id.
+        
+        With wait, returns a Future that resolves once the job finishes or that
+        many seconds pass, reporting its progress as it goes. Only the output
+        printed from output_offset on is returned.
+        """
+        if job_id is None:
+            jobs = [self.code_jobs.status(i, output_offset=None) for i in self.code_jobs.job_ids()]
+            return {"jobs": [
+                {key: job[key] for key in ("job_id", "state", "progress", "total", "message", "steps")}
+                for job in jobs if job is not None
+            ]}
+        
+        def found(status):
+            return status if status is not None else {"error": f"Unknown code job: {job_id}"}
+        
+        if not wait:
+            return found(self.code_jobs.status(job_id, output_offset))
+        
+        # Progress is reported from the job's ticks, after this handler returned
+        progress_callback = getattr(self._progress, "callback", None)
+        reported = {}
+        
+        def on_change(status):
+            update = (status["progress"], status["total"], status["message"], status["steps"])
+            if progress_callback and reported.get("update") != update:
+                reported["update"] = update
+                progress = status["progress"] if status["progress"] is not None else status["steps"]
+                progress_callback(progress, status["total"], status["message"])
+        
+        watching = self.code_jobs.watch(job_id, min(float(wait), self.CODE_JOB_MAX_WAIT), on_change, output_offset)
+        return self._map_future(watching, found)
+    
+    def cancel_code_job(self, job_id):
+        """Cancel a running code job before its next step"""
+        if self.code_jobs.cancel(job_id):
+            return {"success": True, "job_id": job_id}
+        if self.code_jobs.status(job_id) is None:
+            return {"error": f"Unknown code job: {job_id}"}
+        return {"error": f"Code job {job_id} has already finished"}
+    
+    def get_code_sessions(self):
+        """List the named namespaces, registered snippets and compiled code cache"""
+        return self.code_sessions.describe()
+    
+    @staticmethod
+    def _run_code(compiled, namespace):
+        # Code can hand back a value by assigning it to `result`; drop the one
+        # an earlier call left in a persistent namespace
+        namespace.pop("result", None)
+        
+        # Capture stdout during execution, and return it as result
+        capture_buffer = io.StringIO()
+        with _capture_stdout(capture_buffer):
+            exec(compiled, namespace)
+        
+        response = {"executed": True, "result": capture_buffer.getvalue()}
+        if "result" in namespace:
+            response["value"] = CodeSessions.json_value(namespace["result"])
+        return response
+    
     
 
     def get_polyhaven_categories(self, asset_type):
@@ -422,349 +3386,108 @@ class BlenderMCPServer:
         try:
             if asset_type not in ["hdris", "textures", "models", "all"]:
                 return {"error": f"Invalid asset type: {asset_type}. Must be one of: hdris, textures, models, all"}
-                
-            response = requests.get(f"https://api.polyhaven.com/categories/{asset_type}")
-            if response.status_code == 200:
-                return {"categories": response.json()}
-            else:
-                return {"error": f"API request failed with status code {response.status_code}"}
+            
+            # Counted from the cached catalog rather than asking the API
+            return {"categories": self.polyhaven_catalog.categories(asset_type)}
         except Exception as e:
             return {"error": str(e)}
     
-    def search_polyhaven_assets(self, asset_type=None, categories=None):
-        """Search for assets from Polyhaven with optional filtering"""
+    def search_polyhaven_assets(self, asset_type=None, categories=None, query=None,
+                                sort=None, offset=0, limit=20):
+        """Search the cached Polyhaven catalog with optional text query, filtering and paging"""
         try:
-            url = "https://api.polyhaven.com/assets"
-            params = {}
-            
             if asset_type and asset_type != "all":
                 if asset_type not in ["hdris", "textures", "models"]:
                     return {"error": f"Invalid asset type: {asset_type}. Must be one of: hdris, textures, models, all"}
-                params["type"] = asset_type
-                
-            if categories:
-                params["categories"] = categories
-                
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                # Limit the response size to avoid overwhelming Blender
-                assets = response.json()
-                # Return only the first 20 assets to keep response size manageable
-                limited_assets = {}
-                for i, (key, value) in enumerate(assets.items()):
-                    if i >= 20:  # Limit to 20 assets
-                        break
-                    limited_assets[key] = value
-                
-                return {"assets": limited_assets, "total_count": len(assets), "returned_count": len(limited_assets)}
-            else:
-                return {"error": f"API request failed with status code {response.status_code}"}
+            
+            return self.polyhaven_catalog.search(
+                query=query,
+                asset_type=asset_type or "all",
+                categories=categories,
+                sort=sort,
+                offset=offset,
+                limit=limit,
+            )
         except Exception as e:
             return {"error": str(e)}
     
     def download_polyhaven_asset(self, asset_id, asset_type, resolution="1k", file_format=None):
+        # Runs on a worker thread: downloads happen here, Blender imports are
+        # marshalled to the main thread through run_in_main_thread
         try:
-            # First get the files information
-            files_response = requests.get(f"https://api.polyhaven.com/files/{asset_id}")
-            if files_response.status_code != 200:
-                return {"error": f"Failed to get asset files: {files_response.status_code}"}
-            
-            files_data = files_response.json()
-            
-            # Handle different asset types
             if asset_type == "hdris":
-                # For HDRIs, download the .hdr or .exr file
-                if not file_format:
-                    file_format = "hdr"  # Default format for HDRIs
-                
-                if "hdri" in files_data and resolution in files_data["hdri"] and file_format in files_data["hdri"][resolution]:
-                    file_info = files_data["hdri"][resolution][file_format]
-                    file_url = file_info["url"]
-                    
-                    # For HDRIs, we need to save to a temporary file first
-                    # since Blender can't properly load HDR data directly from memory
-                    with tempfile.NamedTemporaryFile(suffix=f".{file_format}", delete=False) as tmp_file:
-                        # Download the file
-                        response = requests.get(file_url)
-                        if response.status_code != 200:
-                            return {"error": f"Failed to download HDRI: {response.status_code}"}
-                        
-                        tmp_file.write(response.content)
-                        tmp_path = tmp_file.name
-                    
-                    try:
-                        # Create a new world if none exists
-                        if not bpy.data.worlds:
-                            bpy.data.worlds.new("World")
-                        
-                        world = bpy.data.worlds[0]
-                        world.use_nodes = True
-                        node_tree = world.node_tree
-                        
-                        # Clear existing nodes
-                        for node in node_tree.nodes:
-                            node_tree.nodes.remove(node)
-                        
-                        # Create nodes
-                        tex_coord = node_tree.nodes.new(type='ShaderNodeTexCoord')
-                        tex_coord.location = (-800, 0)
-                        
-                        mapping = node_tree.nodes.new(type='ShaderNodeMapping')
-                        mapping.location = (-600, 0)
-                        
-                        # Load the image from the temporary file
-                        env_tex = node_tree.nodes.new(type='ShaderNodeTexEnvironment')
-                        env_tex.location = (-400, 0)
-                        env_tex.image = bpy.data.images.load(tmp_path)
-                        
-                        # Use a color space that exists in all Blender versions
-                        if file_format.lower() == 'exr':
-                            # Try to use Linear color space for EXR files
-                            try:
-                                env_tex.image.colorspace_settings.name = 'Linear'
-                            except:
-                                # Fallback to Non-Color if Linear isn't available
-                                env_tex.image.colorspace_settings.name = 'Non-Color'
-                        else:  # hdr
-                            # For HDR files, try these options in order
-                            for color_space in ['Linear', 'Linear Rec.709', 'Non-Color']:
-                                try:
-                                    env_tex.image.colorspace_settings.name = color_space
-                                    break  # Stop if we successfully set a color space
-                                except:
-                                    continue
-                        
-                        background = node_tree.nodes.new(type='ShaderNodeBackground')
-                        background.location = (-200, 0)
-                        
-                        output = node_tree.nodes.new(type='ShaderNodeOutputWorld')
-                        output.location = (0, 0)
-                        
-                        # Connect nodes
-                        node_tree.links.new(tex_coord.outputs['Generated'], mapping.inputs['Vector'])
-                        node_tree.links.new(mapping.outputs['Vector'], env_tex.inputs['Vector'])
-                        node_tree.links.new(env_tex.outputs['Color'], background.inputs['Color'])
-                        node_tree.links.new(background.outputs['Background'], output.inputs['Surface'])
-                        
-                        # Set as active world
-                        bpy.context.scene.world = world
-                        
-                        # Clean up temporary file
-                        try:
-                            tempfile._cleanup()  # This will clean up all temporary files
-                        except:
-                            pass
-                        
+                file_format = file_format or "hdr"  # Default format for HDRIs
+                download = self._download_polyhaven_hdri
+            elif asset_type == "textures":
+                file_format = file_format or "jpg"  # Default format for textures
+                download = self._download_polyhaven_textures
+            elif asset_type == "models":
+                file_format = file_format or "gltf"  # Default format for models
+                if file_format not in ["gltf", "glb", "fbx", "obj", "blend"]:
+                    return {"error": f"Unsupported model format: {file_format}"}
+                download = self._download_polyhaven_model
+            else:
+                return {"error": f"Unsupported asset type: {asset_type}"}
+            
+            # Cached assets are imported without touching the network
+            key = AssetCache.make_key("polyhaven", asset_id, resolution, file_format)
+            try:
+                entry = self.asset_cache.fetch(
+                    key, lambda staging_dir: download(asset_id, resolution, file_format, staging_dir), pin=True
+                )
+            except AssetDownloadError as e:
+                return {"error": str(e)}
+            
+            try:
+                if asset_type == "hdris":
+                    # The world keeps referencing the file, so give it a copy that
+                    # cache eviction can't pull out from under it
+                    with tempfile.NamedTemporaryFile(suffix=f".{file_format}", delete=False) as tmp_file:
+                        tmp_path = tmp_file.name
+                    shutil.copyfile(os.path.join(entry["path"], entry["meta"]["file"]), tmp_path)
+                
+                    try:
+                        image_name = self.run_in_main_thread(self._setup_hdri_world, tmp_path, file_format)
                         return {
                             "success": True, 
                             "message": f"HDRI {asset_id} imported successfully",
-                            "image_name": env_tex.image.name
+                            "image_name": image_name
                         }
                     except Exception as e:
                         return {"error": f"Failed to set up HDRI in Blender: {str(e)}"}
-                else:
-                    return {"error": f"Requested resolution or format not available for this HDRI"}
-                    
-            elif asset_type == "textures":
-                if not file_format:
-                    file_format = "jpg"  # Default format for textures
-                
-                downloaded_maps = {}
-                
-                try:
-                    for map_type in files_data:
-                        if map_type not in ["blend", "gltf"]:  # Skip non-texture files
-                            if resolution in files_data[map_type] and file_format in files_data[map_type][resolution]:
-                                file_info = files_data[map_type][resolution][file_format]
-                                file_url = file_info["url"]
-                                
-                                # Use NamedTemporaryFile like we do for HDRIs
-                                with tempfile.NamedTemporaryFile(suffix=f".{file_format}", delete=False) as tmp_file:
-                                    # Download the file
-                                    response = requests.get(file_url)
-                                    if response.status_code == 200:
-                                        tmp_file.write(response.content)
-                                        tmp_path = tmp_file.name
-                                        
-                                        # Load image from temporary file
-                                        image = bpy.data.images.load(tmp_path)
-                                        image.name = f"{asset_id}_{map_type}.{file_format}"
-                                        
-                                        # Pack the image into .blend file
-                                        image.pack()
-                                        
-                                        # Set color space based on map type
-                                        if map_type in ['color', 'diffuse', 'albedo']:
-                                            try:
-                                                image.colorspace_settings.name = 'sRGB'
-                                            except:
-                                                pass
-                                        else:
-                                            try:
-                                                image.colorspace_settings.name = 'Non-Color'
-                                            except:
-                                                pass
-                                        
-                                        downloaded_maps[map_type] = image
-                                        
-                                        # Clean up temporary file
-                                        try:
-                                            os.unlink(tmp_path)
-                                        except:
-                                            pass
-                
-                    if not downloaded_maps:
-                        return {"error": f"No texture maps found for the requested resolution and format"}
-                    
-                    # Create a new material with the downloaded textures
-                    mat = bpy.data.materials.new(name=asset_id)
-                    mat.use_nodes = True
-                    nodes = mat.node_tree.nodes
-                    links = mat.node_tree.links
-                    
-                    # Clear default nodes
-                    for node in nodes:
-                        nodes.remove(node)
-                    
-                    # Create output node
-                    output = nodes.new(type='ShaderNodeOutputMaterial')
-                    output.location = (300, 0)
-                    
-                    # Create principled BSDF node
-                    principled = nodes.new(type='ShaderNodeBsdfPrincipled')
-                    principled.location = (0, 0)
-                    links.new(principled.outputs[0], output.inputs[0])
-                    
-                    # Add texture nodes based on available maps
-                    tex_coord = nodes.new(type='ShaderNodeTexCoord')
-                    tex_coord.location = (-800, 0)
-                    
-                    mapping = nodes.new(type='ShaderNodeMapping')
-                    mapping.location = (-600, 0)
-                    mapping.vector_type = 'TEXTURE'  # Changed from default 'POINT' to 'TEXTURE'
-                    links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
-                    
-                    # Position offset for texture nodes
-                    x_pos = -400
-                    y_pos = 300
-                    
-                    # Connect different texture maps
-                    for map_type, image in downloaded_maps.items():
-                        tex_node = nodes.new(type='ShaderNodeTexImage')
-                        tex_node.location = (x_pos, y_pos)
-                        tex_node.image = image
-                        
-                        # Set color space based on map type
-                        if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                            try:
-                                tex_node.image.colorspace_settings.name = 'sRGB'
-                            except:
-                                pass  # Use default if sRGB not available
-                        else:
-                            try:
-                                tex_node.image.colorspace_settings.name = 'Non-Color'
-                            except:
-                                pass  # Use default if Non-Color not available
-                        
-                        links.new(mapping.outputs['Vector'], tex_node.inputs['Vector'])
-                        
-                        # Connect to appropriate input on Principled BSDF
-                        if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                            links.new(tex_node.outputs['Color'], principled.inputs['Base Color'])
-                        elif map_type.lower() in ['roughness', 'rough']:
-                            links.new(tex_node.outputs['Color'], principled.inputs['Roughness'])
-                        elif map_type.lower() in ['metallic', 'metalness', 'metal']:
-                            links.new(tex_node.outputs['Color'], principled.inputs['Metallic'])
-                        elif map_type.lower() in ['normal', 'nor']:
-                            # Add normal map node
-                            normal_map = nodes.new(type='ShaderNodeNormalMap')
-                            normal_map.location = (x_pos + 200, y_pos)
-                            links.new(tex_node.outputs['Color'], normal_map.inputs['Color'])
-                            links.new(normal_map.outputs['Normal'], principled.inputs['Normal'])
-                        elif map_type in ['displacement', 'disp', 'height']:
-                            # Add displacement node
-                            disp_node = nodes.new(type='ShaderNodeDisplacement')
-                            disp_node.location = (x_pos + 200, y_pos - 200)
-                            links.new(tex_node.outputs['Color'], disp_node.inputs['Height'])
-                            links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
-                        
-                        y_pos -= 250
-                    
-                    return {
-                        "success": True, 
-                        "message": f"Texture {asset_id} imported as material",
-                        "material": mat.name,
-                        "maps": list(downloaded_maps.keys())
+            
+                elif asset_type == "textures":
+                    texture_files = {
+                        map_type: os.path.join(entry["path"], filename)
+                        for map_type, filename in entry["meta"]["maps"].items()
                     }
-                
-                except Exception as e:
-                    return {"error": f"Failed to process textures: {str(e)}"}
-                
-            elif asset_type == "models":
-                # For models, prefer glTF format if available
-                if not file_format:
-                    file_format = "gltf"  # Default format for models
-                
-                if file_format in files_data and resolution in files_data[file_format]:
-                    file_info = files_data[file_format][resolution][file_format]
-                    file_url = file_info["url"]
-                    
-                    # Create a temporary directory to store the model and its dependencies
-                    temp_dir = tempfile.mkdtemp()
-                    main_file_path = ""
+                    # The cache hashed every file when it stored them
+                    digests = {
+                        map_type: entry["files"][filename]["sha256"]
+                        for map_type, filename in entry["meta"]["maps"].items()
+                    }
+                    try:
+                        # The images are packed, so nothing keeps referencing the cache
+                        material_name = self.run_in_main_thread(
+                            self._build_texture_material, asset_id, texture_files, file_format, digests
+                        )
                     
+                        return {
+                            "success": True, 
+                            "message": f"Texture {asset_id} imported as material",
+                            "material": material_name,
+                            "maps": list(texture_files.keys())
+                        }
+                    except Exception as e:
+                        return {"error": f"Failed to process textures: {str(e)}"}
+            
+                else:
                     try:
-                        # Download the main model file
-                        main_file_name = file_url.split("/")[-1]
-                        main_file_path = os.path.join(temp_dir, main_file_name)
-                        
-                        response = requests.get(file_url)
-                        if response.status_code != 200:
-                            return {"error": f"Failed to download model: {response.status_code}"}
-                        
-                        with open(main_file_path, "wb") as f:
-                            f.write(response.content)
-                        
-                        # Check for included files and download them
-                        if "include" in file_info and file_info["include"]:
-                            for include_path, include_info in file_info["include"].items():
-                                # Get the URL for the included file - this is the fix
-                                include_url = include_info["url"]
-                                
-                                # Create the directory structure for the included file
-                                include_file_path = os.path.join(temp_dir, include_path)
-                                os.makedirs(os.path.dirname(include_file_path), exist_ok=True)
-                                
-                                # Download the included file
-                                include_response = requests.get(include_url)
-                                if include_response.status_code == 200:
-                                    with open(include_file_path, "wb") as f:
-                                        f.write(include_response.content)
-                                else:
-                                    print(f"Failed to download included file: {include_path}")
-                        
                         # Import the model into Blender
-                        if file_format == "gltf" or file_format == "glb":
-                            bpy.ops.import_scene.gltf(filepath=main_file_path)
-                        elif file_format == "fbx":
-                            bpy.ops.import_scene.fbx(filepath=main_file_path)
-                        elif file_format == "obj":
-                            bpy.ops.import_scene.obj(filepath=main_file_path)
-                        elif file_format == "blend":
-                            # For blend files, we need to append or link
-                            with bpy.data.libraries.load(main_file_path, link=False) as (data_from, data_to):
-                                data_to.objects = data_from.objects
-                            
-                            # Link the objects to the scene
-                            for obj in data_to.objects:
-                                if obj is not None:
-                                    bpy.context.collection.objects.link(obj)
-                        else:
-                            return {"error": f"Unsupported model format: {file_format}"}
-                        
-                        # Get the names of imported objects
-                        imported_objects = [obj.name for obj in bpy.context.selected_objects]
-                        
+                        imported_objects = self.run_in_main_thread(
+                            self._import_model_file, os.path.join(entry["path"], entry["meta"]["main_file"]), file_format
+                        )
+                    
                         return {
                             "success": True, 
                             "message": f"Model {asset_id} imported successfully",
@@ -772,21 +3495,369 @@ class BlenderMCPServer:
                         }
                     except Exception as e:
                         return {"error": f"Failed to import model: {str(e)}"}
-                    finally:
-                        # Clean up temporary directory
-                        with suppress(Exception):
-                            shutil.rmtree(temp_dir)
-                else:
-                    return {"error": f"Requested format or resolution not available for this model"}
-                
-            else:
-                return {"error": f"Unsupported asset type: {asset_type}"}
+            finally:
+                # Importers read the files in place, so keep them from being evicted until then
+                self.asset_cache.release(key)
                 
         except Exception as e:
             return {"error": f"Failed to download asset: {str(e)}"}
 
+    def _get_polyhaven_files(self, asset_id):
+        """Fetch the file listing of a Poly Haven asset"""
+        files_response = self.http["polyhaven"].get(f"/files/{asset_id}")
+        if files_response.status_code != 200:
+            raise AssetDownloadError(f"Failed to get asset files: {files_response.status_code}")
+        return files_response.json()
+
+    def _download_polyhaven_hdri(self, asset_id, resolution, file_format, staging_dir):
+        """Download an HDRI into staging_dir, returns the cache entry metadata"""
+        files_data = self._get_polyhaven_files(asset_id)
+        if not ("hdri" in files_data and resolution in files_data["hdri"] and file_format in files_data["hdri"][resolution]):
+            raise AssetDownloadError("Requested resolution or format not available for this HDRI")
+        
+        # Blender can't load HDR data from memory, so it goes to a file either way
+        filename = f"{asset_id}_{resolution}.{file_format}"
+        file_url = files_data["hdri"][resolution][file_format]["url"]
+        failures = self._download_files(self.http["polyhaven"], {filename: file_url}, staging_dir)
+        if failures:
+            raise AssetDownloadError(f"Failed to download HDRI: {failures[filename]}")
+        return {"file": filename}
+
+    def _download_polyhaven_textures(self, asset_id, resolution, file_format, staging_dir):
+        """Download every texture map into staging_dir, returns the cache entry metadata"""
+        files_data = self._get_polyhaven_files(asset_id)
+        maps = {}
+        for map_type in files_data:
+            if map_type not in ["blend", "gltf"]:  # Skip non-texture files
+                if resolution in files_data[map_type] and file_format in files_data[map_type][resolution]:
+                    maps[map_type] = f"{map_type}.{file_format}"
+        
+        failures = self._download_files(self.http["polyhaven"], {
+            filename: files_data[map_type][resolution][file_format]["url"]
+            for map_type, filename in maps.items()
+        }, staging_dir)
+        # Maps that failed to download are left out of the material
+        maps = {map_type: filename for map_type, filename in maps.items() if filename not in failures}
+        
+        if not maps:
+            raise AssetDownloadError("No texture maps found for the requested resolution and format")
+        return {"maps": maps}
+
+    def _download_polyhaven_model(self, asset_id, resolution, file_format, staging_dir):
+        """Download a model and its included files into staging_dir, returns the cache entry metadata"""
+        files_data = self._get_polyhaven_files(asset_id)
+        if not (file_format in files_data and resolution in files_data[file_format]):
+            raise AssetDownloadError("Requested format or resolution not available for this model")
+        
+        file_info = files_data[file_format][resolution][file_format]
+        file_url = file_info["url"]
+        main_file_name = file_url.split("/")[-1]
+        
+        # The main model file and everything it includes download together
+        downloads = {main_file_name: file_url}
+        for include_path, include_info in (file_info.get("include") or {}).items():
+            downloads[include_path] = include_info["url"]
+        
+        failures = self._download_files(self.http["polyhaven"], downloads, staging_dir)
+        if main_file_name in failures:
+            raise AssetDownloadError(f"Failed to download model: {failures[main_file_name]}")
+        for include_path in failures:
+            print(f"Failed to download included file: {include_path}")
+        
+        return {"main_file": main_file_name}
+
+    def _download_files(self, client, downloads, target_dir):
+        """
+        Fetch {relative path: url} into target_dir concurrently on the download pool.
+        
+        Reports progress as each file lands and returns {relative path: error}
+        for the files that failed.
+        """
+        total = len(downloads)
+        self.report_progress(0, total, f"Downloading {total} files")
+        futures = {
+            self.download_executor.submit(self._download_file, client, url, os.path.join(target_dir, relpath)): relpath
+            for relpath, url in downloads.items()
+        }
+        failures = {}
+        for done, future in enumerate(as_completed(futures), 1):
+            relpath = futures[future]
+            try:
+                future.result()
+            except Exception as e:
+                failures[relpath] = str(e)
+            self.report_progress(done, total, f"Downloaded {relpath}")
+        return failures
+
+    DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+    DOWNLOAD_ATTEMPTS = 3
+    
+    @classmethod
+    def _download_file(cls, client, url, filepath, progress=None):
+        """
+        Stream url to filepath in fixed-size chunks, so memory use doesn't grow with the file.
+        
+        Data goes to filepath + ".part" first. If the connection drops, or a previous
+        attempt left a partial file behind, the download continues from where it
+        stopped with an HTTP Range request. A file already at filepath is complete
+        and is not downloaded again. progress(received, total) is called at most
+        a few times a second.
+        """
+        if os.path.exists(filepath):
+            return
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        part_path = f"{filepath}.part"
+        
+        for attempt in range(cls.DOWNLOAD_ATTEMPTS):
+            offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with client.get(url, stream=True, headers=headers) as response:
+                    if response.status_code == 416 and offset:
+                        break  # The partial file already holds everything
+                    if response.status_code == 200:
+                        offset = 0  # Range not honoured, start over
+                    elif response.status_code != 206 or not offset:
+                        raise AssetDownloadError(f"Download of {url} failed with status code {response.status_code}")
+                    
+                    length = response.headers.get("Content-Length")
+                    total = offset + int(length) if length else None
+                    received = offset
+                    last_report = 0.0
+                    with open(part_path, "ab" if offset else "wb") as f:
+                        for chunk in response.iter_content(chunk_size=cls.DOWNLOAD_CHUNK_SIZE):
+                            f.write(chunk)
+                            received += len(chunk)
+                            if progress and time.monotonic() - last_report > 0.25:
+                                last_report = time.monotonic()
+                                progress(received, total)
+                    if total is not None and received < total:
+                        raise requests.exceptions.ConnectionError(f"Connection closed after {received} of {total} bytes")
+                break
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout) as e:
+                if attempt == cls.DOWNLOAD_ATTEMPTS - 1:
+                    raise
+                print(f"Download of {url} interrupted, resuming: {str(e)}")
+        
+        if progress:
+            size = os.path.getsize(part_path)
+            progress(size, size)
+        os.replace(part_path, filepath)
+
+    @staticmethod
+    def _setup_hdri_world(hdri_path, file_format):
+        """Use a downloaded HDRI as the world environment, returns the image name"""
+        # Create a new world if none exists
+        if not bpy.data.worlds:
+            bpy.data.worlds.new("World")
+        
+        world = bpy.data.worlds[0]
+        world.use_nodes = True
+        node_tree = world.node_tree
+        
+        # Clear existing nodes
+        for node in node_tree.nodes:
+            node_tree.nodes.remove(node)
+        
+        # Create nodes
+        tex_coord = node_tree.nodes.new(type='ShaderNodeTexCoord')
+        tex_coord.location = (-800, 0)
+        
+        mapping = node_tree.nodes.new(type='ShaderNodeMapping')
+        mapping.location = (-600, 0)
+        
+        # Load the image from the temporary file
+        env_tex = node_tree.nodes.new(type='ShaderNodeTexEnvironment')
+        env_tex.location = (-400, 0)
+        env_tex.image = bpy.data.images.load(hdri_path)
+        
+        # Use a color space that exists in all Blender versions
+        if file_format.lower() == 'exr':
+            # Try to use Linear color space for EXR files
+            try:
+                env_tex.image.colorspace_settings.name = 'Linear'
+            except:
+                # Fallback to Non-Color if Linear isn't available
+                env_tex.image.colorspace_settings.name = 'Non-Color'
+        else:  # hdr
+            # For HDR files, try these options in order
+            for color_space in ['Linear', 'Linear Rec.709', 'Non-Color']:
+                try:
+                    env_tex.image.colorspace_settings.name = color_space
+                    break  # Stop if we successfully set a color space
+                except:
+                    continue
+        
+        background = node_tree.nodes.new(type='ShaderNodeBackground')
+        background.location = (-200, 0)
+        
+        output = node_tree.nodes.new(type='ShaderNodeOutputWorld')
+        output.location = (0, 0)
+        
+        # Connect nodes
+        node_tree.links.new(tex_coord.outputs['Generated'], mapping.inputs['Vector'])
+        node_tree.links.new(mapping.outputs['Vector'], env_tex.inputs['Vector'])
+        node_tree.links.new(env_tex.outputs['Color'], background.inputs['Color'])
+        node_tree.links.new(background.outputs['Background'], output.inputs['Surface'])
+        
+        # Set as active world
+        bpy.context.scene.world = world
+        
+        return env_tex.image.name
+
+    def _build_texture_material(self, asset_id, texture_files, file_format, digests):
+        """Load downloaded texture maps and build a material from them, returns the material name"""
+        downloaded_maps = {}
+        for map_type, tmp_path in texture_files.items():
+            # Set color space based on map type
+            colorspace = 'sRGB' if map_type.lower() in ['color', 'diffuse', 'albedo'] else 'Non-Color'
+            downloaded_maps[map_type] = self._load_packed_image(
+                tmp_path, digests[map_type], f"{asset_id}_{map_type}.{file_format}", colorspace
+            )
+        
+        # set_texture looks the maps up here instead of scanning bpy.data.images
+        self._register_texture_set(asset_id, downloaded_maps)
+        
+        # Create a new material with the downloaded textures
+        mat = bpy.data.materials.new(name=asset_id)
+        mat.use_nodes = True
+        nodes = mat.node_tree.nodes
+        links = mat.node_tree.links
+        
+        # Clear default nodes
+        for node in nodes:
+            nodes.remove(node)
+        
+        # Create output node
+        output = nodes.new(type='ShaderNodeOutputMaterial')
+        output.location = (300, 0)
+        
+        # Create principled BSDF node
+        principled = nodes.new(type='ShaderNodeBsdfPrincipled')
+        principled.location = (0, 0)
+        links.new(principled.outputs[0], output.inputs[0])
+        
+        # Add texture nodes based on available maps
+        tex_coord = nodes.new(type='ShaderNodeTexCoord')
+        tex_coord.location = (-800, 0)
+        
+        mapping = nodes.new(type='ShaderNodeMapping')
+        mapping.location = (-600, 0)
+        mapping.vector_type = 'TEXTURE'  # Changed from default 'POINT' to 'TEXTURE'
+        links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
+        
+        # Position offset for texture nodes
+        x_pos = -400
+        y_pos = 300
+        
+        # Connect different texture maps
+        for map_type, image in downloaded_maps.items():
+            tex_node = nodes.new(type='ShaderNodeTexImage')
+            tex_node.location = (x_pos, y_pos)
+            tex_node.image = image
+        
+            # Set color space based on map type
+            if map_type.lower() in ['color', 'diffuse', 'albedo']:
+                try:
+                    tex_node.image.colorspace_settings.name = 'sRGB'
+                except:
+                    pass  # Use default if sRGB not available
+            else:
+                try:
+                    tex_node.image.colorspace_settings.name = 'Non-Color'
+                except:
+                    pass  # Use default if Non-Color not available
+        
+            links.new(mapping.outputs['Vector'], tex_node.inputs['Vector'])
+        
+            # Connect to appropriate input on Principled BSDF
+            if map_type.lower() in ['color', 'diffuse', 'albedo']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Base Color'])
+            elif map_type.lower() in ['roughness', 'rough']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Roughness'])
+            elif map_type.lower() in ['metallic', 'metalness', 'metal']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Metallic'])
+            elif map_type.lower() in ['normal', 'nor']:
+                # Add normal map node
+                normal_map = nodes.new(type='ShaderNodeNormalMap')
+                normal_map.location = (x_pos + 200, y_pos)
+                links.new(tex_node.outputs['Color'], normal_map.inputs['Color'])
+                links.new(normal_map.outputs['Normal'], principled.inputs['Normal'])
+            elif map_type in ['displacement', 'disp', 'height']:
+                # Add displacement node
+                disp_node = nodes.new(type='ShaderNodeDisplacement')
+                disp_node.location = (x_pos + 200, y_pos - 200)
+                links.new(tex_node.outputs['Color'], disp_node.inputs['Height'])
+                links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
+        
+            y_pos -= 250
+        
+        return mat.name
+
+    def _image_hash_index(self):
+        """{(sha256, color space): image name} for the images this addon packed, built once per file"""
+        if self.image_hashes is None:
+            self.image_hashes = {}
+            for image in bpy.data.images:
+                digest = image.get(self.IMAGE_HASH_PROPERTY)
+                if digest:
+                    self.image_hashes.setdefault((digest, image.colorspace_settings.name), image.name)
+        return self.image_hashes
+
+    def _load_packed_image(self, filepath, digest, name, colorspace):
+        """Load and pack an image file, reusing an already packed image with the same bytes and color space"""
+        index = self._image_hash_index()
+        image = bpy.data.images.get(index.get((digest, colorspace), ""))
+        if image is not None and image.get(self.IMAGE_HASH_PROPERTY) == digest:
+            print(f"Reusing image {image.name} for {name}")
+            return image
+        
+        image = bpy.data.images.load(filepath)
+        image.name = name
+        
+        # Pack the image into .blend file
+        image.pack()
+        try:
+            image.colorspace_settings.name = colorspace
+        except:
+            pass
+        
+        # Stored in the .blend, so files saved with these images dedupe too
+        image[self.IMAGE_HASH_PROPERTY] = digest
+        # Key on the color space the image really got, which is what the index is
+        # rebuilt from; an OCIO config without the requested one leaves the default
+        actual = image.colorspace_settings.name
+        index[(digest, actual)] = image.name
+        if actual != colorspace:
+            # Loading it again with the same request would end up identical
+            index.setdefault((digest, colorspace), image.name)
+        return image
+
+    @staticmethod
+    def _import_model_file(filepath, file_format):
+        """Import a downloaded model file, returns the names of the imported objects"""
+        if file_format == "gltf" or file_format == "glb":
+            bpy.ops.import_scene.gltf(filepath=filepath)
+        elif file_format == "fbx":
+            bpy.ops.import_scene.fbx(filepath=filepath)
+        elif file_format == "obj":
+            bpy.ops.import_scene.obj(filepath=filepath)
+        elif file_format == "blend":
+            # For blend files, we need to append or link
+            with bpy.data.libraries.load(filepath, link=False) as (data_from, data_to):
+                data_to.objects = data_from.objects
+            
+            # Link the objects to the scene
+            for obj in data_to.objects:
+                if obj is not None:
+                    bpy.context.collection.objects.link(obj)
+        
+        # Get the names of imported objects
+        return [obj.name for obj in bpy.context.selected_objects]
+
     def set_texture(self, object_name, texture_id):
-        """Apply a previously downloaded Polyhaven texture to an object by creating a new material"""
+        """Apply a previously downloaded Polyhaven texture to an object, sharing one material per texture"""
         try:
             # Get the object
             obj = bpy.data.objects.get(object_name)
@@ -797,245 +3868,12 @@ class BlenderMCPServer:
             if not hasattr(obj, 'data') or not hasattr(obj.data, 'materials'):
                 return {"error": f"Object {object_name} cannot accept materials"}
             
-            # Find all images related to this texture and ensure they're properly loaded
-            texture_images = {}
-            for img in bpy.data.images:
-                if img.name.startswith(texture_id + "_"):
-                    # Extract the map type from the image name
-                    map_type = img.name.split('_')[-1].split('.')[0]
-                    
-                    # Force a reload of the image
-                    img.reload()
-                    
-                    # Ensure proper color space
-                    if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                        try:
-                            img.colorspace_settings.name = 'sRGB'
-                        except:
-                            pass
-                    else:
-                        try:
-                            img.colorspace_settings.name = 'Non-Color'
-                        except:
-                            pass
-                    
-                    # Ensure the image is packed
-                    if not img.packed_file:
-                        img.pack()
-                    
-                    texture_images[map_type] = img
-                    print(f"Loaded texture map: {map_type} - {img.name}")
-                    
-                    # Debug info
-                    print(f"Image size: {img.size[0]}x{img.size[1]}")
-                    print(f"Color space: {img.colorspace_settings.name}")
-                    print(f"File format: {img.file_format}")
-                    print(f"Is packed: {bool(img.packed_file)}")
-
+            texture_images = self._lookup_texture_images(texture_id)
             if not texture_images:
                 return {"error": f"No texture images found for: {texture_id}. Please download the texture first."}
             
-            # Create a new material
-            new_mat_name = f"{texture_id}_material_{object_name}"
-            
-            # Remove any existing material with this name to avoid conflicts
-            existing_mat = bpy.data.materials.get(new_mat_name)
-            if existing_mat:
-                bpy.data.materials.remove(existing_mat)
-            
-            new_mat = bpy.data.materials.new(name=new_mat_name)
-            new_mat.use_nodes = True
-            
-            # Set up the material nodes
-            nodes = new_mat.node_tree.nodes
-            links = new_mat.node_tree.links
-            
-            # Clear default nodes
-            nodes.clear()
-            
-            # Create output node
-            output = nodes.new(type='ShaderNodeOutputMaterial')
-            output.location = (600, 0)
-            
-            # Create principled BSDF node
-            principled = nodes.new(type='ShaderNodeBsdfPrincipled')
-            principled.location = (300, 0)
-            links.new(principled.outputs[0], output.inputs[0])
-            
-            # Add texture nodes based on available maps
-            tex_coord = nodes.new(type='ShaderNodeTexCoord')
-            tex_coord.location = (-800, 0)
-            
-            mapping = nodes.new(type='ShaderNodeMapping')
-            mapping.location = (-600, 0)
-            mapping.vector_type = 'TEXTURE'  # Changed from default 'POINT' to 'TEXTURE'
-            links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
-            
-            # Position offset for texture nodes
-            x_pos = -400
-            y_pos = 300
-            
-            # Connect different texture maps
-            for map_type, image in texture_images.items():
-                tex_node = nodes.new(type='ShaderNodeTexImage')
-                tex_node.location = (x_pos, y_pos)
-                tex_node.image = image
-                
-                # Set color space based on map type
-                if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                    try:
-                        tex_node.image.colorspace_settings.name = 'sRGB'
-                    except:
-                        pass  # Use default if sRGB not available
-                else:
-                    try:
-                        tex_node.image.colorspace_settings.name = 'Non-Color'
-                    except:
-                        pass  # Use default if Non-Color not available
-                
-                links.new(mapping.outputs['Vector'], tex_node.inputs['Vector'])
-                
-                # Connect to appropriate input on Principled BSDF
-                if map_type.lower() in ['color', 'diffuse', 'albedo']:
-                    links.new(tex_node.outputs['Color'], principled.inputs['Base Color'])
-                elif map_type.lower() in ['roughness', 'rough']:
-                    links.new(tex_node.outputs['Color'], principled.inputs['Roughness'])
-                elif map_type.lower() in ['metallic', 'metalness', 'metal']:
-                    links.new(tex_node.outputs['Color'], principled.inputs['Metallic'])
-                elif map_type.lower() in ['normal', 'nor', 'dx', 'gl']:
-                    # Add normal map node
-                    normal_map = nodes.new(type='ShaderNodeNormalMap')
-                    normal_map.location = (x_pos + 200, y_pos)
-                    links.new(tex_node.outputs['Color'], normal_map.inputs['Color'])
-                    links.new(normal_map.outputs['Normal'], principled.inputs['Normal'])
-                elif map_type.lower() in ['displacement', 'disp', 'height']:
-                    # Add displacement node
-                    disp_node = nodes.new(type='ShaderNodeDisplacement')
-                    disp_node.location = (x_pos + 200, y_pos - 200)
-                    disp_node.inputs['Scale'].default_value = 0.1  # Reduce displacement strength
-                    links.new(tex_node.outputs['Color'], disp_node.inputs['Height'])
-                    links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
-                
-                y_pos -= 250
-            
-            # Second pass: Connect nodes with proper handling for special cases
-            texture_nodes = {}
-            
-            # First find all texture nodes and store them by map type
-            for node in nodes:
-                if node.type == 'TEX_IMAGE' and node.image:
-                    for map_type, image in texture_images.items():
-                        if node.image == image:
-                            texture_nodes[map_type] = node
-                            break
-            
-            # Now connect everything using the nodes instead of images
-            # Handle base color (diffuse)
-            for map_name in ['color', 'diffuse', 'albedo']:
-                if map_name in texture_nodes:
-                    links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Base Color'])
-                    print(f"Connected {map_name} to Base Color")
-                    break
-            
-            # Handle roughness
-            for map_name in ['roughness', 'rough']:
-                if map_name in texture_nodes:
-                    links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Roughness'])
-                    print(f"Connected {map_name} to Roughness")
-                    break
-            
-            # Handle metallic
-            for map_name in ['metallic', 'metalness', 'metal']:
-                if map_name in texture_nodes:
-                    links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Metallic'])
-                    print(f"Connected {map_name} to Metallic")
-                    break
-            
-            # Handle normal maps
-            for map_name in ['gl', 'dx', 'nor']:
-                if map_name in texture_nodes:
-                    normal_map_node = nodes.new(type='ShaderNodeNormalMap')
-                    normal_map_node.location = (100, 100)
-                    links.new(texture_nodes[map_name].outputs['Color'], normal_map_node.inputs['Color'])
-                    links.new(normal_map_node.outputs['Normal'], principled.inputs['Normal'])
-                    print(f"Connected {map_name} to Normal")
-                    break
-            
-            # Handle displacement
-            for map_name in ['displacement', 'disp', 'height']:
-                if map_name in texture_nodes:
-                    disp_node = nodes.new(type='ShaderNodeDisplacement')
-                    disp_node.location = (300, -200)
-                    disp_node.inputs['Scale'].default_value = 0.1  # Reduce displacement strength
-                    links.new(texture_nodes[map_name].outputs['Color'], disp_node.inputs['Height'])
-                    links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
-                    print(f"Connected {map_name} to Displacement")
-                    break
-            
-            # Handle ARM texture (Ambient Occlusion, Roughness, Metallic)
-            if 'arm' in texture_nodes:
-                separate_rgb = nodes.new(type='ShaderNodeSeparateRGB')
-                separate_rgb.location = (-200, -100)
-                links.new(texture_nodes['arm'].outputs['Color'], separate_rgb.inputs['Image'])
-                
-                # Connect Roughness (G) if no dedicated roughness map
-                if not any(map_name in texture_nodes for map_name in ['roughness', 'rough']):
-                    links.new(separate_rgb.outputs['G'], principled.inputs['Roughness'])
-                    print("Connected ARM.G to Roughness")
-                
-                # Connect Metallic (B) if no dedicated metallic map
-                if not any(map_name in texture_nodes for map_name in ['metallic', 'metalness', 'metal']):
-                    links.new(separate_rgb.outputs['B'], principled.inputs['Metallic'])
-                    print("Connected ARM.B to Metallic")
-                
-                # For AO (R channel), multiply with base color if we have one
-                base_color_node = None
-                for map_name in ['color', 'diffuse', 'albedo']:
-                    if map_name in texture_nodes:
-                        base_color_node = texture_nodes[map_name]
-                        break
-                
-                if base_color_node:
-                    mix_node = nodes.new(type='ShaderNodeMixRGB')
-                    mix_node.location = (100, 200)
-                    mix_node.blend_type = 'MULTIPLY'
-                    mix_node.inputs['Fac'].default_value = 0.8  # 80% influence
-                    
-                    # Disconnect direct connection to base color
-                    for link in base_color_node.outputs['Color'].links:
-                        if link.to_socket == principled.inputs['Base Color']:
-                            links.remove(link)
-                    
-                    # Connect through the mix node
-                    links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
-                    links.new(separate_rgb.outputs['R'], mix_node.inputs[2])
-                    links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
-                    print("Connected ARM.R to AO mix with Base Color")
-            
-            # Handle AO (Ambient Occlusion) if separate
-            if 'ao' in texture_nodes:
-                base_color_node = None
-                for map_name in ['color', 'diffuse', 'albedo']:
-                    if map_name in texture_nodes:
-                        base_color_node = texture_nodes[map_name]
-                        break
-                
-                if base_color_node:
-                    mix_node = nodes.new(type='ShaderNodeMixRGB')
-                    mix_node.location = (100, 200)
-                    mix_node.blend_type = 'MULTIPLY'
-                    mix_node.inputs['Fac'].default_value = 0.8  # 80% influence
-                    
-                    # Disconnect direct connection to base color
-                    for link in base_color_node.outputs['Color'].links:
-                        if link.to_socket == principled.inputs['Base Color']:
-                            links.remove(link)
-                    
-                    # Connect through the mix node
-                    links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
-                    links.new(texture_nodes['ao'].outputs['Color'], mix_node.inputs[2])
-                    links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
-                    print("Connected AO to mix with Base Color")
+            # Every object using this texture shares one material
+            new_mat, created = self._get_texture_material(texture_id, texture_images)
             
             # CRITICAL: Make sure to clear all existing materials from the object
             while len(obj.data.materials) > 0:
@@ -1078,16 +3916,279 @@ class BlenderMCPServer:
             
             return {
                 "success": True,
-                "message": f"Created new material and applied texture {texture_id} to {object_name}",
+                "message": f"{'Created' if created else 'Reused'} material {new_mat.name} and applied texture {texture_id} to {object_name}",
                 "material": new_mat.name,
                 "maps": texture_maps,
                 "material_info": material_info
             }
             
-        except Exception as e:
-            print(f"Error in set_texture: {str(e)}")
-            traceback.print_exc()
-            return {"error": f"Failed to apply texture: {str(e)}"}
+        except Exception as e:
+            print(f"Error in set_texture: {str(e)}")
+            traceback.print_exc()
+            return {"error": f"Failed to apply texture: {str(e)}"}
+
+    def _register_texture_set(self, texture_id, images):
+        """Record the images of a texture set by map type, forgetting any material built from older images"""
+        self.texture_sets[texture_id] = {
+            "maps": {map_type: image.name for map_type, image in images.items()},
+            "material": None,
+        }
+
+    def _lookup_texture_images(self, texture_id):
+        """Return the images of a downloaded texture, keyed by the map type set_texture connects them by"""
+        texture_set = self.texture_sets.get(texture_id)
+        if texture_set is not None:
+            images = {map_type: bpy.data.images.get(name) for map_type, name in texture_set["maps"].items()}
+            if all(images.values()):
+                return {map_type.split('_')[-1]: image for map_type, image in images.items()}
+        
+        # Not downloaded in this session, or its images were renamed or removed:
+        # index the loaded images once and remember them
+        images = {}
+        prefix = texture_id + "_"
+        for img in bpy.data.images:
+            if img.name.startswith(prefix):
+                map_type = img.name[len(prefix):].split('.')[0]
+                
+                # Ensure proper color space
+                if map_type.split('_')[-1].lower() in ['color', 'diffuse', 'albedo']:
+                    try:
+                        img.colorspace_settings.name = 'sRGB'
+                    except:
+                        pass
+                else:
+                    try:
+                        img.colorspace_settings.name = 'Non-Color'
+                    except:
+                        pass
+                
+                # Ensure the image is packed
+                if not img.packed_file:
+                    img.pack()
+                
+                images[map_type] = img
+                print(f"Indexed texture map: {map_type} - {img.name}")
+        
+        if not images:
+            self.texture_sets.pop(texture_id, None)
+            return {}
+        self._register_texture_set(texture_id, images)
+        return {map_type.split('_')[-1]: image for map_type, image in images.items()}
+
+    def _get_texture_material(self, texture_id, texture_images):
+        """Return the material shared by objects using this texture and whether it had to be built"""
+        texture_set = self.texture_sets[texture_id]
+        name = texture_set["material"] or f"{texture_id}_material"
+        mat = bpy.data.materials.get(name)
+        # Reuse it as long as it still samples exactly this texture set
+        if mat is not None and mat.use_nodes and mat.node_tree and {
+            node.image for node in mat.node_tree.nodes if node.type == 'TEX_IMAGE'
+        } == set(texture_images.values()):
+            texture_set["material"] = mat.name
+            return mat, False
+        
+        mat = self._build_set_texture_material(f"{texture_id}_material", texture_images)
+        texture_set["material"] = mat.name
+        return mat, True
+
+    @staticmethod
+    def _build_set_texture_material(name, texture_images):
+        """Build a Principled BSDF material wired to the given texture maps"""
+        new_mat = bpy.data.materials.new(name=name)
+        new_mat.use_nodes = True
+        
+        # Set up the material nodes
+        nodes = new_mat.node_tree.nodes
+        links = new_mat.node_tree.links
+        
+        # Clear default nodes
+        nodes.clear()
+        
+        # Create output node
+        output = nodes.new(type='ShaderNodeOutputMaterial')
+        output.location = (600, 0)
+        
+        # Create principled BSDF node
+        principled = nodes.new(type='ShaderNodeBsdfPrincipled')
+        principled.location = (300, 0)
+        links.new(principled.outputs[0], output.inputs[0])
+        
+        # Add texture nodes based on available maps
+        tex_coord = nodes.new(type='ShaderNodeTexCoord')
+        tex_coord.location = (-800, 0)
+        
+        mapping = nodes.new(type='ShaderNodeMapping')
+        mapping.location = (-600, 0)
+        mapping.vector_type = 'TEXTURE'  # Changed from default 'POINT' to 'TEXTURE'
+        links.new(tex_coord.outputs['UV'], mapping.inputs['Vector'])
+        
+        # Position offset for texture nodes
+        x_pos = -400
+        y_pos = 300
+        
+        # Connect different texture maps
+        for map_type, image in texture_images.items():
+            tex_node = nodes.new(type='ShaderNodeTexImage')
+            tex_node.location = (x_pos, y_pos)
+            tex_node.image = image
+            
+            # Set color space based on map type
+            if map_type.lower() in ['color', 'diffuse', 'albedo']:
+                try:
+                    tex_node.image.colorspace_settings.name = 'sRGB'
+                except:
+                    pass  # Use default if sRGB not available
+            else:
+                try:
+                    tex_node.image.colorspace_settings.name = 'Non-Color'
+                except:
+                    pass  # Use default if Non-Color not available
+            
+            links.new(mapping.outputs['Vector'], tex_node.inputs['Vector'])
+            
+            # Connect to appropriate input on Principled BSDF
+            if map_type.lower() in ['color', 'diffuse', 'albedo']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Base Color'])
+            elif map_type.lower() in ['roughness', 'rough']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Roughness'])
+            elif map_type.lower() in ['metallic', 'metalness', 'metal']:
+                links.new(tex_node.outputs['Color'], principled.inputs['Metallic'])
+            elif map_type.lower() in ['normal', 'nor', 'dx', 'gl']:
+                # Add normal map node
+                normal_map = nodes.new(type='ShaderNodeNormalMap')
+                normal_map.location = (x_pos + 200, y_pos)
+                links.new(tex_node.outputs['Color'], normal_map.inputs['Color'])
+                links.new(normal_map.outputs['Normal'], principled.inputs['Normal'])
+            elif map_type.lower() in ['displacement', 'disp', 'height']:
+                # Add displacement node
+                disp_node = nodes.new(type='ShaderNodeDisplacement')
+                disp_node.location = (x_pos + 200, y_pos - 200)
+                disp_node.inputs['Scale'].default_value = 0.1  # Reduce displacement strength
+                links.new(tex_node.outputs['Color'], disp_node.inputs['Height'])
+                links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
+            
+            y_pos -= 250
+        
+        # Second pass: Connect nodes with proper handling for special cases
+        texture_nodes = {}
+        
+        # First find all texture nodes and store them by map type
+        for node in nodes:
+            if node.type == 'TEX_IMAGE' and node.image:
+                for map_type, image in texture_images.items():
+                    if node.image == image:
+                        texture_nodes[map_type] = node
+                        break
+        
+        # Now connect everything using the nodes instead of images
+        # Handle base color (diffuse)
+        for map_name in ['color', 'diffuse', 'albedo']:
+            if map_name in texture_nodes:
+                links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Base Color'])
+                print(f"Connected {map_name} to Base Color")
+                break
+        
+        # Handle roughness
+        for map_name in ['roughness', 'rough']:
+            if map_name in texture_nodes:
+                links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Roughness'])
+                print(f"Connected {map_name} to Roughness")
+                break
+        
+        # Handle metallic
+        for map_name in ['metallic', 'metalness', 'metal']:
+            if map_name in texture_nodes:
+                links.new(texture_nodes[map_name].outputs['Color'], principled.inputs['Metallic'])
+                print(f"Connected {map_name} to Metallic")
+                break
+        
+        # Handle normal maps
+        for map_name in ['gl', 'dx', 'nor']:
+            if map_name in texture_nodes:
+                normal_map_node = nodes.new(type='ShaderNodeNormalMap')
+                normal_map_node.location = (100, 100)
+                links.new(texture_nodes[map_name].outputs['Color'], normal_map_node.inputs['Color'])
+                links.new(normal_map_node.outputs['Normal'], principled.inputs['Normal'])
+                print(f"Connected {map_name} to Normal")
+                break
+        
+        # Handle displacement
+        for map_name in ['displacement', 'disp', 'height']:
+            if map_name in texture_nodes:
+                disp_node = nodes.new(type='ShaderNodeDisplacement')
+                disp_node.location = (300, -200)
+                disp_node.inputs['Scale'].default_value = 0.1  # Reduce displacement strength
+                links.new(texture_nodes[map_name].outputs['Color'], disp_node.inputs['Height'])
+                links.new(disp_node.outputs['Displacement'], output.inputs['Displacement'])
+                print(f"Connected {map_name} to Displacement")
+                break
+        
+        # Handle ARM texture (Ambient Occlusion, Roughness, Metallic)
+        if 'arm' in texture_nodes:
+            separate_rgb = nodes.new(type='ShaderNodeSeparateRGB')
+            separate_rgb.location = (-200, -100)
+            links.new(texture_nodes['arm'].outputs['Color'], separate_rgb.inputs['Image'])
+            
+            # Connect Roughness (G) if no dedicated roughness map
+            if not any(map_name in texture_nodes for map_name in ['roughness', 'rough']):
+                links.new(separate_rgb.outputs['G'], principled.inputs['Roughness'])
+                print("Connected ARM.G to Roughness")
+            
+            # Connect Metallic (B) if no dedicated metallic map
+            if not any(map_name in texture_nodes for map_name in ['metallic', 'metalness', 'metal']):
+                links.new(separate_rgb.outputs['B'], principled.inputs['Metallic'])
+                print("Connected ARM.B to Metallic")
+            
+            # For AO (R channel), multiply with base color if we have one
+            base_color_node = None
+            for map_name in ['color', 'diffuse', 'albedo']:
+                if map_name in texture_nodes:
+                    base_color_node = texture_nodes[map_name]
+                    break
+            
+            if base_color_node:
+                mix_node = nodes.new(type='ShaderNodeMixRGB')
+                mix_node.location = (100, 200)
+                mix_node.blend_type = 'MULTIPLY'
+                mix_node.inputs['Fac'].default_value = 0.8  # 80% influence
+                
+                # Disconnect direct connection to base color
+                for link in base_color_node.outputs['Color'].links:
+                    if link.to_socket == principled.inputs['Base Color']:
+                        links.remove(link)
+                
+                # Connect through the mix node
+                links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
+                links.new(separate_rgb.outputs['R'], mix_node.inputs[2])
+                links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
+                print("Connected ARM.R to AO mix with Base Color")
+        
+        # Handle AO (Ambient Occlusion) if separate
+        if 'ao' in texture_nodes:
+            base_color_node = None
+            for map_name in ['color', 'diffuse', 'albedo']:
+                if map_name in texture_nodes:
+                    base_color_node = texture_nodes[map_name]
+                    break
+            
+            if base_color_node:
+                mix_node = nodes.new(type='ShaderNodeMixRGB')
+                mix_node.location = (100, 200)
+                mix_node.blend_type = 'MULTIPLY'
+                mix_node.inputs['Fac'].default_value = 0.8  # 80% influence
+                
+                # Disconnect direct connection to base color
+                for link in base_color_node.outputs['Color'].links:
+                    if link.to_socket == principled.inputs['Base Color']:
+                        links.remove(link)
+                
+                # Connect through the mix node
+                links.new(base_color_node.outputs['Color'], mix_node.inputs[1])
+                links.new(texture_nodes['ao'].outputs['Color'], mix_node.inputs[2])
+                links.new(mix_node.outputs['Color'], principled.inputs['Base Color'])
+                print("Connected AO to mix with Base Color")
+        
+        return new_mat
 
     def get_polyhaven_status(self):
         """Get the current status of PolyHaven integration"""
@@ -1134,7 +4235,7 @@ class BlenderMCPServer:
             }
 
     def create_rodin_job(self, *args, **kwargs):
-        match bpy.context.scene.blendermcp_hyper3d_mode:
+        match self.settings["hyper3d_mode"]:
             case "MAIN_SITE":
                 return self.create_rodin_job_main_site(*args, **kwargs)
             case "FAL_AI":
@@ -1161,10 +4262,10 @@ class BlenderMCPServer:
                 files.append(("prompt", (None, text_prompt)))
             if bbox_condition:
                 files.append(("bbox_condition", (None, json.dumps(bbox_condition))))
-            response = requests.post(
-                "https://hyperhuman.deemos.com/api/v2/rodin",
+            response = self.http["hyper3d"].post(
+                "/api/v2/rodin",
                 headers={
-                    "Authorization": f"Bearer {bpy.context.scene.blendermcp_hyper3d_api_key}",
+                    "Authorization": f"Bearer {self.settings['hyper3d_api_key']}",
                 },
                 files=files
             )
@@ -1189,10 +4290,10 @@ class BlenderMCPServer:
                 req_data["prompt"] = text_prompt
             if bbox_condition:
                 req_data["bbox_condition"] = bbox_condition
-            response = requests.post(
-                "https://queue.fal.run/fal-ai/hyper3d/rodin",
+            response = self.http["fal_ai"].post(
+                "/fal-ai/hyper3d/rodin",
                 headers={
-                    "Authorization": f"Key {bpy.context.scene.blendermcp_hyper3d_api_key}",
+                    "Authorization": f"Key {self.settings['hyper3d_api_key']}",
                     "Content-Type": "application/json",
                 },
                 json=req_data
@@ -1203,7 +4304,7 @@ class BlenderMCPServer:
             return {"error": str(e)}
 
     def poll_rodin_job_status(self, *args, **kwargs):
-        match bpy.context.scene.blendermcp_hyper3d_mode:
+        match self.settings["hyper3d_mode"]:
             case "MAIN_SITE":
                 return self.poll_rodin_job_status_main_site(*args, **kwargs)
             case "FAL_AI":
@@ -1213,10 +4314,10 @@ class BlenderMCPServer:
 
     def poll_rodin_job_status_main_site(self, subscription_key: str):
         """Call the job status API to get the job status"""
-        response = requests.post(
-            "https://hyperhuman.deemos.com/api/v2/status",
+        response = self.http["hyper3d"].post(
+            "/api/v2/status",
             headers={
-                "Authorization": f"Bearer {bpy.context.scene.blendermcp_hyper3d_api_key}",
+                "Authorization": f"Bearer {self.settings['hyper3d_api_key']}",
             },
             json={
                 "subscription_key": subscription_key,
@@ -1229,15 +4330,195 @@ class BlenderMCPServer:
     
     def poll_rodin_job_status_fal_ai(self, request_id: str):
         """Call the job status API to get the job status"""
-        response = requests.get(
-            f"https://queue.fal.run/fal-ai/hyper3d/requests/{request_id}/status",
+        response = self.http["fal_ai"].get(
+            f"/fal-ai/hyper3d/requests/{request_id}/status",
             headers={
-                "Authorization": f"KEY {bpy.context.scene.blendermcp_hyper3d_api_key}",
+                "Authorization": f"KEY {self.settings['hyper3d_api_key']}",
             },
         )
         data = response.json()
         return data
 
+    # Polling starts fast and slows down while a job's status stays the same
+    RODIN_POLL_INTERVAL = 2.0
+    RODIN_MAX_POLL_INTERVAL = 15.0
+    RODIN_POLL_BACKOFF = 1.5
+    RODIN_MAX_WAIT = 1800
+
+    def wait_for_rodin_job(
+            self,
+            subscription_key: str=None,
+            request_id: str=None,
+            task_uuid: str=None,
+            timeout: float=600,
+            import_name: str=None,
+        ):
+        """
+        Poll a Rodin job until it finishes, fails or timeout seconds pass.
+        
+        Returns a Future of the result. The polling runs on a thread of its own
+        rather than a worker, since it can take up to RODIN_MAX_WAIT and the
+        worker pool is shared by every background command. Each status change is
+        reported as progress. When import_name is given, a finished job's model
+        is imported under that name (MAIN_SITE needs task_uuid for this, FAL_AI
+        uses request_id).
+        """
+        mode = self.settings["hyper3d_mode"]
+        if mode == "MAIN_SITE" and not subscription_key:
+            return {"error": "subscription_key is required in MAIN_SITE mode"}
+        if mode == "FAL_AI" and not request_id:
+            return {"error": "request_id is required in FAL_AI mode"}
+        if mode not in ("MAIN_SITE", "FAL_AI"):
+            return {"error": "Unknown Hyper3D Rodin mode!"}
+        
+        future = Future()
+        progress_callback = getattr(self._progress, "callback", None)
+        
+        def wait():
+            if not future.set_running_or_notify_cancel():
+                return
+            self._progress.callback = progress_callback
+            try:
+                future.set_result(self._wait_for_rodin_job(mode, subscription_key, request_id, task_uuid, timeout, import_name))
+            except Exception as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=wait, name="BlenderMCPRodinWait", daemon=True).start()
+        return future
+    
+    def _wait_for_rodin_job(self, mode, subscription_key, request_id, task_uuid, timeout, import_name):
+        """Polling loop of wait_for_rodin_job, run on its own thread"""
+        timeout = min(max(float(timeout), 0.0), self.RODIN_MAX_WAIT)
+        started = time.monotonic()
+        deadline = started + timeout
+        interval = self.RODIN_POLL_INTERVAL
+        polls = 0
+        state, status, last_status = "pending", None, None
+        while self.running:
+            polls += 1
+            try:
+                if mode == "MAIN_SITE":
+                    status = self.poll_rodin_job_status_main_site(subscription_key)
+                    state, done, total, message = self._rodin_main_site_progress(status)
+                else:
+                    status = self.poll_rodin_job_status_fal_ai(request_id)
+                    state, done, total, message = self._rodin_fal_ai_progress(status)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                # The provider client already retried, keep waiting until the deadline
+                print(f"Polling Rodin job failed: {str(e)}")
+            except (KeyError, TypeError) as e:
+                # A response without a status, e.g. a rejected API key, won't change by waiting
+                return {"error": f"Unexpected Rodin status response, missing {str(e)}", "polls": polls}
+            else:
+                if status != last_status:
+                    self.report_progress(done, total, message)
+                    interval = self.RODIN_POLL_INTERVAL
+                    last_status = status
+                else:
+                    interval = min(interval * self.RODIN_POLL_BACKOFF, self.RODIN_MAX_POLL_INTERVAL)
+                if state != "pending":
+                    break
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            time.sleep(min(interval, remaining))
+        
+        result = {
+            "status": state if state != "pending" else "timeout",
+            "job_status": last_status,
+            "polls": polls,
+            "elapsed_seconds": round(time.monotonic() - started, 1),
+        }
+        if state == "done" and import_name:
+            if mode == "MAIN_SITE" and not task_uuid:
+                result["import"] = {"succeed": False, "error": "task_uuid is required to import in MAIN_SITE mode"}
+            elif mode == "MAIN_SITE":
+                self.report_progress(0, None, "Importing generated model")
+                result["import"] = self.import_generated_asset_main_site(task_uuid=task_uuid, name=import_name)
+            else:
+                self.report_progress(0, None, "Importing generated model")
+                result["import"] = self.import_generated_asset_fal_ai(request_id=request_id, name=import_name)
+        return result
+
+    def submit_rodin_batch(self, jobs, max_concurrent=3, auto_import=True):
+        """
+        Queue several Rodin generations at once.
+        
+        Each job is {name, text_prompt, images, bbox_condition} like create_rodin_job.
+        Jobs are submitted and polled in the background and, with auto_import,
+        imported as each one finishes. Returns the batch status.
+        """
+        if self.settings["hyper3d_mode"] not in ("MAIN_SITE", "FAL_AI"):
+            return {"error": "Unknown Hyper3D Rodin mode!"}
+        if not jobs:
+            return {"error": "No jobs given"}
+        for i, job in enumerate(jobs):
+            if not job.get("text_prompt") and not job.get("images"):
+                return {"error": f"Job {i} has neither a text prompt nor images"}
+        batch_id = self.rodin_queue.submit(jobs, max_concurrent, auto_import)
+        return self.rodin_queue.status(batch_id)
+
+    def get_rodin_batch_status(self, batch_id=None, wait=0):
+        """
+        Status of every job in a batch, or a summary of all batches without batch_id.
+        
+        With wait, returns a Future that resolves once the batch finishes or
+        that many seconds pass, reporting progress as its jobs complete.
+        """
+        if batch_id is None:
+            statuses = [self.rodin_queue.status(i) for i in self.rodin_queue.batch_ids()]
+            return {"batches": [
+                {"batch_id": s["batch_id"], "finished": s["finished"], "counts": s["counts"]} for s in statuses
+            ]}
+        
+        def found(status):
+            return status if status is not None else {"error": f"Unknown Rodin batch: {batch_id}"}
+        
+        if not wait:
+            return found(self.rodin_queue.status(batch_id))
+        
+        # Progress is reported from the scheduler thread, after this handler returned
+        progress_callback = getattr(self._progress, "callback", None)
+        reported = {}
+        
+        def on_change(status):
+            if progress_callback and status["counts"] != reported:
+                reported.clear()
+                reported.update(status["counts"])
+                finished = sum(status["counts"].get(state, 0) for state in RodinJobQueue.FINISHED_STATES)
+                summary = ", ".join(f"{count} {state}" for state, count in sorted(status["counts"].items()))
+                progress_callback(finished, len(status["jobs"]), f"Rodin batch: {summary}")
+        
+        watching = self.rodin_queue.watch(batch_id, min(float(wait), self.RODIN_MAX_WAIT), on_change)
+        return self._map_future(watching, found)
+
+    @staticmethod
+    def _rodin_main_site_progress(status):
+        """Classify a MAIN_SITE status response as (state, jobs done, jobs, message)"""
+        status_list = status["status_list"]
+        done = sum(1 for s in status_list if s == "Done")
+        if any(s in ("Failed", "Canceled") for s in status_list):
+            state = "failed"
+        elif status_list and done == len(status_list):
+            state = "done"
+        else:
+            state = "pending"
+        return state, done, len(status_list), f"Rodin jobs: {', '.join(status_list)}"
+
+    @staticmethod
+    def _rodin_fal_ai_progress(status):
+        """Classify a FAL_AI status response as (state, done, total, message)"""
+        job_status = status["status"]
+        if job_status == "COMPLETED":
+            return "done", 1, 1, "Rodin job completed"
+        if job_status in ("IN_QUEUE", "IN_PROGRESS"):
+            message = f"Rodin job {job_status.lower().replace('_', ' ')}"
+            if status.get("queue_position") is not None:
+                message += f", queue position {status['queue_position']}"
+            return "pending", 0, 1, message
+        return "failed", 0, 1, f"Rodin job {job_status}"
+
     @staticmethod
     def _clean_imported_glb(filepath, mesh_name=None):
         # Get the set of existing objects before import
@@ -1305,8 +4586,29 @@ class BlenderMCPServer:
 
         return mesh_obj
 
+    @classmethod
+    def _import_generated_glb(cls, filepath, name):
+        """Import a generated GLB on the main thread and describe the resulting object"""
+        obj = cls._clean_imported_glb(
+            filepath=filepath,
+            mesh_name=name
+        )
+        result = {
+            "name": obj.name,
+            "type": obj.type,
+            "location": [obj.location.x, obj.location.y, obj.location.z],
+            "rotation": [obj.rotation_euler.x, obj.rotation_euler.y, obj.rotation_euler.z],
+            "scale": [obj.scale.x, obj.scale.y, obj.scale.z],
+        }
+
+        if obj.type == "MESH":
+            bounding_box = cls._get_aabb(obj)
+            result["world_bounding_box"] = bounding_box
+        
+        return result
+
     def import_generated_asset(self, *args, **kwargs):
-        match bpy.context.scene.blendermcp_hyper3d_mode:
+        match self.settings["hyper3d_mode"]:
             case "MAIN_SITE":
                 return self.import_generated_asset_main_site(*args, **kwargs)
             case "FAL_AI":
@@ -1316,134 +4618,191 @@ class BlenderMCPServer:
 
     def import_generated_asset_main_site(self, task_uuid: str, name: str):
         """Fetch the generated asset, import into blender"""
-        response = requests.post(
-            "https://hyperhuman.deemos.com/api/v2/download",
+        key = AssetCache.make_key("hyper3d", task_uuid, file_format="glb")
+        try:
+            entry = self.asset_cache.fetch(
+                key, lambda staging_dir: self._download_rodin_main_site(task_uuid, staging_dir), pin=True
+            )
+        except Exception as e:
+            return {"succeed": False, "error": str(e)}
+
+        try:
+            filepath = os.path.join(entry["path"], entry["meta"]["file"])
+            result = self.run_in_main_thread(self._import_generated_glb, filepath, name)
+            return {
+                "succeed": True, **result
+            }
+        except Exception as e:
+            return {"succeed": False, "error": str(e)}
+        finally:
+            self.asset_cache.release(key)
+
+    def _download_rodin_main_site(self, task_uuid, staging_dir):
+        """Download the GLB of a finished task into staging_dir, returns the cache entry metadata"""
+        response = self.http["hyper3d"].post(
+            "/api/v2/download",
             headers={
-                "Authorization": f"Bearer {bpy.context.scene.blendermcp_hyper3d_api_key}",
+                "Authorization": f"Bearer {self.settings['hyper3d_api_key']}",
             },
             json={
                 'task_uuid': task_uuid
             }
         )
         data_ = response.json()
-        temp_file = None
         for i in data_["list"]:
             if i["name"].endswith(".glb"):
-                temp_file = tempfile.NamedTemporaryFile(
-                    delete=False,
-                    prefix=task_uuid,
-                    suffix=".glb",
-                )
+                filename = f"{task_uuid}.glb"
+                self._download_glb(self.http["hyper3d"], i["url"], os.path.join(staging_dir, filename))
+                return {"file": filename}
+        raise AssetDownloadError("Generation failed. Please first make sure that all jobs of the task are done and then try again later.")
     
-                try:
-                    # Download the content
-                    response = requests.get(i["url"], stream=True)
-                    response.raise_for_status()  # Raise an exception for HTTP errors
-                    
-                    # Write the content to the temporary file
-                    for chunk in response.iter_content(chunk_size=8192):
-                        temp_file.write(chunk)
-                        
-                    # Close the file
-                    temp_file.close()
-                    
-                except Exception as e:
-                    # Clean up the file if there's an error
-                    temp_file.close()
-                    os.unlink(temp_file.name)
-                    return {"succeed": False, "error": str(e)}
-                
-                break
-        else:
-            return {"succeed": False, "error": "Generation failed. Please first make sure that all jobs of the task are done and then try again later."}
-
+    def import_generated_asset_fal_ai(self, request_id: str, name: str):
+        """Fetch the generated asset, import into blender"""
+        key = AssetCache.make_key("hyper3d_fal", request_id, file_format="glb")
         try:
-            obj = self._clean_imported_glb(
-                filepath=temp_file.name,
-                mesh_name=name
+            entry = self.asset_cache.fetch(
+                key, lambda staging_dir: self._download_rodin_fal_ai(request_id, staging_dir), pin=True
             )
-            result = {
-                "name": obj.name,
-                "type": obj.type,
-                "location": [obj.location.x, obj.location.y, obj.location.z],
-                "rotation": [obj.rotation_euler.x, obj.rotation_euler.y, obj.rotation_euler.z],
-                "scale": [obj.scale.x, obj.scale.y, obj.scale.z],
-            }
+        except Exception as e:
+            return {"succeed": False, "error": str(e)}
 
-            if obj.type == "MESH":
-                bounding_box = self._get_aabb(obj)
-                result["world_bounding_box"] = bounding_box
-            
+        try:
+            filepath = os.path.join(entry["path"], entry["meta"]["file"])
+            result = self.run_in_main_thread(self._import_generated_glb, filepath, name)
             return {
                 "succeed": True, **result
             }
         except Exception as e:
             return {"succeed": False, "error": str(e)}
-    
-    def import_generated_asset_fal_ai(self, request_id: str, name: str):
-        """Fetch the generated asset, import into blender"""
-        response = requests.get(
-            f"https://queue.fal.run/fal-ai/hyper3d/requests/{request_id}",
+        finally:
+            self.asset_cache.release(key)
+
+    def _download_rodin_fal_ai(self, request_id, staging_dir):
+        """Download the GLB of a finished request into staging_dir, returns the cache entry metadata"""
+        response = self.http["fal_ai"].get(
+            f"/fal-ai/hyper3d/requests/{request_id}",
             headers={
-                "Authorization": f"Key {bpy.context.scene.blendermcp_hyper3d_api_key}",
+                "Authorization": f"Key {self.settings['hyper3d_api_key']}",
             }
         )
         data_ = response.json()
-        temp_file = None
-        
-        temp_file = tempfile.NamedTemporaryFile(
-            delete=False,
-            prefix=request_id,
-            suffix=".glb",
+        filename = f"{request_id}.glb"
+        self._download_glb(self.http["fal_ai"], data_["model_mesh"]["url"], os.path.join(staging_dir, filename))
+        return {"file": filename}
+
+    def _download_glb(self, client, url, filepath):
+        self._download_file(
+            client, url, filepath,
+            lambda received, total: self.report_progress(received, total, "Downloading generated model")
         )
+    #endregion
 
-        try:
-            # Download the content
-            response = requests.get(data_["model_mesh"]["url"], stream=True)
-            response.raise_for_status()  # Raise an exception for HTTP errors
-            
-            # Write the content to the temporary file
-            for chunk in response.iter_content(chunk_size=8192):
-                temp_file.write(chunk)
-                
-            # Close the file
-            temp_file.close()
-            
-        except Exception as e:
-            # Clean up the file if there's an error
-            temp_file.close()
-            os.unlink(temp_file.name)
-            return {"succeed": False, "error": str(e)}
+    def get_asset_cache_status(self):
+        """Report the location, size and hit rate of the downloaded asset cache"""
+        self._refresh_settings()
+        return self.asset_cache.stats()
 
+    def dedupe_images(self, dry_run=False):
+        """
+        Merge images loaded from identical bytes into one datablock.
+        
+        Images only count as duplicates when their color space and alpha mode match
+        too. Users of the removed images are remapped to the kept one, preferring
+        packed images, then ones this addon loaded, then the one with the most users.
+        """
+        # Only images whose sizes collide need hashing
+        candidates = {}
+        scanned = 0
+        for image in bpy.data.images:
+            if image.source != 'FILE':
+                continue
+            size = self._image_source_size(image)
+            if size is None:
+                continue
+            scanned += 1
+            candidates.setdefault((size, image.colorspace_settings.name, image.alpha_mode), []).append(image)
+        
+        groups = {}
+        for (size, colorspace, alpha_mode), images in candidates.items():
+            if len(images) < 2:
+                continue
+            for image in images:
+                digest = self._image_content_hash(image)
+                if digest is not None:
+                    groups.setdefault((digest, colorspace, alpha_mode), []).append(image)
+        
+        merged = []
+        replacements = {}
+        removed = 0
+        bytes_reclaimed = 0
+        for (digest, colorspace, _alpha_mode), images in groups.items():
+            if len(images) < 2:
+                continue
+            images.sort(key=lambda image: (
+                image.packed_file is None, self.IMAGE_HASH_PROPERTY not in image, -image.users, image.name
+            ))
+            keep, duplicates = images[0], images[1:]
+            merged.append({"kept": keep.name, "removed": [image.name for image in duplicates], "colorspace": colorspace})
+            for image in duplicates:
+                if image.packed_file:
+                    bytes_reclaimed += image.packed_file.size
+                replacements[image.name] = keep.name
+                removed += 1
+                if not dry_run:
+                    image.user_remap(keep)
+                    bpy.data.images.remove(image)
+            if not dry_run and keep.packed_file:
+                keep[self.IMAGE_HASH_PROPERTY] = digest
+        
+        if merged and not dry_run:
+            self.image_hashes = None
+            # Keep set_texture's registry pointing at images that still exist
+            for texture_set in self.texture_sets.values():
+                texture_set["maps"] = {
+                    map_type: replacements.get(name, name) for map_type, name in texture_set["maps"].items()
+                }
+        
+        return {
+            "success": True,
+            "dry_run": dry_run,
+            "images_scanned": scanned,
+            "images_removed": removed,
+            "bytes_reclaimed": bytes_reclaimed,
+            "groups": merged,
+        }
+
+    @staticmethod
+    def _image_source_size(image):
+        """Size of the packed bytes or file behind an image, or None if it has neither"""
+        if image.packed_file:
+            return image.packed_file.size
         try:
-            obj = self._clean_imported_glb(
-                filepath=temp_file.name,
-                mesh_name=name
-            )
-            result = {
-                "name": obj.name,
-                "type": obj.type,
-                "location": [obj.location.x, obj.location.y, obj.location.z],
-                "rotation": [obj.rotation_euler.x, obj.rotation_euler.y, obj.rotation_euler.z],
-                "scale": [obj.scale.x, obj.scale.y, obj.scale.z],
-            }
+            return os.path.getsize(bpy.path.abspath(image.filepath))
+        except OSError:
+            return None
 
-            if obj.type == "MESH":
-                bounding_box = self._get_aabb(obj)
-                result["world_bounding_box"] = bounding_box
-            
-            return {
-                "succeed": True, **result
-            }
-        except Exception as e:
-            return {"succeed": False, "error": str(e)}
-    #endregion
+    @staticmethod
+    def _image_content_hash(image):
+        if image.packed_file:
+            return hashlib.sha256(image.packed_file.data).hexdigest()
+        try:
+            return AssetCache._hash_file(bpy.path.abspath(image.filepath))["sha256"]
+        except OSError:
+            return None
 
     #region Sketchfab API
     def get_sketchfab_status(self):
         """Get the current status of Sketchfab integration"""
-        enabled = bpy.context.scene.blendermcp_use_sketchfab
-        api_key = bpy.context.scene.blendermcp_sketchfab_api_key
+        status = self._check_sketchfab_account()
+        status["cache"] = {
+            "search": self.sketchfab_search_cache.stats(),
+            "models": self.sketchfab_model_cache.stats(),
+        }
+        return status
+    
+    def _check_sketchfab_account(self):
+        enabled = self.settings["use_sketchfab"]
+        api_key = self.settings["sketchfab_api_key"]
         
         # Test the API key if present
         if api_key:
@@ -1452,8 +4811,8 @@ class BlenderMCPServer:
                     "Authorization": f"Token {api_key}"
                 }
                 
-                response = requests.get(
-                    "https://api.sketchfab.com/v3/me",
+                response = self.http["sketchfab"].get(
+                    "/v3/me",
                     headers=headers,
                     timeout=30  # Add timeout of 30 seconds
                 )
@@ -1502,58 +4861,110 @@ class BlenderMCPServer:
                             4. Restart the connection to Claude"""
             }
     
-    def search_sketchfab_models(self, query, categories=None, count=20, downloadable=True):
+    def search_sketchfab_models(self, query, categories=None, count=20, downloadable=True, known_cache_key=None):
         """Search for models on Sketchfab based on query and optional filters"""
         try:
-            api_key = bpy.context.scene.blendermcp_sketchfab_api_key
+            api_key = self.settings["sketchfab_api_key"]
             if not api_key:
                 return {"error": "Sketchfab API key is not configured"}
                 
-            # Build search parameters with exact fields from Sketchfab API docs
+            # Build search parameters with exact fields from Sketchfab API docs.
+            # Normalized so that trivially different queries share a cache entry.
             params = {
                 "type": "models",
-                "q": query,
-                "count": count,
-                "downloadable": downloadable,
+                "q": " ".join(query.lower().split()),
+                "count": int(count),
+                "downloadable": bool(downloadable),
                 "archives_flavours": False
             }
             
             if categories:
-                params["categories"] = categories
-                
-            # Make API request to Sketchfab search endpoint
-            # The proper format according to Sketchfab API docs for API key auth
-            headers = {
-                "Authorization": f"Token {api_key}"
-            }
+                params["categories"] = ",".join(sorted(
+                    category.strip().lower() for category in categories.split(",") if category.strip()
+                ))
             
-            
-            # Use the search endpoint as specified in the API documentation
-            response = requests.get(
-                "https://api.sketchfab.com/v3/search",
-                headers=headers,
-                params=params,
-                timeout=30  # Add timeout of 30 seconds
+            response_data = self.sketchfab_search_cache.get_or_fetch(
+                ResponseCache.make_key(api_key, params),
+                lambda: self._fetch_sketchfab_search(api_key, params),
+                cacheable=lambda response: "error" not in response,
             )
+            if known_cache_key and response_data.get("cache_key") == known_cache_key:
+                # The client already has these results
+                return {"cache_key": known_cache_key, "not_modified": True}
+            return response_data
+        
+        except requests.exceptions.Timeout:
+            return {"error": "Request timed out. Check your internet connection."}
+        except json.JSONDecodeError as e:
+            return {"error": f"Invalid JSON response from Sketchfab API: {str(e)}"}
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return {"error": str(e)}
+
+    def _fetch_sketchfab_search(self, api_key, params):
+        # Make API request to Sketchfab search endpoint
+        # The proper format according to Sketchfab API docs for API key auth
+        headers = {
+            "Authorization": f"Token {api_key}"
+        }
+        
+        # Use the search endpoint as specified in the API documentation
+        response = self.http["sketchfab"].get(
+            "/v3/search",
+            headers=headers,
+            params=params,
+            timeout=30  # Add timeout of 30 seconds
+        )
+        
+        if response.status_code == 401:
+            return {"error": "Authentication failed (401). Check your API key."}
             
-            if response.status_code == 401:
-                return {"error": "Authentication failed (401). Check your API key."}
-                
-            if response.status_code != 200:
-                return {"error": f"API request failed with status code {response.status_code}"}
-                
-            response_data = response.json()
+        if response.status_code != 200:
+            return {"error": f"API request failed with status code {response.status_code}"}
             
-            # Safety check on the response structure
-            if response_data is None:
-                return {"error": "Received empty response from Sketchfab API"}
-                
-            # Handle 'results' potentially missing from response
-            results = response_data.get("results", [])
-            if not isinstance(results, list):
-                return {"error": f"Unexpected response format from Sketchfab API: {response_data}"}
-                
-            return response_data
+        response_data = response.json()
+        
+        # Safety check on the response structure
+        if response_data is None:
+            return {"error": "Received empty response from Sketchfab API"}
+            
+        # Handle 'results' potentially missing from response
+        results = response_data.get("results", [])
+        if not isinstance(results, list):
+            return {"error": f"Unexpected response format from Sketchfab API: {response_data}"}
+            
+        return response_data
+
+    def get_sketchfab_model_details(self, uid, known_cache_key=None):
+        """Get the metadata of a Sketchfab model: author, license, face count, archives"""
+        try:
+            api_key = self.settings["sketchfab_api_key"]
+            if not api_key:
+                return {"error": "Sketchfab API key is not configured"}
+            
+            def fetch():
+                response = self.http["sketchfab"].get(
+                    f"/v3/models/{uid}",
+                    headers={"Authorization": f"Token {api_key}"},
+                    timeout=30
+                )
+                if response.status_code == 401:
+                    return {"error": "Authentication failed (401). Check your API key."}
+                if response.status_code == 404:
+                    return {"error": f"Model not found: {uid}"}
+                if response.status_code != 200:
+                    return {"error": f"API request failed with status code {response.status_code}"}
+                return response.json()
+            
+            model = self.sketchfab_model_cache.get_or_fetch(
+                ResponseCache.make_key(api_key, uid),
+                fetch,
+                cacheable=lambda response: "error" not in response,
+            )
+            if known_cache_key and model.get("cache_key") == known_cache_key:
+                return {"cache_key": known_cache_key, "not_modified": True}
+            return model
         
         except requests.exceptions.Timeout:
             return {"error": "Request timed out. Check your internet connection."}
@@ -1567,58 +4978,143 @@ class BlenderMCPServer:
     def download_sketchfab_model(self, uid):
         """Download a model from Sketchfab by its UID"""
         try:
-            api_key = bpy.context.scene.blendermcp_sketchfab_api_key
+            api_key = self.settings["sketchfab_api_key"]
             if not api_key:
                 return {"error": "Sketchfab API key is not configured"}
-                
-            # Use proper authorization header for API key auth
-            headers = {
-                "Authorization": f"Token {api_key}"
-            }
             
-            # Request download URL using the exact endpoint from the documentation
-            download_endpoint = f"https://api.sketchfab.com/v3/models/{uid}/download"
+            # Cached models are imported without touching the network
+            key = AssetCache.make_key("sketchfab", uid, file_format="gltf")
+            try:
+                entry = self.asset_cache.fetch(
+                    key, lambda staging_dir: self._download_sketchfab_archive(uid, api_key, staging_dir), pin=True
+                )
+            except AssetDownloadError as e:
+                return {"error": str(e)}
             
-            response = requests.get(
-                download_endpoint,
-                headers=headers,
-                timeout=30  # Add timeout of 30 seconds
-            )
+            main_file = os.path.join(entry["path"], entry["meta"]["main_file"])
             
-            if response.status_code == 401:
-                return {"error": "Authentication failed (401). Check your API key."}
-                
-            if response.status_code != 200:
-                return {"error": f"Download request failed with status code {response.status_code}"}
-                
-            data = response.json()
+            # Import the model on the main thread
+            try:
+                imported_objects = self.run_in_main_thread(self._import_model_file, main_file, "gltf")
+            finally:
+                self.asset_cache.release(key)
             
-            # Safety check for None data
-            if data is None:
-                return {"error": "Received empty response from Sketchfab API for download request"}
-                
-            # Extract download URL with safety checks
-            gltf_data = data.get("gltf")
-            if not gltf_data:
-                return {"error": "No gltf download URL available for this model. Response: " + str(data)}
-                
-            download_url = gltf_data.get("url")
-            if not download_url:
-                return {"error": "No download URL available for this model. Make sure the model is downloadable and you have access."}
-                
-            # Download the model (already has timeout)
-            model_response = requests.get(download_url, timeout=60)  # 60 second timeout
+            return {
+                "success": True,
+                "message": "Model imported successfully",
+                "imported_objects": imported_objects
+            }
+        
+        except requests.exceptions.Timeout:
+            return {"error": "Request timed out. Check your internet connection and try again with a simpler model."}
+        except json.JSONDecodeError as e:
+            return {"error": f"Invalid JSON response from Sketchfab API: {str(e)}"}
+        except Exception as e:
+            import traceback
+            traceback.print_exc()
+            return {"error": f"Failed to download model: {str(e)}"}
+
+    def _download_sketchfab_archive(self, uid, api_key, staging_dir):
+        """Download and extract a model's glTF archive into staging_dir, returns the cache entry metadata"""
+        # Use proper authorization header for API key auth
+        headers = {
+            "Authorization": f"Token {api_key}"
+        }
+        
+        # Request download URL using the exact endpoint from the documentation
+        download_endpoint = f"/v3/models/{uid}/download"
+        
+        response = self.http["sketchfab"].get(
+            download_endpoint,
+            headers=headers,
+            timeout=30  # Add timeout of 30 seconds
+        )
+        
+        if response.status_code == 401:
+            raise AssetDownloadError("Authentication failed (401). Check your API key.")
             
-            if model_response.status_code != 200:
-                return {"error": f"Model download failed with status code {model_response.status_code}"}
-                
-            # Save to temporary file
-            temp_dir = tempfile.mkdtemp()
-            zip_file_path = os.path.join(temp_dir, f"{uid}.zip")
+        if response.status_code != 200:
+            raise AssetDownloadError(f"Download request failed with status code {response.status_code}")
             
-            with open(zip_file_path, "wb") as f:
-                f.write(model_response.content)
-                
+        data = response.json()
+        
+        # Safety check for None data
+        if data is None:
+            raise AssetDownloadError("Received empty response from Sketchfab API for download request")
+            
+        # Extract download URL with safety checks
+        gltf_data = data.get("gltf")
+        if not gltf_data:
+            raise AssetDownloadError("No gltf download URL available for this model. Response: " + str(data))
+            
+        download_url = gltf_data.get("url")
+        if not download_url:
+            raise AssetDownloadError("No download URL available for this model. Make sure the model is downloadable and you have access.")
+            
+        # Extract while downloading, so the archive itself never hits the disk
+        try:
+            main_file = self._stream_sketchfab_archive(download_url, staging_dir)
+        except ZipStreamError as e:
+            print(f"Cannot extract Sketchfab model {uid} while downloading ({str(e)}), downloading the whole archive")
+            main_file = self._download_sketchfab_zip(download_url, staging_dir)
+        
+        return {"main_file": main_file}
+
+    def _stream_sketchfab_archive(self, url, staging_dir):
+        """Download and extract the model archive in one pass, returns the archive name of the glTF file"""
+        client = self.http["sketchfab"]
+        extractor = ZipStreamExtractor(staging_dir)
+        for attempt in range(self.DOWNLOAD_ATTEMPTS):
+            # After a dropped connection, continue from the first member not fully extracted
+            offset = extractor.rewind()
+            headers = {"Range": f"bytes={offset}-"} if offset else {}
+            try:
+                with client.get(url, stream=True, headers=headers) as response:
+                    if response.status_code == 200 and offset:
+                        offset = extractor.rewind(0)  # Range not honoured, start over
+                    elif response.status_code not in (200, 206):
+                        raise AssetDownloadError(f"Model download failed with status code {response.status_code}")
+                    
+                    length = response.headers.get("Content-Length")
+                    total = offset + int(length) if length else None
+                    received = offset
+                    last_report = 0.0
+                    for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                        extractor.feed(chunk)
+                        received += len(chunk)
+                        if extractor.complete:
+                            # Everything the glTF file needs is on disk, skip the rest
+                            break
+                        if time.monotonic() - last_report > 0.25:
+                            last_report = time.monotonic()
+                            self.report_progress(received, total, "Downloading model archive")
+                if not extractor.complete:
+                    raise requests.exceptions.ConnectionError(f"Archive ended after {received} bytes")
+                break
+            except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                    requests.exceptions.Timeout) as e:
+                if attempt == self.DOWNLOAD_ATTEMPTS - 1:
+                    raise
+                print(f"Download of {url} interrupted, resuming: {str(e)}")
+        
+        if extractor.main_file is None:
+            raise AssetDownloadError("No glTF file found in the downloaded model")
+        if extractor.missing:
+            print(f"Model archive lacks files its glTF file references: {', '.join(extractor.missing)}")
+        extractor.prune()
+        return extractor.main_file
+
+    def _download_sketchfab_zip(self, url, staging_dir):
+        """Download the whole model archive and extract it, for archives that can't be streamed"""
+        # Save the archive next to the staging directory so it isn't cached itself.
+        # It streams to disk and an interrupted download resumes on the next attempt.
+        zip_file_path = f"{staging_dir}.zip"
+        self._download_file(
+            self.http["sketchfab"], url, zip_file_path,
+            lambda received, total: self.report_progress(received, total, "Downloading model archive")
+        )
+        
+        try:
             # Extract the zip file with enhanced security
             with zipfile.ZipFile(zip_file_path, 'r') as zip_ref:
                 # More secure zip slip prevention
@@ -1628,63 +5124,55 @@ class BlenderMCPServer:
                     
                     # Convert directory separators to the current OS style
                     # This handles both / and \ in zip entries
-                    target_path = os.path.join(temp_dir, os.path.normpath(file_path))
+                    target_path = os.path.join(staging_dir, os.path.normpath(file_path))
                     
                     # Get absolute paths for comparison
-                    abs_temp_dir = os.path.abspath(temp_dir)
+                    abs_temp_dir = os.path.abspath(staging_dir)
                     abs_target_path = os.path.abspath(target_path)
                     
                     # Ensure the normalized path doesn't escape the target directory
                     if not abs_target_path.startswith(abs_temp_dir):
-                        with suppress(Exception):
-                            shutil.rmtree(temp_dir)
-                        return {"error": "Security issue: Zip contains files with path traversal attempt"}
+                        raise AssetDownloadError("Security issue: Zip contains files with path traversal attempt")
                     
                     # Additional explicit check for directory traversal
                     if ".." in file_path:
-                        with suppress(Exception):
-                            shutil.rmtree(temp_dir)
-                        return {"error": "Security issue: Zip contains files with directory traversal sequence"}
+                        raise AssetDownloadError("Security issue: Zip contains files with directory traversal sequence")
                 
                 # If all files passed security checks, extract them
-                zip_ref.extractall(temp_dir)
-                
-            # Find the main glTF file
-            gltf_files = [f for f in os.listdir(temp_dir) if f.endswith('.gltf') or f.endswith('.glb')]
-            
-            if not gltf_files:
-                with suppress(Exception):
-                    shutil.rmtree(temp_dir)
-                return {"error": "No glTF file found in the downloaded model"}
-                
-            main_file = os.path.join(temp_dir, gltf_files[0])
-            
-            # Import the model
-            bpy.ops.import_scene.gltf(filepath=main_file)
-            
-            # Get the names of imported objects
-            imported_objects = [obj.name for obj in bpy.context.selected_objects]
-            
-            # Clean up temporary files
+                zip_ref.extractall(staging_dir)
+        finally:
             with suppress(Exception):
-                shutil.rmtree(temp_dir)
+                os.unlink(zip_file_path)
             
-            return {
-                "success": True,
-                "message": "Model imported successfully",
-                "imported_objects": imported_objects
-            }
+        # Find the main glTF file
+        gltf_files = [f for f in os.listdir(staging_dir) if f.endswith('.gltf') or f.endswith('.glb')]
         
-        except requests.exceptions.Timeout:
-            return {"error": "Request timed out. Check your internet connection and try again with a simpler model."}
-        except json.JSONDecodeError as e:
-            return {"error": f"Invalid JSON response from Sketchfab API: {str(e)}"}
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
-            return {"error": f"Failed to download model: {str(e)}"}
+        if not gltf_files:
+            raise AssetDownloadError("No glTF file found in the downloaded model")
+        
+        return gltf_files[0]
     #endregion
 
+@persistent
+def _on_depsgraph_update(scene, depsgraph):
+    server = getattr(bpy.types, "blendermcp_server", None)
+    if server and server.running:
+        server.record_scene_changes(depsgraph)
+
+@persistent
+def _on_load_post(*args):
+    server = getattr(bpy.types, "blendermcp_server", None)
+    if server and server.running:
+        server.reset_scene_changes()
+        server.texture_sets.clear()
+        server.image_hashes = None
+
+def _on_capabilities_changed(self, context):
+    """Push integration toggle changes to connected MCP servers"""
+    server = getattr(bpy.types, "blendermcp_server", None)
+    if server and server.running:
+        server.update_capabilities(context.scene)
+
 # Blender UI Panel
 class BLENDERMCP_PT_Panel(bpy.types.Panel):
     bl_label = "Blender MCP"
@@ -1710,6 +5198,9 @@ class BLENDERMCP_PT_Panel(bpy.types.Panel):
         if scene.blendermcp_use_sketchfab:
             layout.prop(scene, "blendermcp_sketchfab_api_key", text="API Key")
         
+        layout.prop(scene, "blendermcp_asset_cache_dir", text="Asset Cache")
+        layout.prop(scene, "blendermcp_asset_cache_size_mb", text="Cache Size (MB)")
+        
         if not scene.blendermcp_server_running:
             layout.operator("blendermcp.start_server", text="Connect to MCP server")
         else:
@@ -1782,13 +5273,15 @@ def register():
     bpy.types.Scene.blendermcp_use_polyhaven = bpy.props.BoolProperty(
         name="Use Poly Haven",
         description="Enable Poly Haven asset integration",
-        default=False
+        default=False,
+        update=_on_capabilities_changed
     )
 
     bpy.types.Scene.blendermcp_use_hyper3d = bpy.props.BoolProperty(
         name="Use Hyper3D Rodin",
         description="Enable Hyper3D Rodin generatino integration",
-        default=False
+        default=False,
+        update=_on_capabilities_changed
     )
 
     bpy.types.Scene.blendermcp_hyper3d_mode = bpy.props.EnumProperty(
@@ -1798,29 +5291,47 @@ def register():
             ("MAIN_SITE", "hyper3d.ai", "hyper3d.ai"),
             ("FAL_AI", "fal.ai", "fal.ai"),
         ],
-        default="MAIN_SITE"
+        default="MAIN_SITE",
+        update=_on_capabilities_changed
     )
 
     bpy.types.Scene.blendermcp_hyper3d_api_key = bpy.props.StringProperty(
         name="Hyper3D API Key",
         subtype="PASSWORD",
         description="API Key provided by Hyper3D",
-        default=""
+        default="",
+        update=_on_capabilities_changed
     )
     
     bpy.types.Scene.blendermcp_use_sketchfab = bpy.props.BoolProperty(
         name="Use Sketchfab",
         description="Enable Sketchfab asset integration",
-        default=False
+        default=False,
+        update=_on_capabilities_changed
     )
 
     bpy.types.Scene.blendermcp_sketchfab_api_key = bpy.props.StringProperty(
         name="Sketchfab API Key",
         subtype="PASSWORD",
         description="API Key provided by Sketchfab",
+        default="",
+        update=_on_capabilities_changed
+    )
+    
+    bpy.types.Scene.blendermcp_asset_cache_dir = bpy.props.StringProperty(
+        name="Asset Cache Directory",
+        subtype="DIR_PATH",
+        description="Where downloaded assets are kept for reuse (empty for the default cache directory)",
         default=""
     )
     
+    bpy.types.Scene.blendermcp_asset_cache_size_mb = IntProperty(
+        name="Asset Cache Size",
+        description="Maximum size of the asset cache in megabytes, least recently used assets are removed first",
+        default=2048,
+        min=0
+    )
+    
     bpy.utils.register_class(BLENDERMCP_PT_Panel)
     bpy.utils.register_class(BLENDERMCP_OT_SetFreeTrialHyper3DAPIKey)
     bpy.utils.register_class(BLENDERMCP_OT_StartServer)
@@ -1847,6 +5358,8 @@ def unregister():
     del bpy.types.Scene.blendermcp_hyper3d_api_key
     del bpy.types.Scene.blendermcp_use_sketchfab
     del bpy.types.Scene.blendermcp_sketchfab_api_key
+    del bpy.types.Scene.blendermcp_asset_cache_dir
+    del bpy.types.Scene.blendermcp_asset_cache_size_mb
 
     print("BlenderMCP addon unregistered")
 
@@ -0,0 +1,27 @@
+"""
+Helpers for benchmarks that exercise addon.py, which needs Blender's bpy.
+Run them with Blender's bundled Python, options after the "--":
+
+    blender --background --factory-startup --python benchmarks/<script>.py -- [options]
+"""
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_addon():
+    """Import addon.py from this checkout as a plain module, without registering it"""
+    if REPO_ROOT not in sys.path:
+        sys.path.insert(0, REPO_ROOT)
+    try:
+        import addon
+    except ImportError as e:
+        sys.exit(f"{e}: run this benchmark inside Blender, see {__file__}")
+    return addon
+
+
+def script_args():
+    """The command line options meant for the script rather than Blender"""
+    return sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
@@ -0,0 +1,126 @@
+"""
+Benchmark peak memory of asset downloads, buffering response.content against
+the addon's streamed _download_file, using a local large-file stand-in (see
+standin_http.py).
+
+Peak memory is what tracemalloc saw Python allocate during the download. The
+buffered download needs the whole file in memory; the streamed one should stay
+around one DOWNLOAD_CHUNK_SIZE whatever the file size. A last run cuts the
+connection halfway through to check that the download resumes with a Range
+request instead of starting over.
+
+    blender --background --factory-startup --python benchmarks/bench_downloads.py -- --size-mb 256
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from addon_env import load_addon, script_args
+from standin_http import StandInHTTPServer, file_response
+
+addon = load_addon()
+import requests
+
+MB = 1024 * 1024
+# The served file repeats one random block, so any size costs the stand-in 1 MB
+BLOCK = os.urandom(MB)
+BLOCK_TWICE = BLOCK + BLOCK
+
+
+def read(offset, length):
+    start = offset % len(BLOCK)
+    return BLOCK_TWICE[start:start + length]
+
+
+def expected_digest(size):
+    digest = hashlib.sha256()
+    for offset in range(0, size, MB):
+        digest.update(read(offset, min(MB, size - offset)))
+    return digest.hexdigest()
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(MB), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def download_buffered(client, url, path):
+    """How the addon downloaded before: the whole body in memory, then written out"""
+    response = requests.get(url, timeout=addon.ProviderClient.DEFAULT_TIMEOUT)
+    response.raise_for_status()
+    with open(path, "wb") as f:
+        f.write(response.content)
+
+
+def download_streamed(client, url, path):
+    addon.BlenderMCPServer._download_file(client, url, path)
+
+
+def measure(download, client, url, path):
+    """(seconds, peak bytes allocated) for one download"""
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        download(client, url, path)
+        return time.perf_counter() - started, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Peak memory of buffered and streamed downloads")
+    parser.add_argument("--size-mb", type=int, default=256, help="Size of the downloaded file (default 256)")
+    parser.add_argument("--drop-at", type=float, default=0.5,
+                        help="Fraction of the file after which the resume run loses its connection (default 0.5)")
+    args = parser.parse_args(script_args())
+    size = args.size_mb * MB
+
+    served = {"bytes": 0, "drop_after": None}
+
+    def serve_file(request, match):
+        drop_after, served["drop_after"] = served["drop_after"], None
+        status, headers, body = file_response(request, size, read, drop_after=drop_after)
+        if not isinstance(body, bytes):
+            body = counted(body)
+        return status, headers, body
+
+    def counted(body):
+        for chunk in body:
+            served["bytes"] += len(chunk)
+            yield chunk
+
+    digest = expected_digest(size)
+    workdir = tempfile.mkdtemp(prefix="blender_mcp_bench_")
+    try:
+        with StandInHTTPServer([("GET", r"/asset.bin", serve_file)]) as server:
+            client = addon.ProviderClient("bench", server.url())
+            print(f"Downloading {args.size_mb} MB:")
+            runs = (("buffered", download_buffered, None), ("streamed", download_streamed, None),
+                    (f"streamed, cut at {args.drop_at:.0%}", download_streamed, int(size * args.drop_at)))
+            for label, download, drop_after in runs:
+                path = os.path.join(workdir, "asset.bin")
+                served.update(bytes=0, drop_after=drop_after)
+                server.reset_stats()
+                elapsed, peak = measure(download, client, server.url("/asset.bin"), path)
+                intact = "ok" if file_digest(path) == digest else "CORRUPT"
+                print(f"  {label:<22} {elapsed * 1000:9.1f} ms  peak {peak / MB:8.1f} MB  "
+                      f"{served['bytes'] / MB:7.1f} MB served in {server.stats['requests']} requests  {intact}")
+                os.remove(path)
+            client.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
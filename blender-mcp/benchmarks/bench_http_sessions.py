@@ -0,0 +1,115 @@
+"""
+Benchmark the addon's pooled provider sessions against bare requests calls,
+using a local stand-in provider (see standin_http.py).
+
+Reports, for the same workload:
+  - connections opened and time taken for sequential API calls, e.g. the
+    nine requests of a Poly Haven texture set
+  - the most requests one host saw at once when many are made in parallel
+  - whether a call survives a provider answering 503 a couple of times
+
+    blender --background --factory-startup --python benchmarks/bench_http_sessions.py -- --requests 100
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from addon_env import load_addon, script_args
+from standin_http import StandInHTTPServer, json_response
+
+addon = load_addon()
+import requests
+
+
+def make_routes(delay, remaining_failures):
+    """Stand-in API routes; /flaky answers 503 until remaining_failures["count"] runs out"""
+    lock = threading.Lock()
+
+    def info(request, match):
+        return json_response({"id": match.group(1), "files": {"Diffuse": {"1k": {"jpg": {"size": 1024}}}}})
+
+    def slow(request, match):
+        time.sleep(delay)
+        return json_response({"ok": True})
+
+    def flaky(request, match):
+        with lock:
+            if remaining_failures["count"] > 0:
+                remaining_failures["count"] -= 1
+                return json_response({"error": "overloaded"}, status=503)
+        return json_response({"ok": True})
+
+    return [
+        ("GET", r"/info/(\w+)", info),
+        ("GET", r"/slow", slow),
+        ("GET", r"/flaky", flaky),
+    ]
+
+
+def sequential(server, get, count):
+    server.reset_stats()
+    started = time.perf_counter()
+    for i in range(count):
+        response = get(server.url(f"/info/asset{i}"))
+        response.raise_for_status()
+        response.json()
+    return time.perf_counter() - started, server.stats["connections"]
+
+
+def parallel(server, get, count, threads):
+    server.reset_stats()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        for response in executor.map(lambda _: get(server.url("/slow")), range(count)):
+            response.raise_for_status()
+    return time.perf_counter() - started, server.stats["max_in_flight"]
+
+
+def flaky(server, get):
+    try:
+        return f"HTTP {get(server.url('/flaky')).status_code}"
+    except requests.exceptions.RequestException as e:
+        return type(e).__name__
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pooled provider sessions against bare requests calls")
+    parser.add_argument("--requests", type=int, default=100, help="Sequential API calls (default 100)")
+    parser.add_argument("--parallel", type=int, default=48, help="Parallel calls to one host (default 48)")
+    parser.add_argument("--threads", type=int, default=16, help="Threads making the parallel calls (default 16)")
+    parser.add_argument("--delay", type=float, default=0.05, help="Seconds the stand-in takes per parallel call (default 0.05)")
+    parser.add_argument("--failures", type=int, default=2, help="503 responses before the flaky call succeeds (default 2)")
+    args = parser.parse_args(script_args())
+
+    remaining_failures = {"count": 0}
+    with StandInHTTPServer(make_routes(args.delay, remaining_failures)) as server:
+        client = addon.ProviderClient("bench", server.url())
+        # A new session, and so a new connection, per call like the addon did before
+        bare_get = lambda url: requests.get(url, timeout=addon.ProviderClient.DEFAULT_TIMEOUT)
+
+        print(f"{args.requests} sequential calls:")
+        for label, get in (("bare requests", bare_get), ("ProviderClient", client.get)):
+            elapsed, connections = sequential(server, get, args.requests)
+            print(f"  {label:<15} {elapsed * 1000:8.1f} ms  {connections:4d} connections")
+
+        print(f"{args.parallel} parallel calls from {args.threads} threads:")
+        for label, get in (("bare requests", bare_get), ("ProviderClient", client.get)):
+            elapsed, max_in_flight = parallel(server, get, args.parallel, args.threads)
+            print(f"  {label:<15} {elapsed * 1000:8.1f} ms  at most {max_in_flight} at once"
+                  + (f" (limit {client.max_per_host})" if get == client.get else ""))
+
+        print(f"Provider answering 503 {args.failures} times:")
+        for label, get in (("bare requests", bare_get), ("ProviderClient", client.get)):
+            remaining_failures["count"] = args.failures
+            print(f"  {label:<15} {flaky(server, get)}")
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark response transfer over the bridge socket, framed protocol against
+legacy raw JSON, from 1 KB to 100 MB.
+
+BlenderConnection from the installed package talks to a stand-in addon (see
+standin_blender.py) that answers a get_payload command with a JSON string of
+the requested size. With framing the time per byte should stay flat as the
+payload grows; the legacy path re-joins and re-parses the buffer after every
+8 KB chunk, so its time per byte grows with the payload.
+
+    uv run python benchmarks/bench_protocol.py
+    uv run python benchmarks/bench_protocol.py --max-mb 10 --legacy-max-mb 10 --repeats 3
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from blender_mcp.server import BlenderConnection
+from standin_blender import StandInBlender
+
+KB = 1024
+MB = 1024 * KB
+SIZES = (1 * KB, 10 * KB, 100 * KB, 1 * MB, 10 * MB, 100 * MB)
+
+
+def get_payload(params):
+    return {"data": "x" * params["size"]}
+
+
+def measure(framed, size, repeats):
+    """Best round trip in seconds for one response of size bytes"""
+    with StandInBlender({"get_payload": get_payload}, framed=framed) as server:
+        blender = BlenderConnection(host=server.host, port=server.port)
+        if not blender.connect():
+            raise RuntimeError("Could not connect to the stand-in addon")
+        try:
+            best = None
+            for _ in range(repeats):
+                started = time.perf_counter()
+                result = blender.send_command("get_payload", {"size": size})
+                elapsed = time.perf_counter() - started
+                if len(result["data"]) != size:
+                    raise RuntimeError(f"Expected {size} bytes, got {len(result['data'])}")
+                best = elapsed if best is None else min(best, elapsed)
+            return best
+        finally:
+            blender.disconnect()
+
+
+def format_size(size):
+    return f"{size // MB} MB" if size >= MB else f"{size // KB} KB"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--max-mb", type=float, default=100, help="Largest payload for the framed protocol (default 100)")
+    parser.add_argument("--legacy-max-mb", type=float, default=4,
+                        help="Largest payload for the legacy protocol, which slows down quadratically (default 4)")
+    parser.add_argument("--repeats", type=int, default=5, help="Round trips per size, the best one counts (default 5)")
+    args = parser.parse_args()
+    logging.getLogger("BlenderMCPServer").setLevel(logging.WARNING)
+
+    print(f"{'payload':>10} {'framed ms':>11} {'ns/byte':>8} {'legacy ms':>11} {'ns/byte':>8}")
+    for size in SIZES:
+        if size > args.max_mb * MB:
+            break
+        # Large payloads take long enough that a few runs are plenty
+        repeats = max(1, min(args.repeats, int(200 * MB // size)))
+        framed = measure(True, size, repeats)
+        row = f"{format_size(size):>10} {framed * 1000:>11.2f} {framed * 1e9 / size:>8.2f}"
+        if size <= args.legacy_max_mb * MB:
+            legacy = measure(False, size, repeats)
+            row += f" {legacy * 1000:>11.2f} {legacy * 1e9 / size:>8.2f}"
+        else:
+            row += f" {'skipped':>11} {'':>8}"
+        print(row, flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark waiting for a Hyper3D Rodin job: the agent calling
+poll_rodin_job_status over and over against one wait_for_rodin_job call,
+using a fake Rodin API (see standin_http.py).
+
+Reported per approach: MCP tool calls (each also costs the agent a turn),
+status requests sent to the provider, and how long after the job finished the
+caller found out. Times are scaled down by --time-scale so a run takes
+seconds; they are reported unscaled.
+
+    blender --background --factory-startup --python benchmarks/bench_rodin_wait.py -- --job-seconds 90 --mode FAL_AI
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from addon_env import load_addon, script_args
+from standin_http import FakeRodin, StandInHTTPServer
+
+addon = load_addon()
+
+
+def poll_like_an_agent(server, mode, key, interval):
+    """Call poll_rodin_job_status every interval seconds until the job is done, returns the calls made"""
+    calls = 0
+    while True:
+        calls += 1
+        if mode == "MAIN_SITE":
+            state = server._rodin_main_site_progress(server.poll_rodin_job_status(subscription_key=key))[0]
+        else:
+            state = server._rodin_fal_ai_progress(server.poll_rodin_job_status(request_id=key))[0]
+        if state != "pending":
+            return calls
+        time.sleep(interval)
+
+
+def wait_in_blender(server, mode, key, timeout, events):
+    """One wait_for_rodin_job call, returns the calls made"""
+    server._progress.callback = lambda progress, total, message: events.append(message)
+    try:
+        kwargs = {"subscription_key": key} if mode == "MAIN_SITE" else {"request_id": key}
+        waiting = server.wait_for_rodin_job(timeout=timeout, **kwargs)
+    finally:
+        server._progress.callback = None
+    # The handler hands back a Future so the wait doesn't hold one of the addon's workers
+    result = waiting.result()
+    if result.get("status") != "done":
+        raise RuntimeError(f"wait_for_rodin_job gave up: {result}")
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Polling a Rodin job from the agent against waiting in Blender")
+    parser.add_argument("--mode", choices=("MAIN_SITE", "FAL_AI"), default="MAIN_SITE", help="Rodin API flavour (default MAIN_SITE)")
+    parser.add_argument("--job-seconds", type=float, default=90, help="How long the fake job takes (default 90)")
+    parser.add_argument("--agent-interval", type=float, default=10,
+                        help="Seconds between the agent's poll_rodin_job_status calls (default 10)")
+    parser.add_argument("--time-scale", type=float, default=0.02, help="Factor applied to every duration (default 0.02)")
+    args = parser.parse_args(script_args())
+    scale = args.time_scale
+
+    rodin = FakeRodin(args.job_seconds * scale)
+    with StandInHTTPServer(rodin.routes()) as stand_in:
+        # Provider clients read their URL when the server object is created
+        os.environ["BLENDERMCP_HYPER3D_URL"] = stand_in.url()
+        os.environ["BLENDERMCP_FAL_AI_URL"] = stand_in.url()
+        server = addon.BlenderMCPServer()
+        server.settings = {"hyper3d_mode": args.mode, "hyper3d_api_key": "bench"}
+        server.running = True
+        # Scale the polling schedule along with the job
+        server.RODIN_POLL_INTERVAL = addon.BlenderMCPServer.RODIN_POLL_INTERVAL * scale
+        server.RODIN_MAX_POLL_INTERVAL = addon.BlenderMCPServer.RODIN_MAX_POLL_INTERVAL * scale
+
+        print(f"{args.mode} job taking {args.job_seconds:g} s:")
+        events = []
+        runs = (
+            (f"agent polling every {args.agent_interval:g} s",
+             lambda key: poll_like_an_agent(server, args.mode, key, args.agent_interval * scale)),
+            ("wait_for_rodin_job",
+             lambda key: wait_in_blender(server, args.mode, key, args.job_seconds * 4 * scale, events)),
+        )
+        for i, (label, run) in enumerate(runs):
+            key = f"bench-job-{i}"
+            polls_before = rodin.polls
+            calls = run(key)
+            late = (time.monotonic() - rodin.done_at[key]) / scale
+            print(f"  {label:<26} {calls:3d} MCP calls  {rodin.polls - polls_before:3d} provider polls  "
+                  f"noticed {late:5.1f} s after the job finished")
+        print(f"  wait_for_rodin_job sent {len(events)} progress notifications: {'; '.join(events)}")
+        server.running = False
+        for client in server.http.values():
+            client.close()
+
+
+if __name__ == "__main__":
+    main()
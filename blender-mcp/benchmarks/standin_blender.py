@@ -0,0 +1,105 @@
+"""
+Stand-in for the Blender addon's socket server, for benchmarking the MCP side
+of the bridge without Blender.
+
+It speaks the same protocol as addon.py: a raw JSON negotiate_protocol
+handshake, then framed messages, or raw JSON throughout when started with
+framed=False, like addons that predate framing. Commands are answered by
+plain Python handlers instead of Blender.
+"""
+
+import json
+import socket
+import threading
+
+from blender_mcp.protocol import PROTOCOL_VERSION, encode_frame, recv_frame
+
+
+class StandInBlender:
+    """
+    Socket server answering commands with handlers(params) -> result.
+
+    Use it as a context manager; connect to ("127.0.0.1", server.port).
+    A handler that raises answers with an error response, like the addon.
+    """
+
+    def __init__(self, handlers, framed=True, host="127.0.0.1", port=0):
+        self.handlers = handlers
+        self.framed = framed
+        self.socket = socket.create_server((host, port))
+        self.host, self.port = self.socket.getsockname()[:2]
+        self.running = False
+        self.thread = None
+
+    def __enter__(self):
+        self.running = True
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.running = False
+        self.socket.close()
+        self.thread.join(timeout=1.0)
+
+    def _serve(self):
+        while self.running:
+            try:
+                client, _address = self.socket.accept()
+            except OSError:
+                break
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            threading.Thread(target=self._handle_client, args=(client,), daemon=True).start()
+
+    def _handle_client(self, client):
+        with client:
+            try:
+                command = self._recv_json(client)
+                if command is None:
+                    return
+                if command.get("type") == "negotiate_protocol" and self.framed:
+                    client.sendall(json.dumps({"status": "success", "result": {
+                        "protocol_version": PROTOCOL_VERSION, "capabilities": {},
+                    }}).encode('utf-8'))
+                    self._serve_framed(client)
+                    return
+                if command.get("type") == "negotiate_protocol":
+                    # What addons without framing answer
+                    client.sendall(json.dumps({
+                        "status": "error", "message": "Unknown command type: negotiate_protocol",
+                    }).encode('utf-8'))
+                    command = self._recv_json(client)
+                while command is not None:
+                    client.sendall(json.dumps(self._answer(command)).encode('utf-8'))
+                    command = self._recv_json(client)
+            except (ConnectionError, OSError):
+                pass
+
+    def _serve_framed(self, client):
+        while True:
+            command = recv_frame(client)
+            response = dict(self._answer(command), id=command.get("id"))
+            client.sendall(encode_frame(response))
+
+    def _answer(self, command):
+        handler = self.handlers.get(command.get("type"))
+        if handler is None:
+            return {"status": "error", "message": f"Unknown command type: {command.get('type')}"}
+        try:
+            return {"status": "success", "result": handler(command.get("params", {}))}
+        except Exception as e:
+            return {"status": "error", "message": str(e)}
+
+    @staticmethod
+    def _recv_json(client):
+        """Read one raw JSON command, or None once the client disconnects"""
+        buffer = b''
+        while True:
+            data = client.recv(8192)
+            if not data:
+                return None
+            buffer += data
+            try:
+                return json.loads(buffer.decode('utf-8'))
+            except json.JSONDecodeError:
+                continue
@@ -0,0 +1,206 @@
+"""
+Local stand-ins for the asset provider APIs, for benchmarking the addon's
+HTTP code without network access.
+
+Only the standard library is used, so this runs inside Blender's Python.
+Providers are pointed at a stand-in with BLENDERMCP_<PROVIDER>_URL, e.g.
+BLENDERMCP_POLYHAVEN_URL=http://127.0.0.1:8000, or by constructing a
+ProviderClient with its url.
+"""
+
+import json
+import re
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class DropConnection(Exception):
+    """Raised from a response body to cut the connection in the middle of a response"""
+
+
+class StandInHTTPServer:
+    """
+    HTTP/1.1 server with keep-alive, answering from route handlers.
+
+    routes is a list of (method, path regex, handler). handler(request, match)
+    returns (status, headers, body) where body is bytes or an iterable of byte
+    chunks; request is the BaseHTTPRequestHandler, so request.headers and
+    request.body are available. A body raising DropConnection cuts the
+    connection there, like a flaky network. Connections, requests and the most requests
+    in flight at once are counted, see stats. Use it as a context manager.
+    """
+
+    def __init__(self, routes, host="127.0.0.1", port=0):
+        self.routes = [(method, re.compile(pattern), handler) for method, pattern, handler in routes]
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.reset_stats()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.host, self.port = self.httpd.server_address[:2]
+        self.thread = None
+
+    def url(self, path=""):
+        return f"http://{self.host}:{self.port}/{path.lstrip('/')}"
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats.update(connections=0, requests=0, in_flight=0, max_in_flight=0)
+
+    def __enter__(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join(timeout=1.0)
+
+    def _count(self, key, delta=1):
+        with self._lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                # Headers and body go out in separate writes; don't let Nagle hold the body back
+                self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                server._count("connections")
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def _dispatch(self, method):
+                server._count("requests")
+                server._count("in_flight")
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    self.body = self.rfile.read(length) if length else b''
+                    path = self.path.split("?", 1)[0]
+                    for route_method, pattern, handler in server.routes:
+                        match = pattern.fullmatch(path)
+                        if route_method == method and match:
+                            status, headers, body = handler(self, match)
+                            break
+                    else:
+                        status, headers, body = 404, {}, b'not found'
+                    self._respond(status, headers, body)
+                finally:
+                    server._count("in_flight", -1)
+
+            def _respond(self, status, headers, body):
+                self.send_response(status)
+                if isinstance(body, bytes):
+                    headers = dict(headers, **{"Content-Length": str(len(body))})
+                    body = (body,)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    for chunk in body:
+                        self.wfile.write(chunk)
+                    self.wfile.flush()
+                except DropConnection:
+                    self.close_connection = True
+                    self.connection.shutdown(socket.SHUT_RDWR)
+
+        return Handler
+
+
+def json_response(data, status=200):
+    """(status, headers, body) for a JSON route handler"""
+    return status, {"Content-Type": "application/json"}, json.dumps(data).encode('utf-8')
+
+
+def file_response(request, size, read, chunk_size=64 * 1024, drop_after=None):
+    """
+    (status, headers, body) serving size bytes from read(offset, length).
+
+    A "Range: bytes=N-" request header is honoured like a CDN would. With
+    drop_after the connection is cut once the file's first drop_after bytes
+    have been sent.
+    """
+    start = 0
+    match = re.fullmatch(r"bytes=(\d+)-", request.headers.get("Range") or "")
+    if match:
+        start = int(match.group(1))
+        if start >= size:
+            return 416, {"Content-Range": f"bytes */{size}"}, b''
+    headers = {"Content-Type": "application/octet-stream", "Content-Length": str(size - start), "Accept-Ranges": "bytes"}
+    if match:
+        headers["Content-Range"] = f"bytes {start}-{size - 1}/{size}"
+
+    def body():
+        offset = start
+        while offset < size:
+            end = min(offset + chunk_size, size)
+            if drop_after is not None:
+                if offset >= drop_after:
+                    raise DropConnection()
+                end = min(end, drop_after)
+            yield read(offset, end - offset)
+            offset = end
+
+    return (206 if match else 200), headers, body()
+
+
+class FakeRodin:
+    """
+    Hyper3D Rodin job status endpoints, MAIN_SITE and FAL_AI flavours.
+
+    A job is queued when its key is first polled, generates after a fifth of
+    job_seconds and is done once job_seconds have passed. done_at holds the
+    time.monotonic() each job finished at and polls counts status requests.
+    Point the addon at it with BLENDERMCP_HYPER3D_URL and BLENDERMCP_FAL_AI_URL.
+    """
+
+    def __init__(self, job_seconds):
+        self.job_seconds = job_seconds
+        self.started = {}
+        self.done_at = {}
+        self.polls = 0
+        self._lock = threading.Lock()
+
+    def routes(self):
+        return [
+            ("POST", r"/api/v2/status", self._main_site_status),
+            ("GET", r"/fal-ai/hyper3d/requests/([\w-]+)/status", self._fal_ai_status),
+        ]
+
+    def _stage(self, key):
+        """0 queued, 1 generating, 2 done"""
+        now = time.monotonic()
+        with self._lock:
+            self.polls += 1
+            started = self.started.setdefault(key, now)
+            if now - started >= self.job_seconds:
+                self.done_at.setdefault(key, started + self.job_seconds)
+                return 2
+            return 1 if now - started >= self.job_seconds / 5 else 0
+
+    def _main_site_status(self, request, match):
+        key = json.loads(request.body)["subscription_key"]
+        status = ("Waiting", "Generating", "Done")[self._stage(key)]
+        return json_response({"jobs": [{"uuid": f"{key}-mesh", "status": status}]})
+
+    def _fal_ai_status(self, request, match):
+        stage = self._stage(match.group(1))
+        if stage == 0:
+            return json_response({"status": "IN_QUEUE", "queue_position": 1})
+        return json_response({"status": ("IN_QUEUE", "IN_PROGRESS", "COMPLETED")[stage]})
@@ -0,0 +1,154 @@
+"""Latency and size histograms for commands crossing the Blender bridge.
+
+Both sides record per command type and stage. The MCP server records:
+
+    serialize   encoding the command frame
+    round_trip  from sending the command to its response arriving
+    receive     reading and decoding the response frame
+    bytes_out   size of the command frame
+    bytes_in    size of the response frame
+
+The addon records ``receive``, ``queue`` (waiting for a main-thread timer
+tick), ``handler``, ``serialize``, ``total`` (from receiving the command to
+sending its response), ``bytes_in`` and ``bytes_out`` the same way and
+returns its raw bucket counts from ``get_bridge_metrics``. Both use the
+bucket bounds below, so either side's histograms can be summarized or
+rendered as Prometheus text here.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Tuple
+
+# Upper bounds of the buckets, inclusive as in Prometheus; one overflow bucket follows
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576,
+                4194304, 16777216, 67108864, 268435456)
+SIZE_STAGES = ("bytes_in", "bytes_out")
+
+
+def bucket_bounds(stage: str) -> Tuple[float, ...]:
+    return SIZE_BUCKETS if stage in SIZE_STAGES else LATENCY_BUCKETS
+
+
+class BridgeMetrics:
+    """Thread-safe histograms keyed by (command type, stage)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.started = time.time()
+
+    def record(self, command_type: str, stage: str, value: float):
+        bounds = bucket_bounds(stage)
+        with self._lock:
+            histogram = self._histograms.get((command_type, stage))
+            if histogram is None:
+                histogram = self._histograms[(command_type, stage)] = {
+                    "counts": [0] * (len(bounds) + 1), "sum": 0.0, "count": 0, "min": value, "max": value,
+                }
+            histogram["counts"][bisect_left(bounds, value)] += 1
+            histogram["sum"] += value
+            histogram["count"] += 1
+            histogram["min"] = min(histogram["min"], value)
+            histogram["max"] = max(histogram["max"], value)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy of every histogram, in the same shape the addon reports its own"""
+        with self._lock:
+            return {
+                "since": self.started,
+                "histograms": [
+                    dict(histogram, command=command_type, stage=stage, counts=list(histogram["counts"]))
+                    for (command_type, stage), histogram in self._histograms.items()
+                ],
+            }
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+            self.started = time.time()
+
+
+def quantile(histogram: Dict[str, Any], q: float) -> float:
+    """Estimate a quantile by interpolating linearly within the bucket it falls in"""
+    bounds = bucket_bounds(histogram["stage"])
+    rank = q * histogram["count"]
+    seen = 0
+    for index, count in enumerate(histogram["counts"]):
+        if count and seen + count >= rank:
+            lower = bounds[index - 1] if index > 0 else 0.0
+            upper = bounds[index] if index < len(bounds) else histogram["max"]
+            # The smallest and largest values seen are tighter than the bucket edges
+            lower = max(lower, histogram.get("min", lower))
+            upper = min(upper, histogram["max"])
+            return lower + (upper - lower) * max(rank - seen, 0) / count
+        seen += count
+    return histogram["max"]
+
+
+def summarize(snapshot: Dict[str, Any]) -> Dict[str, Dict[str, Dict[str, Any]]]:
+    """
+    {command: {stage: statistics}} with commands ordered by the time they took in total.
+
+    Latencies are reported in milliseconds, sizes in bytes.
+    """
+    commands: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    weights: Dict[str, float] = {}
+    for histogram in snapshot.get("histograms", []):
+        count = histogram["count"]
+        if not count:
+            continue
+        scale = 1 if histogram["stage"] in SIZE_STAGES else 1000
+        suffix = "" if histogram["stage"] in SIZE_STAGES else "_ms"
+        commands.setdefault(histogram["command"], {})[histogram["stage"]] = {
+            "count": count,
+            f"mean{suffix}": round(histogram["sum"] / count * scale, 3),
+            f"p50{suffix}": round(quantile(histogram, 0.5) * scale, 3),
+            f"p95{suffix}": round(quantile(histogram, 0.95) * scale, 3),
+            f"p99{suffix}": round(quantile(histogram, 0.99) * scale, 3),
+            f"max{suffix}": round(histogram["max"] * scale, 3),
+        }
+        if histogram["stage"] in ("round_trip", "total"):
+            weights[histogram["command"]] = weights.get(histogram["command"], 0.0) + histogram["sum"]
+    return dict(sorted(commands.items(), key=lambda item: -weights.get(item[0], 0.0)))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_bound(bound: float) -> str:
+    return repr(float(bound)) if isinstance(bound, float) else str(bound)
+
+
+def to_prometheus(snapshots: Iterable[Tuple[str, Dict[str, Any]]]) -> str:
+    """
+    Render (side, snapshot) pairs in the Prometheus text exposition format.
+
+    Latencies become ``blendermcp_command_seconds`` and sizes ``blendermcp_command_bytes``,
+    both labelled with side, command and stage.
+    """
+    series: Dict[str, List[str]] = {"blendermcp_command_seconds": [], "blendermcp_command_bytes": []}
+    for side, snapshot in snapshots:
+        for histogram in snapshot.get("histograms", []):
+            name = "blendermcp_command_bytes" if histogram["stage"] in SIZE_STAGES else "blendermcp_command_seconds"
+            labels = (f'side="{_escape_label(side)}",command="{_escape_label(histogram["command"])}",'
+                      f'stage="{_escape_label(histogram["stage"])}"')
+            cumulative = 0
+            for bound, count in zip(bucket_bounds(histogram["stage"]), histogram["counts"]):
+                cumulative += count
+                series[name].append(f'{name}_bucket{{{labels},le="{_format_bound(bound)}"}} {cumulative}')
+            series[name].append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram["count"]}')
+            series[name].append(f"{name}_sum{{{labels}}} {histogram['sum']}")
+            series[name].append(f"{name}_count{{{labels}}} {histogram['count']}")
+
+    lines = []
+    for name, help_text in (("blendermcp_command_seconds", "Time spent per command and stage of the Blender bridge"),
+                            ("blendermcp_command_bytes", "Bytes sent and received per command of the Blender bridge")):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        lines.extend(series[name])
+    return "\n".join(lines) + "\n"
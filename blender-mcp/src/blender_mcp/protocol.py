@@ -0,0 +1,214 @@
+"""Wire protocol spoken between the MCP server and the Blender addon.
+
+Every message is a fixed-size header followed by a UTF-8 JSON payload:
+
+    magic (4 bytes, b"BMCP") | version (1) | flags (1) | reserved (2) | length (4)
+
+All header fields are big-endian. The length lets the receiver allocate the
+payload buffer once and fill it with ``recv_into`` instead of re-joining and
+re-parsing chunks until the JSON happens to be complete.
+
+When the ``FLAG_ATTACHMENTS`` bit is set the payload carries raw binary
+buffers (mesh arrays, image bytes) after the JSON instead of JSON number
+lists:
+
+    json length (4) | JSON | padding | attachment 0 | padding | attachment 1 ...
+
+The JSON then holds an ``attachments`` list describing each buffer (name,
+dtype, shape, offset and size within the binary section). Attachments start
+on 8-byte boundaries so the receiver can view them as typed arrays in place.
+
+Older addons only understand raw JSON. A client opens every connection with a
+raw JSON ``negotiate_protocol`` command; addons that support framing reply
+with the version they picked and both sides switch to framed messages. Older
+addons answer with an "Unknown command type" error and the connection stays on
+the legacy raw JSON protocol, where attachments travel base64-encoded inside
+the JSON instead.
+"""
+
+import base64
+import json
+import socket
+import struct
+import time
+from typing import Any, Dict, List
+
+MAGIC = b"BMCP"
+PROTOCOL_VERSION = 1
+LEGACY_PROTOCOL_VERSION = 0
+SUPPORTED_VERSIONS = (PROTOCOL_VERSION,)
+
+HEADER = struct.Struct("!4sBBHI")
+JSON_LENGTH = struct.Struct("!I")
+MAX_PAYLOAD_SIZE = 2 ** 32 - 1
+
+FLAG_ATTACHMENTS = 0x01
+ATTACHMENT_ALIGNMENT = 8
+
+
+class ProtocolError(Exception):
+    """Raised when the peer sends a frame we cannot decode"""
+
+
+def encode_frame(message: Dict[str, Any], attachments: Dict[str, Dict[str, Any]] = None) -> bytes:
+    """
+    Serialize a message into a single framed buffer.
+
+    ``attachments`` maps a name to ``{"dtype": str, "shape": list, "data": bytes-like}``.
+    """
+    if not attachments:
+        payload = json.dumps(message).encode("utf-8")
+        if len(payload) > MAX_PAYLOAD_SIZE:
+            raise ProtocolError(f"Message too large to frame ({len(payload)} bytes)")
+        header = HEADER.pack(MAGIC, PROTOCOL_VERSION, 0, 0, len(payload))
+        return b"".join((header, payload))
+
+    descriptors: List[Dict[str, Any]] = []
+    buffers = []
+    offset = 0
+    for name, attachment in attachments.items():
+        data = memoryview(attachment["data"]).cast("B")
+        padding = -offset % ATTACHMENT_ALIGNMENT
+        if padding:
+            buffers.append(bytes(padding))
+            offset += padding
+        descriptors.append({
+            "name": name,
+            "dtype": attachment["dtype"],
+            "shape": list(attachment["shape"]),
+            "offset": offset,
+            "nbytes": data.nbytes,
+        })
+        buffers.append(data)
+        offset += data.nbytes
+
+    body = json.dumps(dict(message, attachments=descriptors)).encode("utf-8")
+    # Pad the JSON so the binary section itself starts aligned
+    body += b" " * (-(JSON_LENGTH.size + len(body)) % ATTACHMENT_ALIGNMENT)
+    length = JSON_LENGTH.size + len(body) + offset
+    if length > MAX_PAYLOAD_SIZE:
+        raise ProtocolError(f"Message too large to frame ({length} bytes)")
+    header = HEADER.pack(MAGIC, PROTOCOL_VERSION, FLAG_ATTACHMENTS, 0, length)
+    return b"".join([header, JSON_LENGTH.pack(len(body)), body, *buffers])
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytearray:
+    """Read exactly ``size`` bytes into a preallocated buffer"""
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], size - received)
+        if count == 0:
+            raise ConnectionError(f"Connection closed after {received} of {size} bytes")
+        received += count
+    return buffer
+
+
+def decode_header(header: bytes) -> tuple:
+    """Validate a frame header and return its flags and payload length"""
+    magic, version, flags, _reserved, length = HEADER.unpack(header)
+    if magic != MAGIC:
+        raise ProtocolError(f"Bad frame magic: {magic!r}")
+    if version not in SUPPORTED_VERSIONS:
+        raise ProtocolError(f"Unsupported protocol version: {version}")
+    return flags, length
+
+
+DESCRIPTOR_FIELDS = (("name", str), ("dtype", str), ("shape", list), ("offset", int), ("nbytes", int))
+
+
+def check_descriptor(descriptor: Any, binary_size: int) -> None:
+    """Raise ProtocolError unless an attachment descriptor is well formed and inside the binary section"""
+    if not isinstance(descriptor, dict):
+        raise ProtocolError(f"Attachment descriptor must be an object, got {type(descriptor).__name__}")
+    for key, kind in DESCRIPTOR_FIELDS:
+        value = descriptor.get(key)
+        # bool is an int subclass but never a valid offset or size
+        if not isinstance(value, kind) or isinstance(value, bool):
+            raise ProtocolError(f"Attachment descriptor field {key!r} must be {kind.__name__}, got {value!r}")
+    name = descriptor["name"]
+    if any(not isinstance(dim, int) or isinstance(dim, bool) or dim < 0 for dim in descriptor["shape"]):
+        raise ProtocolError(f"Attachment {name} has an invalid shape: {descriptor['shape']!r}")
+    if descriptor["offset"] < 0 or descriptor["nbytes"] < 0:
+        raise ProtocolError(f"Attachment {name} has a negative offset or size")
+    if descriptor["offset"] + descriptor["nbytes"] > binary_size:
+        raise ProtocolError(f"Attachment {name} overruns the frame")
+
+
+def recv_frame(sock: socket.socket, stats: Dict[str, float] = None) -> Dict[str, Any]:
+    """
+    Read one framed message from the socket.
+
+    Attachments are returned under ``message["attachments"]`` as
+    ``{name: {"dtype", "shape", "data": memoryview}}``, viewing the receive
+    buffer without copying it. If ``stats`` is given it receives the frame's
+    ``bytes`` and the ``seconds`` spent reading and decoding it once its header
+    arrived, so time spent idle waiting for a message is not counted.
+    """
+    flags, length = decode_header(recv_exactly(sock, HEADER.size))
+    started = time.perf_counter()
+    payload = recv_exactly(sock, length)
+    try:
+        if not flags & FLAG_ATTACHMENTS:
+            message = json.loads(payload.decode("utf-8"))
+            if stats is not None:
+                stats.update(bytes=HEADER.size + length, seconds=time.perf_counter() - started)
+            return message
+
+        (json_length,) = JSON_LENGTH.unpack_from(payload)
+        json_end = JSON_LENGTH.size + json_length
+        if json_end > length:
+            raise ProtocolError(f"JSON length {json_length} overruns the {length} byte frame")
+        message = json.loads(payload[JSON_LENGTH.size:json_end].decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError, struct.error) as e:
+        raise ProtocolError(f"Invalid frame payload: {str(e)}")
+    if not isinstance(message, dict) or not isinstance(message.get("attachments", []), list):
+        raise ProtocolError("Frame with attachments must hold an object with an attachments list")
+
+    binary = memoryview(payload)[json_end:]
+    attachments = {}
+    for descriptor in message.get("attachments", []):
+        check_descriptor(descriptor, len(binary))
+        start = descriptor["offset"]
+        attachments[descriptor["name"]] = {
+            "dtype": descriptor["dtype"],
+            "shape": descriptor["shape"],
+            "data": binary[start:start + descriptor["nbytes"]],
+        }
+    message["attachments"] = attachments
+    if stats is not None:
+        stats.update(bytes=HEADER.size + length, seconds=time.perf_counter() - started)
+    return message
+
+
+def decode_inline_attachments(attachments: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Turn base64 attachments from a legacy JSON message into the framed representation"""
+    return {
+        name: {
+            "dtype": attachment["dtype"],
+            "shape": attachment["shape"],
+            "data": memoryview(base64.b64decode(attachment["base64"])),
+        }
+        for name, attachment in attachments.items()
+    }
+
+
+def encode_inline_attachments(attachments: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Base64-encode attachments so they can travel inside a legacy JSON message"""
+    return {
+        name: {
+            "dtype": attachment["dtype"],
+            "shape": list(attachment["shape"]),
+            "base64": base64.b64encode(attachment["data"]).decode("ascii"),
+        }
+        for name, attachment in attachments.items()
+    }
+
+
+def negotiation_command() -> Dict[str, Any]:
+    """The raw JSON command a client sends first on every connection"""
+    return {
+        "type": "negotiate_protocol",
+        "params": {"versions": list(SUPPORTED_VERSIONS)},
+    }
@@ -5,24 +5,139 @@ import json
 import asyncio
 import logging
 import tempfile
-from dataclasses import dataclass
+import threading
+import itertools
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
 from contextlib import asynccontextmanager
-from typing import AsyncIterator, Dict, Any, List
+from typing import AsyncIterator, Callable, Dict, Any, Iterator, List, Tuple
 import os
+import re
 from pathlib import Path
 import base64
+from array import array
 from urllib.parse import urlparse
 
+from .metrics import BridgeMetrics, summarize, to_prometheus
+from .protocol import (
+    LEGACY_PROTOCOL_VERSION,
+    decode_inline_attachments,
+    encode_frame,
+    encode_inline_attachments,
+    negotiation_command,
+    recv_frame,
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO, 
                     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("BlenderMCPServer")
 
+# Idle connections are probed with a ping frame before reuse
+HEARTBEAT_INTERVAL = 30.0
+HEARTBEAT_TIMEOUT = 3.0
+
+# Seconds to wait for a response. Downloads run on the addon's worker threads,
+# so on framed connections they can take longer without blocking other commands.
+DEFAULT_COMMAND_TIMEOUT = 15.0
+COMMAND_TIMEOUTS = {
+    "download_polyhaven_asset": 300.0,
+    "download_sketchfab_model": 300.0,
+    "import_generated_asset": 300.0,
+    "create_rodin_job": 60.0,
+    "batch": 120.0,
+    "create_mesh_from_buffers": 60.0,
+}
+
+class SceneChangeMirror:
+    """
+    Local copy of the addon's scene change journal, kept current by pushed events.
+    
+    Holds the latest change per data-block in version order, like the addon, so
+    get_scene_changes can be answered without asking Blender. Versions from
+    before the subscription started can't be answered locally.
+    """
+    MAX_ENTRIES = 10000
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.version = 0
+        self.floor = float("inf")  # nothing is answerable until the subscription is confirmed
+        self._entries: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    
+    def start(self, version: int):
+        with self._lock:
+            self.floor = version
+            self.version = max(self.version, version)
+    
+    def apply(self, event: Dict[str, Any]):
+        with self._lock:
+            if event.get("reset"):
+                self._entries.clear()
+                self.floor = event["version"]
+            for entry in event.get("entries", []):
+                key = (entry["type"], entry["name"])
+                self._entries.pop(key, None)
+                self._entries[key] = entry
+            while len(self._entries) > self.MAX_ENTRIES:
+                oldest = self._entries.pop(next(iter(self._entries)))
+                self.floor = max(self.floor, oldest["version"])
+            self.version = max(self.version, event["version"])
+    
+    def changes_since(self, since_version: int) -> Dict[str, Any] | None:
+        """Same result as the addon's get_scene_changes, or None if this mirror can't tell"""
+        with self._lock:
+            if since_version < self.floor:
+                return None
+            changes = []
+            for entry in reversed(self._entries.values()):
+                if entry["version"] <= since_version:
+                    break
+                if entry["removed"]:
+                    change = "removed"
+                elif entry["added_version"] is not None and entry["added_version"] > since_version:
+                    change = "added"
+                else:
+                    change = "updated"
+                changes.append({
+                    "type": entry["type"],
+                    "name": entry["name"],
+                    "version": entry["version"],
+                    "change": change,
+                    "flags": entry["flags"],
+                })
+            changes.reverse()
+            return {"version": self.version, "reset": False, "changes": changes}
+
+
+# Shared by every connection, so reconnecting doesn't lose the numbers
+bridge_metrics = BridgeMetrics()
+
 @dataclass
 class BlenderConnection:
     host: str
     port: int
     sock: socket.socket = None  # Changed from 'socket' to 'sock' to avoid naming conflict
+    protocol_version: int = LEGACY_PROTOCOL_VERSION
+    # Integration flags pushed by the addon whenever the sidebar toggles change
+    capabilities: Dict[str, Any] = field(default_factory=dict)
+    last_activity: float = 0.0
+    # Mirror of the scene change journal once subscribed to its events
+    scene_changes: SceneChangeMirror = None
+    _scene_push_unsupported: bool = field(default=False, init=False, repr=False)
+    # Per-command latency and size histograms, see get_bridge_metrics
+    metrics: BridgeMetrics = field(default_factory=lambda: bridge_metrics, repr=False)
+    # Pipelining state: commands in flight keyed by request id
+    _send_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _pending_lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+    _pending: Dict[int, Future] = field(default_factory=dict, init=False, repr=False)
+    # Callbacks for the progress events of commands in flight, keyed by request id
+    _progress_callbacks: Dict[int, Callable[[Dict[str, Any]], None]] = field(default_factory=dict, init=False, repr=False)
+    # Command type and send time of commands in flight, keyed by request id
+    _requests: Dict[int, Tuple[str, float]] = field(default_factory=dict, init=False, repr=False)
+    _request_ids: Iterator[int] = field(default_factory=lambda: itertools.count(1), init=False, repr=False)
     
     def connect(self) -> bool:
         """Connect to the Blender addon socket server"""
@@ -31,23 +146,225 @@ class BlenderConnection:
             
         try:
             self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            # Let the OS notice a vanished peer, and don't hold back small frames
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.sock.connect((self.host, self.port))
             logger.info(f"Connected to Blender at {self.host}:{self.port}")
+            self.protocol_version = self._negotiate_protocol()
+            if self.protocol_version != LEGACY_PROTOCOL_VERSION:
+                # Responses are matched to requests by id on a dedicated reader thread,
+                # so the socket itself never times out; callers time out on their futures
+                self.sock.settimeout(None)
+                reader = threading.Thread(target=self._reader_loop, args=(self.sock,), daemon=True)
+                reader.start()
+            self.last_activity = time.monotonic()
             return True
         except Exception as e:
             logger.error(f"Failed to connect to Blender: {str(e)}")
             self.sock = None
             return False
+
+    def _negotiate_protocol(self) -> int:
+        """Ask the addon to switch to framed messages, falling back to raw JSON"""
+        self.sock.sendall(json.dumps(negotiation_command()).encode('utf-8'))
+        response = json.loads(self.receive_full_response(self.sock).decode('utf-8'))
+        if response.get("status") != "success":
+            # Addons predating the framed protocol don't know the command
+            logger.info("Blender addon does not support framing, using legacy JSON protocol")
+            return LEGACY_PROTOCOL_VERSION
+        version = response.get("result", {}).get("protocol_version", LEGACY_PROTOCOL_VERSION)
+        self.capabilities = response.get("result", {}).get("capabilities", {})
+        logger.info(f"Negotiated protocol version {version} with Blender")
+        return version
     
     def disconnect(self):
         """Disconnect from the Blender addon"""
         if self.sock:
+            sock = self.sock
+            self.sock = None
             try:
-                self.sock.close()
+                sock.close()
             except Exception as e:
                 logger.error(f"Error disconnecting from Blender: {str(e)}")
             finally:
+                self.protocol_version = LEGACY_PROTOCOL_VERSION
+                self.scene_changes = None
+                self._fail_pending(ConnectionError("Disconnected from Blender"))
+
+    def _reader_loop(self, sock: socket.socket):
+        """Route framed responses to the commands waiting for them"""
+        try:
+            while True:
+                stats = {}
+                response = recv_frame(sock, stats)
+                received = time.perf_counter()
+                self.last_activity = time.monotonic()
+                if "event" in response:
+                    self.metrics.record(f"event:{response['event']}", "receive", stats["seconds"])
+                    self.metrics.record(f"event:{response['event']}", "bytes_in", stats["bytes"])
+                    self._handle_event(response)
+                    continue
+                request_id = response.get("id")
+                with self._pending_lock:
+                    future = self._pending.pop(request_id, None)
+                    self._progress_callbacks.pop(request_id, None)
+                    request = self._requests.pop(request_id, None)
+                if request is not None:
+                    command_type, sent = request
+                    self.metrics.record(command_type, "round_trip", received - sent)
+                    self.metrics.record(command_type, "receive", stats["seconds"])
+                    self.metrics.record(command_type, "bytes_in", stats["bytes"])
+                if future is None:
+                    # The caller already gave up on this request
+                    logger.warning(f"Dropping response for unknown request id {request_id}")
+                    continue
+                future.set_result(response)
+        except Exception as e:
+            if self.sock is sock:
+                logger.error(f"Connection to Blender lost: {str(e)}")
                 self.sock = None
+                self.scene_changes = None
+                self._fail_pending(ConnectionError(f"Connection to Blender lost: {str(e)}"))
+
+    def _handle_event(self, event: Dict[str, Any]):
+        """Handle a message the addon pushed without being asked"""
+        if event["event"] == "capabilities":
+            self.capabilities = event.get("capabilities", {})
+            logger.info(f"Blender capabilities updated: {self.capabilities}")
+        elif event["event"] == "scene_changes":
+            mirror = self.scene_changes
+            if mirror is not None:
+                mirror.apply(event)
+        elif event["event"] == "progress":
+            with self._pending_lock:
+                callback = self._progress_callbacks.get(event.get("request_id"))
+            if callback is not None:
+                try:
+                    callback(event)
+                except Exception as e:
+                    logger.warning(f"Progress callback failed: {str(e)}")
+        else:
+            logger.warning(f"Ignoring unknown event from Blender: {event['event']}")
+
+    def subscribe_scene_changes(self) -> SceneChangeMirror | None:
+        """Ask Blender to push scene changes and return the local mirror they keep up to date"""
+        if self.scene_changes is not None:
+            return self.scene_changes
+        if self.protocol_version == LEGACY_PROTOCOL_VERSION or self._scene_push_unsupported:
+            return None
+        # Events can arrive before the reply, so the mirror must exist first
+        mirror = self.scene_changes = SceneChangeMirror()
+        try:
+            result = self.send_command("subscribe_scene_changes", {"enabled": True})
+        except Exception as e:
+            self.scene_changes = None
+            if str(e).startswith("Unknown command type"):
+                # Addons without push support only answer get_scene_changes
+                logger.info(f"Blender does not push scene changes: {str(e)}")
+                self._scene_push_unsupported = True
+            else:
+                # Try again on the next call rather than giving up on push for good
+                logger.warning(f"Could not subscribe to scene changes: {str(e)}")
+            return None
+        mirror.start(result.get("version", 0))
+        return mirror
+
+    def is_alive(self) -> bool:
+        """Check the connection, probing it with a heartbeat only if it has been idle"""
+        if not self.sock:
+            return False
+        if time.monotonic() - self.last_activity < HEARTBEAT_INTERVAL:
+            return True
+        return self.ping()
+
+    def ping(self, timeout: float = HEARTBEAT_TIMEOUT) -> bool:
+        """Send a heartbeat the addon answers from its socket thread, without a main-thread hop"""
+        if self.protocol_version == LEGACY_PROTOCOL_VERSION:
+            # Legacy addons have no heartbeat; any response proves the socket works
+            try:
+                self.send_command("get_polyhaven_status")
+                return True
+            except Exception:
+                return False
+        try:
+            request_id, future = self._submit_command("ping")
+            self._wait_for_response(request_id, future, timeout=timeout)
+            return True
+        except Exception as e:
+            logger.warning(f"Heartbeat to Blender failed: {str(e)}")
+            self.disconnect()
+            return False
+
+    def _fail_pending(self, error: Exception):
+        """Fail every command still waiting for a response"""
+        with self._pending_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+            self._progress_callbacks.clear()
+            self._requests.clear()
+        for future in pending:
+            future.set_exception(error)
+
+    def _submit_command(self, command_type: str, params: Dict[str, Any] = None,
+                        attachments: Dict[str, Dict[str, Any]] = None,
+                        on_progress: Callable[[Dict[str, Any]], None] = None) -> Tuple[int, Future]:
+        """Write a framed command tagged with a fresh request id without waiting for the reply"""
+        request_id = next(self._request_ids)
+        future = Future()
+        # Register before sending so a fast response can't beat us to the table
+        with self._pending_lock:
+            self._pending[request_id] = future
+            if on_progress is not None:
+                self._progress_callbacks[request_id] = on_progress
+        command = {
+            "id": request_id,
+            "type": command_type,
+            "params": params or {}
+        }
+        try:
+            sock = self.sock
+            if sock is None:
+                raise ConnectionError("Not connected to Blender")
+            started = time.perf_counter()
+            frame = encode_frame(command, attachments)
+            self.metrics.record(command_type, "serialize", time.perf_counter() - started)
+            self.metrics.record(command_type, "bytes_out", len(frame))
+            with self._pending_lock:
+                self._requests[request_id] = (command_type, started)
+            with self._send_lock:
+                sock.sendall(frame)
+        except Exception:
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+                self._progress_callbacks.pop(request_id, None)
+                self._requests.pop(request_id, None)
+            raise
+        return request_id, future
+
+    def _wait_for_response(self, request_id: int, future: Future, timeout: float = DEFAULT_COMMAND_TIMEOUT) -> Dict[str, Any]:
+        """Wait for the response to a submitted command"""
+        try:
+            return future.result(timeout=timeout)
+        except FutureTimeoutError:
+            # Forget the request; a late response will be dropped by the reader
+            with self._pending_lock:
+                self._pending.pop(request_id, None)
+                self._progress_callbacks.pop(request_id, None)
+                self._requests.pop(request_id, None)
+            raise TimeoutError(f"No response to request {request_id} after {timeout} seconds")
+
+    @staticmethod
+    def _unwrap_response(response: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the command result, raising if Blender reported an error"""
+        logger.info(f"Response parsed, status: {response.get('status', 'unknown')}")
+        if response.get("status") == "error":
+            logger.error(f"Blender error: {response.get('message')}")
+            raise Exception(response.get("message", "Unknown error from Blender"))
+        result = response.get("result", {})
+        if response.get("attachments") and isinstance(result, dict):
+            result["attachments"] = response["attachments"]
+        return result
 
     def receive_full_response(self, sock, buffer_size=8192):
         """Receive the complete response, potentially in multiple chunks"""
@@ -105,22 +422,113 @@ class BlenderConnection:
         else:
             raise Exception("No data received")
 
-    def send_command(self, command_type: str, params: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Send a command to Blender and return the response"""
+    def send_command(self, command_type: str, params: Dict[str, Any] = None,
+                     attachments: Dict[str, Dict[str, Any]] = None,
+                     on_progress: Callable[[Dict[str, Any]], None] = None,
+                     timeout: float = None) -> Dict[str, Any]:
+        """
+        Send a command to Blender and return the response.
+        
+        ``attachments`` maps a name to ``{"dtype", "shape", "data"}`` binary buffers sent
+        alongside the params. Binary buffers in the response show up the same way under
+        ``result["attachments"]``. ``on_progress`` is called from the reader thread with
+        each progress event Blender sends while the command runs (framed protocol only).
+        ``timeout`` overrides the command's entry in COMMAND_TIMEOUTS.
+        """
+        if not self.sock and not self.connect():
+            raise ConnectionError("Not connected to Blender")
+        
+        if self.protocol_version == LEGACY_PROTOCOL_VERSION:
+            with self._send_lock:
+                return self._send_command_legacy(command_type, params, attachments)
+        
+        try:
+            logger.info(f"Sending command: {command_type} with params: {params}")
+            try:
+                request_id, future = self._submit_command(command_type, params, attachments, on_progress)
+            except (ConnectionError, OSError) as e:
+                # The command never left, so it is safe to reconnect and resend once
+                logger.warning(f"Send failed, reconnecting to Blender: {str(e)}")
+                self.disconnect()
+                if not self.connect():
+                    raise
+                if self.protocol_version == LEGACY_PROTOCOL_VERSION:
+                    with self._send_lock:
+                        return self._send_command_legacy(command_type, params, attachments)
+                request_id, future = self._submit_command(command_type, params, attachments, on_progress)
+            response = self._wait_for_response(
+                request_id, future, timeout or COMMAND_TIMEOUTS.get(command_type, DEFAULT_COMMAND_TIMEOUT)
+            )
+        except TimeoutError:
+            logger.error("Timeout while waiting for response from Blender")
+            raise Exception("Timeout waiting for Blender response - try simplifying your request")
+        except (ConnectionError, OSError) as e:
+            logger.error(f"Socket connection error: {str(e)}")
+            self.disconnect()
+            raise Exception(f"Connection to Blender lost: {str(e)}")
+        return self._unwrap_response(response)
+
+    def send_commands(self, commands: List[Tuple[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Pipeline several commands over the connection and return their results in order.
+        
+        Every command is written before any response is awaited, so the round trips
+        overlap instead of adding up. A failed command yields {"error": message} in its slot.
+        """
         if not self.sock and not self.connect():
             raise ConnectionError("Not connected to Blender")
         
+        if self.protocol_version == LEGACY_PROTOCOL_VERSION:
+            # Legacy responses carry no id, so commands have to go one at a time
+            results = []
+            for command_type, params in commands:
+                try:
+                    results.append(self.send_command(command_type, params))
+                except Exception as e:
+                    results.append({"error": str(e)})
+            return results
+        
+        logger.info(f"Pipelining {len(commands)} commands")
+        submitted = []
+        try:
+            for command_type, params in commands:
+                submitted.append(self._submit_command(command_type, params))
+        except (ConnectionError, OSError) as e:
+            logger.error(f"Socket connection error: {str(e)}")
+            self.disconnect()
+            raise Exception(f"Connection to Blender lost: {str(e)}")
+        
+        results = []
+        for (command_type, _params), (request_id, future) in zip(commands, submitted):
+            try:
+                timeout = COMMAND_TIMEOUTS.get(command_type, DEFAULT_COMMAND_TIMEOUT)
+                results.append(self._unwrap_response(self._wait_for_response(request_id, future, timeout)))
+            except TimeoutError:
+                results.append({"error": "Timeout waiting for Blender response"})
+            except Exception as e:
+                results.append({"error": str(e)})
+        return results
+
+    def _send_command_legacy(self, command_type: str, params: Dict[str, Any] = None,
+                             attachments: Dict[str, Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Send a raw JSON command and block until the whole response has arrived"""
         command = {
             "type": command_type,
             "params": params or {}
         }
+        if attachments:
+            command["attachments"] = encode_inline_attachments(attachments)
         
         try:
             # Log the command being sent
             logger.info(f"Sending command: {command_type} with params: {params}")
             
             # Send the command
-            self.sock.sendall(json.dumps(command).encode('utf-8'))
+            started = time.perf_counter()
+            data = json.dumps(command).encode('utf-8')
+            self.metrics.record(command_type, "serialize", time.perf_counter() - started)
+            self.metrics.record(command_type, "bytes_out", len(data))
+            self.sock.sendall(data)
             logger.info(f"Command sent, waiting for response...")
             
             # Set a timeout for receiving - use the same timeout as in receive_full_response
@@ -129,15 +537,14 @@ class BlenderConnection:
             # Receive the response using the improved receive_full_response method
             response_data = self.receive_full_response(self.sock)
             logger.info(f"Received {len(response_data)} bytes of data")
+            self.metrics.record(command_type, "round_trip", time.perf_counter() - started)
+            self.metrics.record(command_type, "bytes_in", len(response_data))
             
             response = json.loads(response_data.decode('utf-8'))
-            logger.info(f"Response parsed, status: {response.get('status', 'unknown')}")
-            
-            if response.get("status") == "error":
-                logger.error(f"Blender error: {response.get('message')}")
-                raise Exception(response.get("message", "Unknown error from Blender"))
-            
-            return response.get("result", {})
+            if response.get("attachments"):
+                response["attachments"] = decode_inline_attachments(response["attachments"])
+            self.last_activity = time.monotonic()
+            return self._unwrap_response(response)
         except socket.timeout:
             logger.error("Socket timeout while waiting for response from Blender")
             # Don't try to reconnect here - let the get_blender_connection handle reconnection
@@ -201,28 +608,24 @@ mcp = FastMCP(
 
 # Global connection for resources (since resources can't access context)
 _blender_connection = None
-_polyhaven_enabled = False  # Add this global variable
 
 def get_blender_connection():
     """Get or create a persistent Blender connection"""
-    global _blender_connection, _polyhaven_enabled  # Add _polyhaven_enabled to globals
+    global _blender_connection
     
-    # If we have an existing connection, check if it's still valid
+    # Reuse the existing connection while it is alive. Framed connections notice
+    # a dead socket on their reader thread; idle ones get a cheap heartbeat.
     if _blender_connection is not None:
-        try:
-            # First check if PolyHaven is enabled by sending a ping command
-            result = _blender_connection.send_command("get_polyhaven_status")
-            # Store the PolyHaven status globally
-            _polyhaven_enabled = result.get("enabled", False)
+        if _blender_connection.is_alive():
+            if _blender_connection.protocol_version == LEGACY_PROTOCOL_VERSION:
+                _refresh_legacy_capabilities(_blender_connection)
             return _blender_connection
-        except Exception as e:
-            # Connection is dead, close it and create a new one
-            logger.warning(f"Existing connection is no longer valid: {str(e)}")
-            try:
-                _blender_connection.disconnect()
-            except:
-                pass
-            _blender_connection = None
+        logger.warning("Existing connection is no longer valid, reconnecting")
+        try:
+            _blender_connection.disconnect()
+        except:
+            pass
+        _blender_connection = None
     
     # Create a new connection if needed
     if _blender_connection is None:
@@ -232,9 +635,70 @@ def get_blender_connection():
             _blender_connection = None
             raise Exception("Could not connect to Blender. Make sure the Blender addon is running.")
         logger.info("Created new persistent connection to Blender")
+        if _blender_connection.protocol_version == LEGACY_PROTOCOL_VERSION:
+            _refresh_legacy_capabilities(_blender_connection)
     
     return _blender_connection
 
+def _refresh_legacy_capabilities(blender: BlenderConnection):
+    """Legacy addons can't push capability changes, so ask for them on every use"""
+    try:
+        result = blender.send_command("get_polyhaven_status")
+        blender.capabilities["polyhaven"] = result.get("enabled", False)
+    except Exception as e:
+        logger.warning(f"Could not refresh Blender capabilities: {str(e)}")
+
+
+async def send_command_with_progress(ctx: Context, command_type: str, params: Dict[str, Any] = None,
+                                    timeout: float = None) -> Dict[str, Any]:
+    """
+    Send a long-running command without blocking the event loop, relaying the
+    progress events Blender sends for it to the MCP client.
+    """
+    # Connecting can block for the whole connect timeout, so keep it off the loop too
+    blender = await asyncio.to_thread(get_blender_connection)
+    loop = asyncio.get_running_loop()
+    
+    def on_progress(event: Dict[str, Any]):
+        logger.info(f"{command_type} progress: {event.get('progress')}/{event.get('total')} {event.get('message') or ''}")
+        asyncio.run_coroutine_threadsafe(ctx.report_progress(event.get("progress", 0), event.get("total")), loop)
+    
+    return await asyncio.to_thread(blender.send_command, command_type, params, None, on_progress, timeout)
+
+
+# Formatted tool output by tool arguments, with the cache_key of the Blender
+# response it was made from
+FORMATTED_RESULTS_LIMIT = 64
+_formatted_results: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+_formatted_results_lock = threading.Lock()
+
+def send_cached_command(command_type: str, params: Dict[str, Any], format_result: Callable[[Dict[str, Any]], str]) -> str:
+    """
+    Send a command whose responses Blender caches and format the result, reusing
+    the text from last time when Blender reports the response is unchanged.
+    """
+    blender = get_blender_connection()
+    args_key = json.dumps([command_type, params], sort_keys=True)
+    with _formatted_results_lock:
+        known = _formatted_results.get(args_key)
+    
+    result = blender.send_command(command_type, dict(params, known_cache_key=known[0]) if known else params)
+    cache_key = result.get("cache_key")
+    if known and (result.get("not_modified") or cache_key == known[0]):
+        with _formatted_results_lock:
+            if args_key in _formatted_results:
+                _formatted_results.move_to_end(args_key)
+        return known[1]
+    
+    output = format_result(result)
+    if cache_key and "error" not in result:
+        with _formatted_results_lock:
+            _formatted_results[args_key] = (cache_key, output)
+            _formatted_results.move_to_end(args_key)
+            while len(_formatted_results) > FORMATTED_RESULTS_LIMIT:
+                _formatted_results.popitem(last=False)
+    return output
+
 
 @mcp.tool()
 def get_scene_info(ctx: Context) -> str:
@@ -249,6 +713,76 @@ def get_scene_info(ctx: Context) -> str:
         logger.error(f"Error getting scene info from Blender: {str(e)}")
         return f"Error getting scene info: {str(e)}"
 
+@mcp.tool()
+def get_scene_changes(ctx: Context, since_version: int = 0, include_data: bool = False) -> str:
+    """
+    Get what changed in the Blender scene since a previous call, instead of fetching the whole scene again.
+    
+    Parameters:
+    - since_version: The "version" returned by the previous call (0 the first time)
+    - include_data: Also return the current type, location, rotation, scale, visibility and parent of changed objects
+    
+    Returns the current version and the objects, materials and collections added, removed or
+    updated since since_version, each once with its latest change ("flags" tell whether the
+    transform, geometry or shading changed). If "reset" is true the version is too old, e.g.
+    another file was loaded: call get_scene_info or query_scene and start over from this version.
+    """
+    try:
+        blender = get_blender_connection()
+        if not include_data:
+            # Once subscribed, Blender pushes its changes and we answer locally
+            mirror = blender.subscribe_scene_changes()
+            result = mirror.changes_since(since_version) if mirror else None
+            if result is not None:
+                return json.dumps(result)
+        result = blender.send_command("get_scene_changes", {
+            "since_version": since_version,
+            "include_data": include_data,
+        })
+        return json.dumps(result)
+    except Exception as e:
+        logger.error(f"Error getting scene changes from Blender: {str(e)}")
+        return f"Error getting scene changes: {str(e)}"
+
+@mcp.tool()
+def query_scene(
+    ctx: Context,
+    cursor: str = None,
+    page_size: int = 500,
+    fields: list[str] = None,
+    types: list[str] = None,
+    collection: str = None,
+    name_glob: str = None
+) -> str:
+    """
+    List the objects in the Blender scene page by page, without get_scene_info's 10-object limit.
+    Pass the returned next_cursor to fetch the following page; it is null after the last page.
+    
+    Parameters:
+    - cursor: next_cursor from the previous page; omit for the first page
+    - page_size: Objects per page (default: 500, max: 10000)
+    - fields: Any of "name", "type", "transform", "parent", "collection", "materials", "bbox",
+      "visibility" (default: name, type, transform)
+    - types: Only include these object types, e.g. ["MESH", "LIGHT"]
+    - collection: Only include objects in this collection (including child collections)
+    - name_glob: Only include objects whose name matches this glob, e.g. "Tree*"
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("query_scene", {
+            "cursor": cursor,
+            "page_size": page_size,
+            "fields": fields,
+            "types": types,
+            "collection": collection,
+            "name_glob": name_glob,
+        })
+        # Pages can be large, so skip the indentation
+        return json.dumps(result)
+    except Exception as e:
+        logger.error(f"Error querying scene in Blender: {str(e)}")
+        return f"Error querying scene: {str(e)}"
+
 @mcp.tool()
 def get_object_info(ctx: Context, object_name: str) -> str:
     """
@@ -268,65 +802,561 @@ def get_object_info(ctx: Context, object_name: str) -> str:
         return f"Error getting object info: {str(e)}"
 
 @mcp.tool()
-def get_viewport_screenshot(ctx: Context, max_size: int = 800) -> Image:
+def get_objects_info(ctx: Context, object_names: list[str]) -> str:
+    """
+    Get detailed information about several objects in the Blender scene at once.
+    Prefer this over repeated get_object_info calls; the lookups are pipelined over one connection.
+
+    Parameters:
+    - object_names: The names of the objects to get information about
+    """
+    try:
+        blender = get_blender_connection()
+        results = blender.send_commands([
+            ("get_object_info", {"name": name}) for name in object_names
+        ])
+
+        return json.dumps(dict(zip(object_names, results)), indent=2)
+    except Exception as e:
+        logger.error(f"Error getting objects info from Blender: {str(e)}")
+        return f"Error getting objects info: {str(e)}"
+
+@mcp.tool()
+def get_bounding_boxes(
+    ctx: Context,
+    object_names: list[str] = None,
+    include_obb: bool = False,
+    include_union: bool = True
+) -> str:
+    """
+    Get world-space bounding boxes for many objects at once. Use this for layout and
+    collision checks instead of calling get_object_info per object.
+    
+    Parameters:
+    - object_names: Objects to measure (default: every object in the scene with geometry)
+    - include_obb: Also return oriented boxes as center, axes (one unit vector per row) and half extents
+    - include_union: Also return the box enclosing all measured objects
+    
+    Each AABB is [[min_x, min_y, min_z], [max_x, max_y, max_z]].
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("get_bounding_boxes", {
+            "names": object_names,
+            "include_obb": include_obb,
+            "include_union": include_union,
+        })
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error getting bounding boxes from Blender: {str(e)}")
+        return f"Error getting bounding boxes: {str(e)}"
+
+@mcp.tool()
+def get_mesh_data(
+    ctx: Context,
+    object_name: str,
+    attributes: list[str] = None,
+    vertex_start: int = 0,
+    vertex_count: int = None,
+    polygon_start: int = 0,
+    polygon_count: int = None,
+    evaluated: bool = False,
+    output_dir: str = None
+) -> str:
+    """
+    Export the geometry of a mesh object as raw binary arrays.
+    
+    Each requested array is written to a little-endian .bin file; the result lists the
+    file path, dtype and shape of each one, ready for numpy.fromfile(path, dtype).reshape(shape).
+    Use the vertex and polygon ranges to page through very large meshes.
+    
+    Parameters:
+    - object_name: The mesh object to export
+    - attributes: Any of "vertices", "normals", "edges", "polygons", "uvs" (default: vertices and polygons)
+    - vertex_start, vertex_count: Range of vertices to return for vertices/normals
+    - polygon_start, polygon_count: Range of polygons to return for polygons/uvs
+    - evaluated: Export the mesh with modifiers applied
+    - output_dir: Directory for the .bin files (default: a blender_mcp_mesh folder in the temp dir)
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("get_mesh_data", {
+            "name": object_name,
+            "attributes": attributes,
+            "vertex_start": vertex_start,
+            "vertex_count": vertex_count,
+            "polygon_start": polygon_start,
+            "polygon_count": polygon_count,
+            "evaluated": evaluated,
+        })
+        
+        output_dir = os.path.realpath(output_dir or os.path.join(tempfile.gettempdir(), "blender_mcp_mesh"))
+        os.makedirs(output_dir, exist_ok=True)
+        files = {}
+        for name, attachment in result.pop("attachments", {}).items():
+            # Object and attachment names come from Blender; keep them from escaping output_dir
+            filename = re.sub(r'[^\w.-]', '_', f"{result.get('name', object_name)}_{name}.bin")
+            path = os.path.realpath(os.path.join(output_dir, filename))
+            if os.path.dirname(path) != output_dir:
+                raise ValueError(f"Refusing to write {filename!r} outside {output_dir}")
+            with open(path, "wb") as f:
+                f.write(attachment["data"])
+            files[name] = {"path": path, "dtype": attachment["dtype"], "shape": attachment["shape"]}
+        result["files"] = files
+        
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error getting mesh data from Blender: {str(e)}")
+        return f"Error getting mesh data: {str(e)}"
+
+def _buffer_attachment(values: list | None, path: str | None, typecode: str, dtype: str, width: int) -> Dict[str, Any] | None:
+    """Pack nested number lists or a raw .bin file into an attachment of rows `width` wide"""
+    if path:
+        with open(path, "rb") as f:
+            data = array(typecode, f.read())
+    elif values:
+        data = array(typecode, (v for row in values for v in row))
+    else:
+        return None
+    if len(data) % width:
+        raise ValueError(f"Buffer of {len(data)} {dtype} values is not a multiple of {width}")
+    return {"dtype": dtype, "shape": [len(data) // width, width], "data": data}
+
+@mcp.tool()
+def create_mesh_from_buffers(
+    ctx: Context,
+    name: str,
+    vertices: list[list[float]] = None,
+    faces: list[list[int]] = None,
+    uvs: list[list[float]] = None,
+    vertices_file: str = None,
+    faces_file: str = None,
+    uvs_file: str = None,
+    face_size: int = 3,
+    collection: str = None,
+    location: list[float] = None,
+    validate: bool = False
+) -> str:
+    """
+    Create a mesh object from vertex, face and UV arrays in one step, without running operators.
+    Much faster than building geometry with bpy.ops in execute_blender_code.
+    
+    Parameters:
+    - name: Name for the new object and mesh
+    - vertices: [[x, y, z], ...] vertex positions
+    - faces: [[i, j, k, ...], ...] vertex indices per face; faces may have different sizes
+    - uvs: [[u, v], ...] one UV per face corner, in face order
+    - vertices_file: Raw float32 .bin file of x, y, z triples, instead of vertices
+    - faces_file: Raw int32 .bin file of vertex indices, face_size per face, instead of faces
+    - uvs_file: Raw float32 .bin file of u, v pairs, instead of uvs
+    - face_size: Corners per face in faces_file (default: 3)
+    - collection: Collection to link the object into (default: the scene collection)
+    - location: Optional [x, y, z] object location
+    - validate: Run mesh validation to repair bad input (slower)
+    """
+    try:
+        attachments = {"vertices": _buffer_attachment(vertices, vertices_file, "f", "float32", 3)}
+        if attachments["vertices"] is None:
+            return "Error: vertices or vertices_file is required"
+        
+        if faces_file:
+            attachments["faces"] = _buffer_attachment(None, faces_file, "i", "int32", face_size)
+        elif faces:
+            loop_total = array("i", (len(face) for face in faces))
+            loop_vertex = array("i", (index for face in faces for index in face))
+            attachments["polygon_loop_total"] = {"dtype": "int32", "shape": [len(loop_total)], "data": loop_total}
+            attachments["loop_vertex_index"] = {"dtype": "int32", "shape": [len(loop_vertex)], "data": loop_vertex}
+        
+        uv_attachment = _buffer_attachment(uvs, uvs_file, "f", "float32", 2)
+        if uv_attachment is not None:
+            attachments["uvs"] = uv_attachment
+        
+        blender = get_blender_connection()
+        result = blender.send_command("create_mesh_from_buffers", {
+            "name": name,
+            "collection": collection,
+            "location": location,
+            "validate": validate,
+        }, attachments)
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error creating mesh in Blender: {str(e)}")
+        return f"Error creating mesh: {str(e)}"
+
+@mcp.tool()
+def get_viewport_screenshot(ctx: Context, max_size: int = 800, format: str = "png", quality: int = 90) -> Image:
     """
     Capture a screenshot of the current Blender 3D viewport.
     
     Parameters:
     - max_size: Maximum size in pixels for the largest dimension (default: 800)
+    - format: Image format, "png", "jpeg" or "webp" (default: "png"). jpeg and webp are much smaller.
+    - quality: Compression quality for jpeg and webp, 1-100 (default: 90)
     
     Returns the screenshot as an Image.
     """
     try:
         blender = get_blender_connection()
         
-        # Create temp file path
-        temp_dir = tempfile.gettempdir()
-        temp_path = os.path.join(temp_dir, f"blender_screenshot_{os.getpid()}.png")
-        
+        # The encoded image comes back as a binary attachment, no file involved
         result = blender.send_command("get_viewport_screenshot", {
             "max_size": max_size,
-            "filepath": temp_path,
-            "format": "png"
+            "format": format,
+            "quality": quality,
         })
         
-        if "error" in result:
+        if "error" in result and result["error"] != "No filepath provided":
             raise Exception(result["error"])
         
-        if not os.path.exists(temp_path):
-            raise Exception("Screenshot file was not created")
+        image = result.get("attachments", {}).get("image")
+        if image is not None:
+            return Image(data=bytes(image["data"]), format=result.get("format", format))
         
-        # Read the file
-        with open(temp_path, 'rb') as f:
-            image_bytes = f.read()
-        
-        # Delete the temp file
-        os.remove(temp_path)
-        
-        return Image(data=image_bytes, format="png")
+        # Older addons can only write the screenshot to a file
+        return _get_viewport_screenshot_file(blender, max_size)
         
     except Exception as e:
         logger.error(f"Error capturing screenshot: {str(e)}")
         raise Exception(f"Screenshot failed: {str(e)}")
 
+def _get_viewport_screenshot_file(blender: BlenderConnection, max_size: int) -> Image:
+    # Create temp file path
+    temp_dir = tempfile.gettempdir()
+    temp_path = os.path.join(temp_dir, f"blender_screenshot_{os.getpid()}.png")
+    
+    result = blender.send_command("get_viewport_screenshot", {
+        "max_size": max_size,
+        "filepath": temp_path,
+        "format": "png"
+    })
+    
+    if "error" in result:
+        raise Exception(result["error"])
+    
+    if not os.path.exists(temp_path):
+        raise Exception("Screenshot file was not created")
+    
+    # Read the file
+    with open(temp_path, 'rb') as f:
+        image_bytes = f.read()
+    
+    # Delete the temp file
+    os.remove(temp_path)
+    
+    return Image(data=image_bytes, format="png")
+
+
+def _format_code_result(result: Dict[str, Any]) -> str:
+    output = f"Code executed successfully: {result.get('result', '')}"
+    if "value" in result:
+        output += f"\nresult = {json.dumps(result['value'])}"
+    return output
 
 @mcp.tool()
-def execute_blender_code(ctx: Context, code: str) -> str:
+def execute_blender_code(ctx: Context, code: str, namespace: str = None, reset_namespace: bool = False) -> str:
     """
     Execute arbitrary Python code in Blender. Make sure to do it step-by-step by breaking it into smaller chunks.
     
     Parameters:
     - code: The Python code to execute
+    - namespace: Optional name of a namespace kept between calls. Imports, helper functions and
+      variables defined in it stay available to later code run in the same namespace, so they
+      don't have to be repeated in every snippet.
+    - reset_namespace: Start the named namespace over from scratch (default False)
+    
+    Assign to `result` to return a JSON value alongside the printed output.
     """
     try:
         # Get the global connection
         blender = get_blender_connection()
-        result = blender.send_command("execute_code", {"code": code})
-        return f"Code executed successfully: {result.get('result', '')}"
+        params = {"code": code}
+        if namespace:
+            params["namespace"] = namespace
+            params["reset_namespace"] = reset_namespace
+        result = blender.send_command("execute_code", params)
+        return _format_code_result(result)
     except Exception as e:
         logger.error(f"Error executing code: {str(e)}")
         return f"Error executing code: {str(e)}"
 
+@mcp.tool()
+def register_code_snippet(
+    ctx: Context,
+    name: str,
+    code: str,
+    params: list[str] = None,
+    defaults: dict = None,
+    namespace: str = None,
+    description: str = ""
+) -> str:
+    """
+    Register Python code under a name so it can be run again with run_code_snippet
+    instead of resending it. Registering an existing name replaces it.
+    
+    Parameters:
+    - name: Name to run the snippet by
+    - code: The Python code. Its parameters are available as variables.
+    - params: Names of the snippet's parameters
+    - defaults: Default values for optional parameters, e.g. {"count": 10}
+    - namespace: Optional execute_blender_code namespace whose helpers the snippet can use.
+      Variables the snippet assigns are not written back to it.
+    - description: What the snippet does, shown by get_code_sessions
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("register_snippet", {
+            "name": name,
+            "code": code,
+            "params": params or [],
+            "defaults": defaults or {},
+            "namespace": namespace,
+            "description": description
+        })
+        if "error" in result:
+            return f"Error: {result['error']}"
+        return f"Registered snippet '{name}' with parameters: {', '.join(result['params']) or 'none'}"
+    except Exception as e:
+        logger.error(f"Error registering snippet: {str(e)}")
+        return f"Error registering snippet: {str(e)}"
+
+@mcp.tool()
+def run_code_snippet(ctx: Context, name: str, params: dict = None) -> str:
+    """
+    Run a snippet registered with register_code_snippet.
+    
+    Parameters:
+    - name: Name of the snippet
+    - params: Values for the snippet's parameters, e.g. {"count": 20}
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("run_snippet", {"name": name, "params": params or {}})
+        if "error" in result:
+            return f"Error: {result['error']}"
+        return _format_code_result(result)
+    except Exception as e:
+        logger.error(f"Error running snippet: {str(e)}")
+        return f"Error running snippet: {str(e)}"
+
+# Longest Blender lets get_code_job wait for a job
+CODE_JOB_MAX_WAIT = 600.0
+
+def _format_code_job(status: Dict[str, Any]) -> str:
+    output = f"Code job {status['job_id']}: {status['state']}"
+    if status.get("progress") is not None:
+        output += f", progress {status['progress']}" + (f"/{status['total']}" if status.get("total") is not None else "")
+    output += f" after {status['steps']} steps over {status['ticks']} UI ticks\n"
+    if status.get("message"):
+        output += f"Message: {status['message']}\n"
+    if status.get("error"):
+        output += f"Error: {status['error']}\n"
+    if status["state"] == "done" and status.get("value") is not None:
+        output += f"Returned: {json.dumps(status['value'])}\n"
+    if status.get("output"):
+        output += f"Output:\n{status['output']}"
+        if not status["output"].endswith("\n"):
+            output += "\n"
+    output += f"(output_length: {status['output_length']})"
+    return output
+
+@mcp.tool()
+async def start_blender_code_job(
+    ctx: Context,
+    code: str,
+    namespace: str = None,
+    time_budget_ms: int = 50,
+    wait_seconds: int = 0
+) -> str:
+    """
+    Run long Python code in Blender as a background job that doesn't freeze Blender's UI
+    or hit the command timeout, e.g. when creating thousands of objects.
+    
+    The code runs as the body of a generator: put `yield` inside its loops. Blender runs the
+    job until time_budget_ms is used up, then continues from the last yield on the next UI
+    tick. `yield (done, total)` or `yield done` reports progress, `yield "text"` reports a
+    message. Use `return value` to hand back a JSON value. Variables assigned by the job
+    stay local to it.
+    
+    Parameters:
+    - code: The Python code to run
+    - namespace: Optional execute_blender_code namespace whose helpers the job can use
+    - time_budget_ms: Main-thread time the job may use per UI tick (default 50)
+    - wait_seconds: Wait up to this many seconds for the job to finish before returning (default 0)
+    
+    Returns the job id. Check on it with get_blender_code_job, stop it with cancel_blender_code_job.
+    """
+    try:
+        blender = await asyncio.to_thread(get_blender_connection)
+        params = {"code": code, "time_budget_ms": time_budget_ms}
+        if namespace:
+            params["namespace"] = namespace
+        result = await asyncio.to_thread(blender.send_command, "start_code_job", params)
+        if "error" in result:
+            return f"Error: {result['error']}"
+        
+        status = await send_command_with_progress(
+            ctx, "get_code_job", {"job_id": result["job_id"], "wait": wait_seconds},
+            timeout=min(float(wait_seconds), CODE_JOB_MAX_WAIT) + DEFAULT_COMMAND_TIMEOUT
+        )
+        return _format_code_job(status)
+    except Exception as e:
+        logger.error(f"Error starting code job: {str(e)}")
+        return f"Error starting code job: {str(e)}"
+
+@mcp.tool()
+async def get_blender_code_job(
+    ctx: Context,
+    job_id: int = None,
+    wait_seconds: int = 0,
+    output_offset: int = 0
+) -> str:
+    """
+    Get the state, progress and printed output of a job started with start_blender_code_job.
+    
+    Parameters:
+    - job_id: The job id. Without it, returns a summary of all recent jobs.
+    - wait_seconds: Wait up to this many seconds for the job to finish before returning (default 0, at most 600)
+    - output_offset: Only return output printed after this many characters, pass the previous
+      output_length to get just the new output (default 0)
+    
+    Job states are "running", "done", "failed" (see its error) and "cancelled".
+    """
+    try:
+        params = {"wait": wait_seconds, "output_offset": output_offset}
+        if job_id is not None:
+            params["job_id"] = job_id
+        result = await send_command_with_progress(
+            ctx, "get_code_job", params, timeout=min(float(wait_seconds), CODE_JOB_MAX_WAIT) + DEFAULT_COMMAND_TIMEOUT
+        )
+        if "error" in result:
+            return f"Error: {result['error']}"
+        if job_id is None:
+            return json.dumps(result, indent=2)
+        return _format_code_job(result)
+    except Exception as e:
+        logger.error(f"Error getting code job: {str(e)}")
+        return f"Error getting code job: {str(e)}"
+
+@mcp.tool()
+def cancel_blender_code_job(ctx: Context, job_id: int) -> str:
+    """
+    Cancel a job started with start_blender_code_job. It stops at its next yield; the
+    changes it already made to the scene are kept.
+    
+    Parameters:
+    - job_id: The job id
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("cancel_code_job", {"job_id": job_id})
+        if "error" in result:
+            return f"Error: {result['error']}"
+        return f"Cancelling code job {job_id}"
+    except Exception as e:
+        logger.error(f"Error cancelling code job: {str(e)}")
+        return f"Error cancelling code job: {str(e)}"
+
+@mcp.tool()
+def get_code_sessions(ctx: Context) -> str:
+    """
+    List the persistent code namespaces with the names defined in them, the registered
+    snippets with their parameters, and how often compiled code was reused.
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("get_code_sessions")
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error getting code sessions: {str(e)}")
+        return f"Error getting code sessions: {str(e)}"
+
+@mcp.tool()
+def execute_batch(
+    ctx: Context,
+    commands: list[dict],
+    stop_on_error: bool = False,
+    time_budget_ms: int = 50
+) -> str:
+    """
+    Execute many Blender commands in one round trip, e.g. when building a scene out of hundreds of objects.
+    
+    Parameters:
+    - commands: Ordered list of commands, each {"type": <command>, "params": {...}},
+      e.g. [{"type": "execute_code", "params": {"code": "..."}}, {"type": "get_object_info", "params": {"name": "Cube"}}]
+    - stop_on_error: Stop at the first failing command instead of continuing (default False)
+    - time_budget_ms: Main-thread time Blender may spend per UI tick before yielding (default 50)
+    
+    Asset download and generation commands can't be batched.
+    Returns the per-command results in order.
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("batch", {
+            "commands": commands,
+            "stop_on_error": stop_on_error,
+            "time_budget_ms": time_budget_ms
+        })
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error executing batch: {str(e)}")
+        return f"Error executing batch: {str(e)}"
+
+@mcp.tool()
+def get_bridge_metrics(ctx: Context, format: str = "summary", reset: bool = False, output_path: str = None) -> str:
+    """
+    Show where time goes for each Blender command, measured on both sides of the connection.
+    
+    The MCP server side reports serialize, round_trip and receive times plus bytes_out/bytes_in.
+    The Blender side reports receive, queue (waiting for Blender's main thread), handler,
+    serialize and total times plus bytes_in/bytes_out. Commands are listed slowest first.
+    
+    Parameters:
+    - format: "summary" for per-command counts and mean/p50/p95/p99/max in milliseconds,
+      or "prometheus" for the raw histograms in the Prometheus text format (default: "summary")
+    - reset: Start counting from zero after reading (default: False)
+    - output_path: Also write the Prometheus text to this file, e.g. for a node_exporter textfile collector
+    """
+    try:
+        blender = get_blender_connection()
+        blender_metrics = None
+        try:
+            blender_metrics = blender.send_command("get_bridge_metrics", {"reset": reset})
+        except Exception as e:
+            # Addons predating metrics don't know the command
+            logger.warning(f"Could not get Blender metrics: {str(e)}")
+        server_metrics = blender.metrics.snapshot()
+        if reset:
+            blender.metrics.reset()
+        
+        snapshots = [("server", server_metrics)]
+        if blender_metrics is not None:
+            snapshots.append(("blender", blender_metrics))
+        
+        if output_path or format == "prometheus":
+            text = to_prometheus(snapshots)
+            if output_path:
+                # Written alongside and renamed so collectors never read a partial file
+                tmp_path = f"{output_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(text)
+                os.replace(tmp_path, output_path)
+            if format == "prometheus":
+                return text
+        
+        summary = {
+            side: {
+                "since": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(snapshot["since"])),
+                "commands": summarize(snapshot),
+            }
+            for side, snapshot in snapshots
+        }
+        if blender_metrics is None:
+            summary["blender"] = "Not available, update the Blender addon to collect its side"
+        return json.dumps(summary, indent=2)
+    except Exception as e:
+        logger.error(f"Error getting bridge metrics: {str(e)}")
+        return f"Error getting bridge metrics: {str(e)}"
+
 @mcp.tool()
 def get_polyhaven_categories(ctx: Context, asset_type: str = "hdris") -> str:
     """
@@ -337,7 +1367,7 @@ def get_polyhaven_categories(ctx: Context, asset_type: str = "hdris") -> str:
     """
     try:
         blender = get_blender_connection()
-        if not _polyhaven_enabled:
+        if not blender.capabilities.get("polyhaven", False):
             return "PolyHaven integration is disabled. Select it in the sidebar in BlenderMCP, then run it again."
         result = blender.send_command("get_polyhaven_categories", {"asset_type": asset_type})
         
@@ -363,14 +1393,23 @@ def get_polyhaven_categories(ctx: Context, asset_type: str = "hdris") -> str:
 def search_polyhaven_assets(
     ctx: Context,
     asset_type: str = "all",
-    categories: str = None
+    categories: str = None,
+    query: str = None,
+    sort: str = None,
+    offset: int = 0,
+    limit: int = 20
 ) -> str:
     """
     Search for assets on Polyhaven with optional filtering.
+    The catalog is cached in Blender, so repeated searches and paging are cheap.
     
     Parameters:
     - asset_type: Type of assets to search for (hdris, textures, models, all)
-    - categories: Optional comma-separated list of categories to filter by
+    - categories: Optional comma-separated list of categories the assets must all be in
+    - query: Optional free-text search over asset names, tags and categories, e.g. "rocky ground"
+    - sort: relevance, downloads, name or date (default: relevance with a query, downloads without)
+    - offset: Number of results to skip, for paging
+    - limit: Maximum number of results to return (default: 20)
     
     Returns a list of matching assets with basic information.
     """
@@ -378,7 +1417,11 @@ def search_polyhaven_assets(
         blender = get_blender_connection()
         result = blender.send_command("search_polyhaven_assets", {
             "asset_type": asset_type,
-            "categories": categories
+            "categories": categories,
+            "query": query,
+            "sort": sort,
+            "offset": offset,
+            "limit": limit
         })
         
         if "error" in result:
@@ -388,14 +1431,24 @@ def search_polyhaven_assets(
         assets = result["assets"]
         total_count = result["total_count"]
         returned_count = result["returned_count"]
+        offset = result.get("offset", 0)
         
         formatted_output = f"Found {total_count} assets"
+        if query:
+            formatted_output += f" matching '{query}'"
         if categories:
             formatted_output += f" in categories: {categories}"
-        formatted_output += f"\nShowing {returned_count} assets:\n\n"
+        formatted_output += f"\nShowing {returned_count} assets"
+        if returned_count:
+            formatted_output += f" ({offset + 1}-{offset + returned_count})"
+        formatted_output += ":\n\n"
         
-        # Sort assets by download count (popularity)
-        sorted_assets = sorted(assets.items(), key=lambda x: x[1].get("download_count", 0), reverse=True)
+        if "sort" in result:
+            # Already ranked by Blender
+            sorted_assets = list(assets.items())
+        else:
+            # Older addons return the first page unsorted; sort by download count (popularity)
+            sorted_assets = sorted(assets.items(), key=lambda x: x[1].get("download_count", 0), reverse=True)
         
         for asset_id, asset_data in sorted_assets:
             formatted_output += f"- {asset_data.get('name', asset_id)} (ID: {asset_id})\n"
@@ -403,13 +1456,16 @@ def search_polyhaven_assets(
             formatted_output += f"  Categories: {', '.join(asset_data.get('categories', []))}\n"
             formatted_output += f"  Downloads: {asset_data.get('download_count', 'Unknown')}\n\n"
         
+        if offset + returned_count < total_count:
+            formatted_output += f"More results available, use offset={offset + returned_count} to see the next page.\n"
+        
         return formatted_output
     except Exception as e:
         logger.error(f"Error searching Polyhaven assets: {str(e)}")
         return f"Error searching Polyhaven assets: {str(e)}"
 
 @mcp.tool()
-def download_polyhaven_asset(
+async def download_polyhaven_asset(
     ctx: Context,
     asset_id: str,
     asset_type: str,
@@ -428,8 +1484,7 @@ def download_polyhaven_asset(
     Returns a message indicating success or failure.
     """
     try:
-        blender = get_blender_connection()
-        result = blender.send_command("download_polyhaven_asset", {
+        result = await send_command_with_progress(ctx, "download_polyhaven_asset", {
             "asset_id": asset_id,
             "asset_type": asset_type,
             "resolution": resolution,
@@ -467,6 +1522,7 @@ def set_texture(
 ) -> str:
     """
     Apply a previously downloaded Polyhaven texture to an object.
+    Objects given the same texture share one material, so edits to it apply to all of them.
     
     Parameters:
     - object_name: Name of the object to apply the texture to
@@ -569,11 +1625,69 @@ def get_sketchfab_status(ctx: Context) -> str:
         message = result.get("message", "")
         if enabled:
             message += "Sketchfab is good at Realistic models, and has a wider variety of models than PolyHaven."        
+        cache = result.get("cache")
+        if cache:
+            for name, stats in cache.items():
+                hit_rate = stats.get("hit_rate")
+                hit_rate = f"{hit_rate:.0%}" if hit_rate is not None else "n/a"
+                message += (
+                    f"\nCached {name} responses: {stats.get('entries', 0)}, hit rate {hit_rate} "
+                    f"({stats.get('hits', 0)} hits, {stats.get('coalesced', 0)} shared, {stats.get('misses', 0)} misses)"
+                )
         return message
     except Exception as e:
         logger.error(f"Error checking Sketchfab status: {str(e)}")
         return f"Error checking Sketchfab status: {str(e)}"
 
+@mcp.tool()
+def get_asset_cache_status(ctx: Context) -> str:
+    """
+    Show the local cache of downloaded Poly Haven, Sketchfab and Hyper3D assets:
+    where it lives, how full it is, and its hit/miss counts since Blender started.
+    Assets already in the cache are imported again without downloading them.
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("get_asset_cache_status")
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error getting asset cache status: {str(e)}")
+        return f"Error getting asset cache status: {str(e)}"
+
+@mcp.tool()
+def dedupe_images(ctx: Context, dry_run: bool = False) -> str:
+    """
+    Merge duplicate images in the Blender file, for example a texture that was
+    downloaded twice. Images loaded from identical bytes with the same color space
+    are collapsed into one, and every material using a removed copy is switched
+    to the kept image.
+    
+    Parameters:
+    - dry_run: Only report the duplicates without removing anything (default: False)
+    
+    Returns which images were merged and how many packed bytes were reclaimed.
+    """
+    try:
+        blender = get_blender_connection()
+        result = blender.send_command("dedupe_images", {"dry_run": dry_run})
+        
+        if "error" in result:
+            return f"Error: {result['error']}"
+        
+        groups = result.get("groups", [])
+        if not groups:
+            return f"No duplicate images found among {result.get('images_scanned', 0)} images."
+        
+        verb = "Would remove" if dry_run else "Removed"
+        output = (f"{verb} {result['images_removed']} duplicate images, "
+                  f"reclaiming {result['bytes_reclaimed'] / (1024 * 1024):.1f} MiB of packed data.\n\n")
+        for group in groups:
+            output += f"- Kept {group['kept']} ({group['colorspace']}), merged: {', '.join(group['removed'])}\n"
+        return output
+    except Exception as e:
+        logger.error(f"Error deduplicating images: {str(e)}")
+        return f"Error deduplicating images: {str(e)}"
+
 @mcp.tool()
 def search_sketchfab_models(
     ctx: Context,
@@ -595,62 +1709,100 @@ def search_sketchfab_models(
     """
     try:
         
-        blender = get_blender_connection()
         logger.info(f"Searching Sketchfab models with query: {query}, categories: {categories}, count: {count}, downloadable: {downloadable}")
-        result = blender.send_command("search_sketchfab_models", {
+        return send_cached_command("search_sketchfab_models", {
             "query": query,
             "categories": categories,
             "count": count,
             "downloadable": downloadable
-        })
-        
-        if "error" in result:
-            logger.error(f"Error from Sketchfab search: {result['error']}")
-            return f"Error: {result['error']}"
-        
-        # Safely get results with fallbacks for None
-        if result is None:
-            logger.error("Received None result from Sketchfab search")
-            return "Error: Received no response from Sketchfab search"
-            
-        # Format the results
-        models = result.get("results", []) or []
-        if not models:
-            return f"No models found matching '{query}'"
-            
-        formatted_output = f"Found {len(models)} models matching '{query}':\n\n"
-        
-        for model in models:
-            if model is None:
-                continue
-                
-            model_name = model.get("name", "Unnamed model")
-            model_uid = model.get("uid", "Unknown ID")
-            formatted_output += f"- {model_name} (UID: {model_uid})\n"
-            
-            # Get user info with safety checks
-            user = model.get("user") or {}
-            username = user.get("username", "Unknown author") if isinstance(user, dict) else "Unknown author"
-            formatted_output += f"  Author: {username}\n"
-            
-            # Get license info with safety checks
-            license_data = model.get("license") or {}
-            license_label = license_data.get("label", "Unknown") if isinstance(license_data, dict) else "Unknown"
-            formatted_output += f"  License: {license_label}\n"
-            
-            # Add face count and downloadable status
-            face_count = model.get("faceCount", "Unknown")
-            is_downloadable = "Yes" if model.get("isDownloadable") else "No"
-            formatted_output += f"  Face count: {face_count}\n"
-            formatted_output += f"  Downloadable: {is_downloadable}\n\n"
-        
-        return formatted_output
+        }, lambda result: _format_sketchfab_search(query, result))
     except Exception as e:
         logger.error(f"Error searching Sketchfab models: {str(e)}")
         import traceback
         logger.error(traceback.format_exc())
         return f"Error searching Sketchfab models: {str(e)}"
 
+def _format_sketchfab_search(query: str, result: Dict[str, Any]) -> str:
+    """Render a Sketchfab search response as the text returned to the client"""
+    if "error" in result:
+        logger.error(f"Error from Sketchfab search: {result['error']}")
+        return f"Error: {result['error']}"
+    
+    # Safely get results with fallbacks for None
+    if result is None:
+        logger.error("Received None result from Sketchfab search")
+        return "Error: Received no response from Sketchfab search"
+        
+    # Format the results
+    models = result.get("results", []) or []
+    if not models:
+        return f"No models found matching '{query}'"
+        
+    formatted_output = f"Found {len(models)} models matching '{query}':\n\n"
+    
+    for model in models:
+        if model is None:
+            continue
+            
+        model_name = model.get("name", "Unnamed model")
+        model_uid = model.get("uid", "Unknown ID")
+        formatted_output += f"- {model_name} (UID: {model_uid})\n"
+        
+        # Get user info with safety checks
+        user = model.get("user") or {}
+        username = user.get("username", "Unknown author") if isinstance(user, dict) else "Unknown author"
+        formatted_output += f"  Author: {username}\n"
+        
+        # Get license info with safety checks
+        license_data = model.get("license") or {}
+        license_label = license_data.get("label", "Unknown") if isinstance(license_data, dict) else "Unknown"
+        formatted_output += f"  License: {license_label}\n"
+        
+        # Add face count and downloadable status
+        face_count = model.get("faceCount", "Unknown")
+        is_downloadable = "Yes" if model.get("isDownloadable") else "No"
+        formatted_output += f"  Face count: {face_count}\n"
+        formatted_output += f"  Downloadable: {is_downloadable}\n\n"
+    
+    return formatted_output
+
+@mcp.tool()
+def get_sketchfab_model_details(ctx: Context, uid: str) -> str:
+    """
+    Get the details of a Sketchfab model by its UID: author, license, face and
+    vertex counts, and the archive formats available for download.
+    
+    Parameters:
+    - uid: The unique identifier of the Sketchfab model
+    """
+    try:
+        return send_cached_command("get_sketchfab_model_details", {"uid": uid}, _format_sketchfab_model)
+    except Exception as e:
+        logger.error(f"Error getting Sketchfab model details: {str(e)}")
+        return f"Error getting Sketchfab model details: {str(e)}"
+
+def _format_sketchfab_model(model: Dict[str, Any]) -> str:
+    """Render a Sketchfab model details response as the text returned to the client"""
+    if "error" in model:
+        return f"Error: {model['error']}"
+    
+    user = model.get("user") or {}
+    license_data = model.get("license") or {}
+    archives = model.get("archives") or {}
+    formatted_output = f"{model.get('name', 'Unnamed model')} (UID: {model.get('uid', 'Unknown ID')})\n"
+    formatted_output += f"  Author: {user.get('username', 'Unknown author')}\n"
+    formatted_output += f"  License: {license_data.get('label', 'Unknown')}\n"
+    formatted_output += f"  Face count: {model.get('faceCount', 'Unknown')}\n"
+    formatted_output += f"  Vertex count: {model.get('vertexCount', 'Unknown')}\n"
+    formatted_output += f"  Animated: {'Yes' if model.get('animationCount') else 'No'}\n"
+    formatted_output += f"  Downloadable: {'Yes' if model.get('isDownloadable') else 'No'}\n"
+    if archives:
+        formatted_output += f"  Archives: {', '.join(sorted(archives))}\n"
+    description = (model.get("description") or "").strip()
+    if description:
+        formatted_output += f"  Description: {description[:500]}\n"
+    return formatted_output
+
 @mcp.tool()
 def download_sketchfab_model(
     ctx: Context,
@@ -703,6 +1855,26 @@ def _process_bbox(original_bbox: list[float] | list[int] | None) -> list[int] |
         raise ValueError("Incorrect number range: bbox must be bigger than zero!")
     return [int(float(i) / max(original_bbox) * 100) for i in original_bbox] if original_bbox else None
 
+def _load_rodin_images(input_image_paths: list[str] | None, input_image_urls: list[str] | None) -> tuple:
+    """Turn image paths or URLs into the images param of create_rodin_job, returns (images, error)"""
+    if input_image_paths is not None and input_image_urls is not None:
+        return None, f"Error: Conflict parameters given!"
+    if input_image_paths is None and input_image_urls is None:
+        return None, f"Error: No image given!"
+    if input_image_paths is not None:
+        if not all(os.path.exists(i) for i in input_image_paths):
+            return None, "Error: not all image paths are valid!"
+        images = []
+        for path in input_image_paths:
+            with open(path, "rb") as f:
+                images.append(
+                    (Path(path).suffix, base64.b64encode(f.read()).decode("ascii"))
+                )
+        return images, None
+    if not all(urlparse(i).scheme in ("http", "https") for i in input_image_urls):
+        return None, "Error: not all image URLs are valid!"
+    return input_image_urls.copy(), None
+
 @mcp.tool()
 def generate_hyper3d_model_via_text(
     ctx: Context,
@@ -759,23 +1931,9 @@ def generate_hyper3d_model_via_images(
     Only one of {input_image_paths, input_image_urls} should be given at a time, depending on the Hyper3D Rodin's current mode.
     Returns a message indicating success or failure.
     """
-    if input_image_paths is not None and input_image_urls is not None:
-        return f"Error: Conflict parameters given!"
-    if input_image_paths is None and input_image_urls is None:
-        return f"Error: No image given!"
-    if input_image_paths is not None:
-        if not all(os.path.exists(i) for i in input_image_paths):
-            return "Error: not all image paths are valid!"
-        images = []
-        for path in input_image_paths:
-            with open(path, "rb") as f:
-                images.append(
-                    (Path(path).suffix, base64.b64encode(f.read()).decode("ascii"))
-                )
-    elif input_image_urls is not None:
-        if not all(urlparse(i) for i in input_image_paths):
-            return "Error: not all image URLs are valid!"
-        images = input_image_urls.copy()
+    images, error = _load_rodin_images(input_image_paths, input_image_urls)
+    if error:
+        return error
     try:
         blender = get_blender_connection()
         result = blender.send_command("create_rodin_job", {
@@ -838,6 +1996,127 @@ def poll_rodin_job_status(
         logger.error(f"Error generating Hyper3D task: {str(e)}")
         return f"Error generating Hyper3D task: {str(e)}"
 
+@mcp.tool()
+def generate_hyper3d_models(
+    ctx: Context,
+    jobs: list[dict],
+    max_concurrent: int=3,
+    auto_import: bool=True,
+) -> str:
+    """
+    Generate several 3D assets with Hyper3D Rodin in one call, e.g. all the props of a scene.
+    Blender submits the jobs in the background, at most max_concurrent generating at a time,
+    and imports each model as soon as it is finished. Check on the batch with get_rodin_batch_status.
+
+    Parameters:
+    - jobs: List of jobs, each a dict with:
+        - name: The name of the object in scene
+        - text_prompt: A short description of the desired model in **English**, or
+        - input_image_paths / input_image_urls: Images of the wanted asset, as for generate_hyper3d_model_via_images
+        - bbox_condition: Optional [Length, Width, Height] ratio of the model
+    - max_concurrent: How many jobs may be generating at the same time (default 3, at most 8)
+    - auto_import: Import each model when it is finished (default True)
+
+    Returns the batch_id and the initial status of every job.
+    """
+    try:
+        blender_jobs = []
+        for i, job in enumerate(jobs):
+            images = None
+            if job.get("input_image_paths") is not None or job.get("input_image_urls") is not None:
+                images, error = _load_rodin_images(job.get("input_image_paths"), job.get("input_image_urls"))
+                if error:
+                    return f"Job {i}: {error}"
+            blender_jobs.append({
+                "name": job.get("name"),
+                "text_prompt": job.get("text_prompt"),
+                "images": images,
+                "bbox_condition": _process_bbox(job.get("bbox_condition")),
+            })
+        blender = get_blender_connection()
+        result = blender.send_command("submit_rodin_batch", {
+            "jobs": blender_jobs,
+            "max_concurrent": max_concurrent,
+            "auto_import": auto_import,
+        })
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error generating Hyper3D batch: {str(e)}")
+        return f"Error generating Hyper3D batch: {str(e)}"
+
+@mcp.tool()
+async def get_rodin_batch_status(
+    ctx: Context,
+    batch_id: int=None,
+    wait_seconds: int=0,
+) -> str:
+    """
+    Get the status of every job in a Hyper3D Rodin batch started with generate_hyper3d_models.
+
+    Parameters:
+    - batch_id: The batch_id returned by generate_hyper3d_models. Without it, returns a summary of all batches.
+    - wait_seconds: Wait up to this many seconds for the batch to finish before returning (default 0, at most 1800)
+
+    Job states are "queued", "generating", "importing", "imported" (see its object and world_bounding_box),
+    "done" (finished but not imported, use import_generated_asset) and "failed" (see its error).
+    The batch is finished when no job is queued, generating or importing.
+    """
+    try:
+        params = {"wait": wait_seconds}
+        if batch_id is not None:
+            params["batch_id"] = batch_id
+        result = await send_command_with_progress(
+            ctx, "get_rodin_batch_status", params, timeout=min(float(wait_seconds), 1800.0) + DEFAULT_COMMAND_TIMEOUT
+        )
+        return json.dumps(result, indent=2)
+    except Exception as e:
+        logger.error(f"Error getting Hyper3D batch status: {str(e)}")
+        return f"Error getting Hyper3D batch status: {str(e)}"
+
+# Time allowed on top of the wait for downloading and importing the model
+RODIN_IMPORT_TIMEOUT = 300.0
+
+@mcp.tool()
+async def wait_for_rodin_job(
+    ctx: Context,
+    subscription_key: str=None,
+    request_id: str=None,
+    task_uuid: str=None,
+    timeout: int=600,
+    import_name: str=None,
+):
+    """
+    Wait in Blender until a Hyper3D Rodin generation task finishes, instead of calling poll_rodin_job_status repeatedly.
+    Blender polls the provider with increasing intervals and reports progress while waiting.
+
+    Parameters:
+    - subscription_key: For Hyper3D Rodin mode MAIN_SITE: The subscription_key given in the generate model step.
+    - request_id: For Hyper3D Rodin mode FAL_AI: The request_id given in the generate model step.
+    - task_uuid: For Hyper3D Rodin mode MAIN_SITE: The task_uuid given in the generate model step, needed to import.
+    - timeout: Maximum number of seconds to wait (default 600, at most 1800)
+    - import_name: If given, import the finished asset into the scene under this name, like import_generated_asset
+
+    Returns the final status: "done", "failed", or "timeout" if the task is still running (call again to keep waiting).
+    With import_name, also returns the import result, including the world_bounding_box of the imported mesh.
+    """
+    try:
+        params = {"timeout": timeout}
+        if subscription_key:
+            params["subscription_key"] = subscription_key
+            if task_uuid:
+                params["task_uuid"] = task_uuid
+        elif request_id:
+            params["request_id"] = request_id
+        if import_name:
+            params["import_name"] = import_name
+        result = await send_command_with_progress(
+            ctx, "wait_for_rodin_job", params, timeout=min(float(timeout), 1800.0) + RODIN_IMPORT_TIMEOUT
+        )
+        return result
+    except Exception as e:
+        logger.error(f"Error waiting for Hyper3D task: {str(e)}")
+        return f"Error waiting for Hyper3D task: {str(e)}"
+
 @mcp.tool()
 def import_generated_asset(
     ctx: Context,
@@ -909,13 +2188,17 @@ def asset_creation_strategy() -> str:
                     - Wait for another day and try again
                     - Go to hyper3d.ai to find out how to get their own API key
                     - Go to fal.ai to get their own private API key
-                2. Poll the status
-                    - Use poll_rodin_job_status() to check if the generation task has completed or failed
+                2. Wait for the task
+                    - Use wait_for_rodin_job() with import_name to wait for the task and import the generated GLB model in one step
+                    - If it returns "timeout", call it again; poll_rodin_job_status() checks the status without waiting
                 3. Import the asset
-                    - Use import_generated_asset() to import the generated GLB model the asset
+                    - If you didn't pass import_name, use import_generated_asset() to import the generated GLB model the asset
                 4. After importing the asset, ALWAYS check the world_bounding_box of the imported mesh, and adjust the mesh's location and size
                     Adjust the imported mesh's location, scale, rotation, so that the mesh is on the right spot.
 
+                To generate several assets, e.g. the props of a scene, submit them together with generate_hyper3d_models()
+                and follow them with get_rodin_batch_status(wait_seconds=...) instead of polling each one.
+
                 You can reuse assets previous generated by running python code to duplicate the object, without creating another generation task.
 
     3. Always check the world_bounding_box for each item so that: